@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+from typing import Optional, Iterable
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from common import __typeError__
+from torrent import Torrent
+from transport import Transport, getDefaultTransport
+from rateLimiter import TokenBucket
+from eztvAPI import (EZTVApi, EZTVHTTPError, EZTVJSONError, EZTVConnectionError, SHARED_RATE_LIMITER, API_URL, DEFAULT_MAX_RETRIES,
+                        __getPage__, __parseTorrents__, __retryDelay__)
+from instrumentation import getInstrumentation
+
+DEFAULT_MAX_CONCURRENCY: int = 8
+
+class AsyncEZTVApi(object):
+    """
+        asyncio version of EZTVApi.
+
+        Requests run concurrently on the pooled transport, spaced out by the same token bucket the blocking
+        EZTVApi uses, so a refresh of many pages or shows is bounded by the rate limit rather than by the
+        round-trip time of each request. Results are parsed into the same Torrent objects.
+
+        Methods:
+            getTorrents(limit, page, imdbId) Get one page of torrents.
+            getPages(pages, limit, imdbId) Get several pages concurrently.
+            getTorrentsByImdbId(imdbIds, limit, page) Get torrents for many shows concurrently.
+            close() Shut down the worker threads.
+    """
+    def __init__(self,
+                    transport: Optional[Transport] = None,
+                    rateLimiter: Optional[TokenBucket] = None,
+                    maxConcurrency: Optional[int] = DEFAULT_MAX_CONCURRENCY,
+                    apiUrl: Optional[str] = API_URL,
+                    maxRetries: Optional[int] = DEFAULT_MAX_RETRIES,
+                ) -> None:
+        """
+            @param: transport: Optional[Transport], the transport to make requests with, defaults to the shared transport.
+            @param: rateLimiter: Optional[TokenBucket], the rate limiter to share, defaults to SHARED_RATE_LIMITER.
+            @param: maxConcurrency: Optional[int], the maximum number of requests in flight.
+            @param: apiUrl: Optional[str], the get-torrents endpoint, ie: a local stand-in.
+            @param: maxRetries: Optional[int], retries of a throttled or failed request, with jittered backoff. 0 to not retry.
+        """
+        if (transport == None):
+            transport = getDefaultTransport()
+        elif (isinstance(transport, Transport) == False):
+            __typeError__("transport", "Transport", transport)
+        if (rateLimiter == None):
+            rateLimiter = SHARED_RATE_LIMITER
+        elif (isinstance(rateLimiter, TokenBucket) == False):
+            __typeError__("rateLimiter", "TokenBucket", rateLimiter)
+        if (maxConcurrency < 1):
+            errorMessage = "maxConcurrency must be >= 1"
+            raise ValueError(errorMessage)
+        if (maxRetries < 0):
+            errorMessage = "maxRetries must be >= 0"
+            raise ValueError(errorMessage)
+        self.transport: Transport = transport
+        self.rateLimiter: TokenBucket = rateLimiter
+        self.maxConcurrency: int = maxConcurrency
+        self.apiUrl: str = apiUrl
+        self.maxRetries: int = maxRetries
+        self._executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=maxConcurrency)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        return
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        self.close()
+        return
+
+    def close(self) -> None:
+        """Shut down the worker threads. Doesn't close the shared transport."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        return
+
+#########################
+# Helpers:
+#########################
+    async def __fetchPage__(self, limit:int, page:int, imdbId:Optional[str]) -> list[dict[str, object]]:
+        """
+            Fetch one page of raw torrent dicts under the rate limit.
+            @raises: EZTVConnectionError, EZTVHTTPError, EZTVJSONError
+        """
+        if (self._semaphore == None):
+            self._semaphore = asyncio.Semaphore(self.maxConcurrency)
+        url = EZTVApi.__buildUrl__(limit=limit, page=page, imdbId=imdbId, apiUrl=self.apiUrl)
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            attempt: int = 0
+            while (True):
+                delay = self.rateLimiter.reserve()
+                getInstrumentation().observe('eztv_rate_limit_wait_seconds', delay)
+                if (delay > 0):
+                    await asyncio.sleep(delay)
+                try:
+                    rawTorrents = await loop.run_in_executor(self._executor, __getPage__, self.transport, url)
+                    break
+                except EZTVHTTPError as e:
+                    delay = __retryDelay__(self.rateLimiter, e, attempt, self.maxRetries)
+                    if (delay == None):
+                        raise
+                attempt += 1
+                if (delay > 0):
+                    await asyncio.sleep(delay)
+            self.rateLimiter.onResponse(200)
+        EZTVApi.setLastCheck(datetime.utcnow())
+        return rawTorrents
+
+#########################
+# Methods:
+#########################
+    async def getTorrents(self, limit:Optional[int]=100, page:Optional[int]=1, imdbId:Optional[str]=None) -> tuple[bool, str | list[Torrent]]:
+        """
+            Get a list of torrents from eztv.
+            @param: limit: Optional[int], The maximum number of torrents to return. Valid values: 1-100 inclusive.
+            @param: page: Optional[int], The page to retrieve. Valid values > 0.
+            @param: imdbId: Optional[str], the imdb id of a show, retreives only episodes from that show.
+            @return: tuple[bool, str | list[Torrent]], the same as EZTVApi.getTorrents.
+        """
+        try:
+            rawTorrents = await self.__fetchPage__(limit, page, imdbId)
+        except EZTVHTTPError as e:
+            return (False, "HTTPError: %s" % str(e))
+        except EZTVJSONError as e:
+            return (False, "JSONDecodeError: %s" % str(e))
+        except EZTVConnectionError as e:
+            return (False, "ConnectionError: %s" % str(e))
+        return (True, __parseTorrents__(rawTorrents))
+
+    async def getPages(self, pages:Iterable[int], limit:Optional[int]=100, imdbId:Optional[str]=None) -> list[Torrent]:
+        """
+            Get several pages concurrently.
+            @param: pages: Iterable[int], the pages to retrieve.
+            @param: limit: Optional[int], torrents per page. Valid values: 1-100 inclusive.
+            @param: imdbId: Optional[str], the imdb id of a show, retreives only episodes from that show.
+            @return: list[Torrent], the torrents of every page, in page order.
+            @raises: EZTVApiError if any page can't be retrieved.
+        """
+        results = await asyncio.gather(*[self.__fetchPage__(limit, page, imdbId) for page in pages])
+        return [torrent for rawTorrents in results for torrent in __parseTorrents__(rawTorrents)]
+
+    async def getTorrentsByImdbId(self,
+                                    imdbIds: Iterable[str],
+                                    limit: Optional[int] = 100,
+                                    page: Optional[int] = 1,
+                                ) -> dict[str, tuple[bool, str | list[Torrent]]]:
+        """
+            Get torrents for many shows concurrently.
+            @param: imdbIds: Iterable[str], the imdb ids of the shows.
+            @param: limit: Optional[int], torrents per show. Valid values: 1-100 inclusive.
+            @param: page: Optional[int], the page to retrieve for every show.
+            @return: dict[str, tuple[bool, str | list[Torrent]]], getTorrents results keyed by imdb id.
+        """
+        imdbIds = list(dict.fromkeys(imdbIds))
+        results = await asyncio.gather(*[self.getTorrents(limit=limit, page=page, imdbId=imdbId) for imdbId in imdbIds])
+        return dict(zip(imdbIds, results))
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+
+from typing import Optional, Iterator
+import os
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, Future
+from common import __typeError__
+from torrent import Torrent
+from eztvAPI import EZTVApi, EZTVApiError, EZTVHTTPError, EZTVJSONError, __decodePage__
+from instrumentation import getInstrumentation
+
+##########################
+# Worker:
+##########################
+def __parsePage__(body:bytes) -> list[tuple]:
+    """
+        Decode and classify one page body in a worker process.
+        @return: list[tuple], one Torrent record per torrent, see Torrent.RECORD_RAW_KEYS.
+        @raises: EZTVJSONError
+    """
+    return [Torrent(rawTorrent).__toRecord__() for rawTorrent in __decodePage__(body)]
+
+##########################
+# Store:
+##########################
+class BackfillStore(object):
+    """
+        Append only JSON lines file of Torrent records, in the order they were ingested.
+
+        Methods:
+            addRecords(records) Append records.
+            iterRecords() Iterate over the stored records.
+            iterTorrents() Iterate over the stored records as Torrents.
+    """
+    def __init__(self, filePath:str) -> None:
+        """
+            @param: filePath: str, the file to append to, created if it doesn't exist.
+        """
+        self.filePath: str = filePath
+        return
+
+    def addRecords(self, records:list[tuple]) -> None:
+        try:
+            with open(self.filePath, 'a') as fileHandle:
+                fileHandle.writelines(json.dumps(record, separators=(',', ':')) + '\n' for record in records)
+        except Exception as e:
+            errorMessage = "Failed to write to '%s': %s" % (self.filePath, str(e.args))
+            raise RuntimeError(errorMessage)
+        return
+
+    def iterRecords(self) -> Iterator[tuple]:
+        if (os.path.exists(self.filePath) == False):
+            return
+        with open(self.filePath, 'r') as fileHandle:
+            for line in fileHandle:
+                if (line.endswith('\n') == False):
+                    break
+                yield tuple(json.loads(line))
+        return
+
+    def iterTorrents(self) -> Iterator[Torrent]:
+        for record in self.iterRecords():
+            yield Torrent(fromRecord=record)
+        return
+
+##########################
+# Backfill:
+##########################
+class Backfill(object):
+    """
+        Bulk ingestion of the historical catalog.
+
+        Raw page bodies are fetched, one at a time under the api's rate limit, while a process pool decodes
+        and classifies the pages already fetched. Workers send back compact Torrent records rather than
+        pickled Torrents, and pages are merged in to the store strictly in page order.
+
+        Methods:
+            run(startPage, maxPages) Ingest pages until the last page, returns the number of records stored.
+    """
+    def __init__(self,
+                    api: EZTVApi,
+                    store: BackfillStore,
+                    workers: Optional[int] = None,
+                    limit: Optional[int] = 100,
+                    maxInFlight: Optional[int] = None,
+                ) -> None:
+        """
+            @param: api: EZTVApi, the api to fetch pages with, its rate limiter and cache apply.
+            @param: store: BackfillStore, or any object with an addRecords(records) method.
+            @param: workers: Optional[int], the number of parsing processes, defaults to the number of cpus.
+            @param: limit: Optional[int], torrents per page. Valid values: 1-100 inclusive.
+            @param: maxInFlight: Optional[int], the maximum number of fetched pages waiting to be merged,
+                        defaults to twice the number of workers.
+        """
+        if (isinstance(api, EZTVApi) == False):
+            __typeError__("api", "EZTVApi", api)
+        if (workers == None):
+            workers = os.cpu_count() or 1
+        if (workers < 1):
+            errorMessage = "workers must be >= 1"
+            raise ValueError(errorMessage)
+        if (maxInFlight == None):
+            maxInFlight = workers * 2
+        if (maxInFlight < 1):
+            errorMessage = "maxInFlight must be >= 1"
+            raise ValueError(errorMessage)
+        self.api: EZTVApi = api
+        self.store: BackfillStore = store
+        self.workers: int = workers
+        self.limit: int = limit
+        self.maxInFlight: int = maxInFlight
+        return
+
+    def run(self, startPage:Optional[int]=1, maxPages:Optional[int]=None) -> tuple[bool, str | int]:
+        """
+            Ingest pages, newest first, from startPage until the last page or maxPages.
+            @param: startPage: Optional[int], the first page to ingest, ie: to resume a backfill.
+            @param: maxPages: Optional[int], the maximum number of pages to ingest, None for all.
+            @return: tuple[bool, str | int]
+                returnValue[0]: bool, success. False if a page couldn't be retrieved, pages before it are stored.
+                returnValue[1]: str | int, results.
+                            if success (returnValue[0]) == False then results is a string containg the error message.
+                            if success (returnValue[0]) == True then results is the number of records stored.
+        """
+        if (startPage < 1):
+            errorMessage = "startPage must be > 0"
+            raise ValueError(errorMessage)
+        instrumentation = getInstrumentation()
+        lastPage: Optional[int] = None
+        if (maxPages != None):
+            lastPage = startPage + maxPages - 1
+        recordCount: int = 0
+        errorMessage: Optional[str] = None
+        fetchErrorMessage: Optional[str] = None
+        pending: deque[Future] = deque()
+        page: int = startPage
+        fetching: bool = True
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            while (fetching == True or len(pending) > 0):
+            # Merge finished pages in order, waiting on the oldest only when there is nothing to fetch:
+                while (len(pending) > 0 and (pending[0].done() == True or fetching == False or len(pending) >= self.maxInFlight)):
+                    try:
+                        records = pending.popleft().result()
+                    except EZTVApiError as e:
+                        errorMessage = self.__errorMessage__(e)
+                        records = []
+                    if (errorMessage == None):
+                        self.store.addRecords(records)
+                        recordCount += len(records)
+                        instrumentation.increment('eztv_backfill_pages_total')
+                        instrumentation.increment('eztv_backfill_records_total', len(records))
+                # A short page is the last one, drop anything fetched past it (or past an error):
+                    if (errorMessage != None or len(records) < self.limit):
+                        fetching = False
+                        for future in pending:
+                            future.cancel()
+                        pending.clear()
+                if (fetching == False):
+                    break
+                url = self.api.__buildUrl__(limit=self.limit, page=page, apiUrl=self.api.apiUrl)
+                try:
+                    body = self.api.__fetchBody__(url)
+                except EZTVApiError as e:
+                # Still merge the pages fetched before this one:
+                    fetchErrorMessage = self.__errorMessage__(e)
+                    fetching = False
+                    continue
+                pending.append(executor.submit(__parsePage__, body))
+                if (page == lastPage):
+                    fetching = False
+                page += 1
+        if (errorMessage == None):
+            errorMessage = fetchErrorMessage
+        if (errorMessage != None):
+            return (False, errorMessage)
+        return (True, recordCount)
+
+    @staticmethod
+    def __errorMessage__(error:EZTVApiError) -> str:
+        if (isinstance(error, EZTVHTTPError) == True):
+            return "HTTPError: %s" % str(error)
+        elif (isinstance(error, EZTVJSONError) == True):
+            return "JSONDecodeError: %s" % str(error)
+        return "ConnectionError: %s" % str(error)
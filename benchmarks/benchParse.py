@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+    Micro-benchmark of torrent title parsing throughput.
+
+    Compares the original per-torrent chain of str.lower().find() calls and uncompiled re.match() calls
+    against torrent.classifyTitle, both with a cold cache and with a warm cache (every title already seen,
+    the common case when the same page is polled repeatedly). Parsing a new title is only modestly faster
+    than legacy, the main gain is the warm cache. The warm run cycles through at most
+    TITLE_CACHE_SIZE titles, a working set that fits the cache, otherwise every lookup would miss.
+
+    Usage: python3 benchmarks/benchParse.py [--titles N] [--repeat R]
+"""
+import os
+import sys
+import re
+import argparse
+from datetime import date
+from time import perf_counter
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common import MONTH_NUMBER_BY_LONG_NAME, MONTH_NUMBER_BY_SHORT_NAME
+from torrent import Torrent, classifyTitle, TITLE_CACHE_SIZE
+
+SHOW_NAMES: tuple[str] = ("The Daily Show", "Doctor Who", "Survivor", "Last Week Tonight With John Oliver", "The Office US",
+                            "House of the Dragon", "Taskmaster", "Jeopardy", "The Late Show", "Grey's Anatomy")
+QUALITIES: tuple[str] = ("2160p", "1080p", "720p", "480p", "", "HDTV")
+ENCODINGS: tuple[str] = ("x264", "x265", "XviD", "H264", "HEVC", "")
+
+def makeTitles(count:int) -> list[tuple[str, bool]]:
+    """Build a deterministic list of (title, isDaily) pairs."""
+    titles: list[tuple[str, bool]] = []
+    for i in range(count):
+        name = SHOW_NAMES[i % len(SHOW_NAMES)]
+        quality = QUALITIES[(i // 3) % len(QUALITIES)]
+        encoding = ENCODINGS[(i // 7) % len(ENCODINGS)]
+        if (i % 4 == 0):
+            title = "%s %04i %02i %02i %s WEB %s-GRP%i EZTV" % (name, 2000 + i % 24, i % 12 + 1, i % 28 + 1, quality, encoding, i)
+            titles.append((title, True))
+        else:
+            title = "%s S%02iE%02i %s WEB %s-GRP%i EZTV" % (name, i % 20 + 1, i % 24 + 1, quality, encoding, i)
+            titles.append((title, False))
+    return titles
+
+def legacyClassify(title:str, isDaily:bool) -> tuple:
+    """The classification Torrent.__fromRawData__ did before classifyTitle, without the print."""
+    if (title.lower().find('2160p') > -1):
+        quality = Torrent.QUALITY_2160P
+    elif (title.lower().find('1080p') > -1):
+        quality = Torrent.QUALITY_1080P
+    elif (title.lower().find('720p') > -1):
+        quality = Torrent.QUALITY_720P
+    elif (title.lower().find('540p') > -1):
+        quality = Torrent.QUALITY_540P
+    elif (title.lower().find('360p') > -1):
+        quality = Torrent.QUALITY_360P
+    elif (title.lower().find('240p') > -1):
+        quality = Torrent.QUALITY_240P
+    else:
+        quality = Torrent.QUALITY_UNKNOWN
+    if (title.lower().find('x264') > -1):
+        encoding = Torrent.ENCODING_X264
+    elif (title.lower().find('x265') > -1):
+        encoding = Torrent.ENCODING_X265
+    elif (title.lower().find('xvid') > -1):
+        encoding = Torrent.ENCODING_XVID
+    elif (title.lower().find('h264') > -1):
+        encoding = Torrent.ENCODING_H264
+    elif (title.lower().find('h265') > -1):
+        encoding = Torrent.ENCODING_H265
+    else:
+        encoding = Torrent.ENCODING_UNKNOWN
+    airedDate = None
+    if (isDaily == True):
+        airedDateYMDMatch = re.match(r'^.*(?P<year>\d{4}) (?P<month>\d+) (?P<day>\d+).*$', title)
+        airedDateDMYMatch = re.match(r'^.* (?P<day>\d+)(th|st)? (?P<month>\w+) (?P<year>\d{4})', title)
+        if (airedDateYMDMatch != None):
+            airedDate = date(int(airedDateYMDMatch['year']), int(airedDateYMDMatch['month']), int(airedDateYMDMatch['day']))
+        elif (airedDateDMYMatch != None):
+            month = MONTH_NUMBER_BY_SHORT_NAME.get(airedDateDMYMatch['month'].lower(), MONTH_NUMBER_BY_LONG_NAME.get(airedDateDMYMatch['month'].lower()))
+            if (month != None):
+                airedDate = date(int(airedDateDMYMatch['year']), month, int(airedDateDMYMatch['day']))
+    name = re.match(r'^(?P<name>.+) ([Ss]\d+[Ee]\d+|\d{4} \d{2} \d{2}|\d+(th|st)? \w+ \d{4}|[Ss]\d+) .+$', title)['name']
+    return (quality, encoding, airedDate, name)
+
+def timeIt(function, titles:list[tuple[str, bool]], repeat:int) -> float:
+    """Return the best titles per second over repeat runs."""
+    best: float = 0.0
+    for _ in range(repeat):
+        start = perf_counter()
+        for title, isDaily in titles:
+            function(title, isDaily)
+        elapsed = perf_counter() - start
+        best = max(best, len(titles) / elapsed)
+    return best
+
+def run(count:int, repeat:int) -> dict[str, float]:
+    titles = makeTitles(count)
+    results: dict[str, float] = {}
+    results['legacy'] = timeIt(legacyClassify, titles, repeat)
+    results['classifyTitle_cold'] = timeIt(classifyTitle.__wrapped__, titles, repeat)
+    workingSet = titles[:TITLE_CACHE_SIZE]
+    classifyTitle.cache_clear()
+    timeIt(classifyTitle, workingSet, 1)
+    results['classifyTitle_warm'] = timeIt(classifyTitle, workingSet, repeat)
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Title parse throughput micro-benchmark.")
+    parser.add_argument('--titles', help='--titles N, number of distinct titles.', type=int, default=5000)
+    parser.add_argument('--repeat', help='--repeat R, runs per variant, the best is reported.', type=int, default=5)
+    args = parser.parse_args()
+    for variant, rate in run(args.titles, args.repeat).items():
+        print("%-20s %12.0f titles/s" % (variant, rate))
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+    Local stand-in for a Transmission daemon's RPC interface.
+
+    Answers torrent_add / torrent-add like transmission-daemon, including the session id handshake, so
+    TorrentSink backends can be exercised over a real HTTP socket.
+
+    Usage: python3 benchmarks/fakeRpcServer.py [--port PORT] [--legacy] [--latency SECONDS]
+"""
+import json
+import uuid
+import argparse
+import threading
+from time import sleep
+from typing import Optional
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+SESSION_ID_HEADER: str = 'X-Transmission-Session-Id'
+
+class FakeTransmissionServer(object):
+    """
+        Threaded local HTTP server answering like transmission-daemon.
+
+        Routes:
+            POST /transmission/rpc A legacy request, or with jsonRpc a JSON-RPC 2.0 request or batch.
+                                    409 with a session id header until the current session id is sent.
+        Properties:
+            rpcUrl: str, pass to TransmissionSink(rpcUrl=...).
+            requestCount: int, requests answered, handshakes included.
+            handshakeCount: int, requests answered 409.
+            magnets: list[str], every magnet added, in order. Duplicates aren't added twice.
+    """
+    def __init__(self,
+                    jsonRpc: Optional[bool] = True,
+                    latency: Optional[float] = 0.0,
+                    port: Optional[int] = 0,
+                ) -> None:
+        """
+            @param: jsonRpc: Optional[bool], accept JSON-RPC 2.0, like Transmission 4.1+. False to only speak the legacy protocol.
+            @param: latency: Optional[float], seconds to wait before answering each request.
+            @param: port: Optional[int], the port to listen on, 0 for any free port.
+        """
+        self.jsonRpc: bool = jsonRpc
+        self.latency: float = latency
+        self.sessionId: str = uuid.uuid4().hex
+        self.requestCount: int = 0
+        self.handshakeCount: int = 0
+        self.magnets: list[str] = []
+        self._lock: threading.Lock = threading.Lock()
+        self._httpServer: ThreadingHTTPServer = ThreadingHTTPServer(('127.0.0.1', port), self.__makeHandler__())
+        self._httpServer.daemon_threads = True
+        self.rpcUrl: str = 'http://127.0.0.1:%i/transmission/rpc' % self._httpServer.server_address[1]
+        self._thread: Optional[threading.Thread] = None
+        return
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+        return
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._httpServer.serve_forever, daemon=True)
+        self._thread.start()
+        return
+
+    def stop(self) -> None:
+        self._httpServer.shutdown()
+        self._httpServer.server_close()
+        return
+
+    def expireSession(self) -> None:
+        """Start a new session, the next request without the new id is answered 409."""
+        self.sessionId = uuid.uuid4().hex
+        return
+
+    def __addMagnet__(self, magnet:str) -> str:
+        """Returns 'added', or 'duplicate' if the magnet was already added."""
+        with self._lock:
+            if (magnet in self.magnets):
+                return 'duplicate'
+            self.magnets.append(magnet)
+        return 'added'
+
+    def __makeHandler__(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+        # Headers and body are written separately, don't let Nagle hold the body for the client's delayed ack:
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args) -> None:
+                return
+
+            def __send__(self, statusCode:int, payload:object, headers:Optional[dict[str, str]]=None) -> None:
+                body = b''
+                if (payload != None):
+                    body = json.dumps(payload).encode()
+                self.send_response(statusCode)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers.get('Content-Length', '0')))
+                with server._lock:
+                    server.requestCount += 1
+                if (server.latency > 0):
+                    sleep(server.latency)
+                if (self.path != '/transmission/rpc'):
+                    self.__send__(404, None)
+                    return
+                if (self.headers.get(SESSION_ID_HEADER) != server.sessionId):
+                    with server._lock:
+                        server.handshakeCount += 1
+                    self.__send__(409, None, {SESSION_ID_HEADER: server.sessionId})
+                    return
+                try:
+                    request = json.loads(body)
+                except ValueError:
+                    self.__send__(400, None)
+                    return
+                if (server.jsonRpc == True and isinstance(request, list) == True):
+                    self.__send__(200, [self.__jsonRpc__(call) for call in request])
+                elif (server.jsonRpc == True and isinstance(request, dict) == True and 'jsonrpc' in request):
+                    self.__send__(200, self.__jsonRpc__(request))
+                else:
+                    self.__send__(200, self.__legacy__(request))
+                return
+
+            def __jsonRpc__(self, call:object) -> dict[str, object]:
+                if (isinstance(call, dict) == False or call.get('method') != 'torrent_add'):
+                    return {'jsonrpc': '2.0', 'error': {'code': -32601, 'message': 'Method not found'}, 'id': None}
+                params = call.get('params') or {}
+                if (params.get('filename') == None):
+                    return {'jsonrpc': '2.0', 'error': {'code': -32602, 'message': 'no filename'}, 'id': call.get('id')}
+                key = server.__addMagnet__(params['filename'])
+                return {'jsonrpc': '2.0', 'result': {'torrent_%s' % key: {'hashString': params['filename']}}, 'id': call.get('id')}
+
+            def __legacy__(self, request:object) -> dict[str, object]:
+            # Like transmission-daemon before JSON-RPC 2.0, anything but an object has no method name:
+                if (isinstance(request, dict) == False or 'method' not in request):
+                    return {'arguments': {}, 'result': 'no method name'}
+                if (request['method'] != 'torrent-add'):
+                    return {'arguments': {}, 'result': 'method name not recognized'}
+                arguments = request.get('arguments') or {}
+                if (arguments.get('filename') == None):
+                    return {'arguments': {}, 'result': 'no filename or metainfo specified'}
+                key = server.__addMagnet__(arguments['filename'])
+                return {'arguments': {'torrent-%s' % key: {'hashString': arguments['filename']}}, 'result': 'success'}
+
+        return Handler
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Local fake Transmission RPC server.")
+    parser.add_argument('--port', help='--port PORT, port to listen on.', type=int, default=9091)
+    parser.add_argument('--legacy', help='--legacy, only speak the pre JSON-RPC 2.0 protocol.', action='store_true')
+    parser.add_argument('--latency', help='--latency SECONDS, delay before each response.', type=float, default=0.0)
+    args = parser.parse_args()
+    fakeServer = FakeTransmissionServer(jsonRpc=(args.legacy == False), latency=args.latency, port=args.port)
+    print("Serving %s" % fakeServer.rpcUrl)
+    fakeServer._httpServer.serve_forever()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+    Local stand-in for the EZTV api.
+
+    Serves synthetic (or recorded) get-torrents pages of any size, plus fake .torrent files and screenshots,
+    over a real HTTP socket so the benchmarks exercise the transport, rate limiter and parser end to end.
+
+    Usage: python3 benchmarks/fakeServer.py [--port PORT] [--torrents N] [--latency SECONDS] [--rateLimit N]
+"""
+import os
+import sys
+import json
+import hashlib
+import argparse
+import threading
+from time import sleep, monotonic
+from collections import deque
+from typing import Optional
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from payloads import makePage, makeShowPage, SHOW_NAMES
+
+FAKE_TORRENT_SIZE: int = 16 * 1024
+FAKE_SCREENSHOT_SIZE: int = 32 * 1024
+
+class FakeEZTVServer(object):
+    """
+        Threaded local HTTP server answering like eztv.
+
+        Routes:
+            /api/get-torrents?limit=&page=[&imdb_id=] A page of torrents, newest first, with an ETag.
+                                                        429 with Retry-After when over rateLimit.
+            /torrents/<id>.torrent A fake .torrent file, honours Range requests.
+            /screenshots/<name>.jpg A fake screenshot.
+        Properties:
+            apiUrl: str, pass to EZTVApi(apiUrl=...).
+            requestCount: int, requests served so far.
+            throttledCount: int, api requests answered 429.
+    """
+    def __init__(self,
+                    newestId: Optional[int] = 100000,
+                    latency: Optional[float] = 0.0,
+                    showCount: Optional[int] = len(SHOW_NAMES),
+                    payloads: Optional[dict[str, object]] = None,
+                    port: Optional[int] = 0,
+                    rateLimit: Optional[float] = None,
+                ) -> None:
+        """
+            @param: newestId: Optional[int], the catalog size, ids count down from here.
+            @param: latency: Optional[float], seconds to wait before answering each request.
+            @param: showCount: Optional[int], the number of distinct shows in the catalog.
+            @param: payloads: Optional[dict[str, object]], recorded responses keyed by path and query, served instead of synthetic pages.
+            @param: port: Optional[int], the port to listen on, 0 for any free port.
+            @param: rateLimit: Optional[float], api requests allowed per second, over a sliding second. None for no limit.
+        """
+        self.newestId: int = newestId
+        self.latency: float = latency
+        self.showCount: int = showCount
+        self.payloads: Optional[dict[str, object]] = payloads
+        self.rateLimit: Optional[float] = rateLimit
+        self.requestCount: int = 0
+        self.throttledCount: int = 0
+        self._apiRequestTimes: deque[float] = deque()
+        self._lock: threading.Lock = threading.Lock()
+        self._httpServer: ThreadingHTTPServer = ThreadingHTTPServer(('127.0.0.1', port), self.__makeHandler__())
+        self._httpServer.daemon_threads = True
+        self.baseUrl: str = 'http://127.0.0.1:%i' % self._httpServer.server_address[1]
+        self.apiUrl: str = self.baseUrl + '/api/get-torrents'
+        self._thread: Optional[threading.Thread] = None
+        return
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+        return
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._httpServer.serve_forever, daemon=True)
+        self._thread.start()
+        return
+
+    def stop(self) -> None:
+        self._httpServer.shutdown()
+        self._httpServer.server_close()
+        return
+
+    def __isThrottled__(self) -> bool:
+    # Requests answered 429 don't count against the limit, like most real limiters:
+        if (self.rateLimit == None):
+            return False
+        with self._lock:
+            now = monotonic()
+            while (len(self._apiRequestTimes) > 0 and self._apiRequestTimes[0] <= now - 1.0):
+                self._apiRequestTimes.popleft()
+            if (len(self._apiRequestTimes) >= self.rateLimit):
+                self.throttledCount += 1
+                return True
+            self._apiRequestTimes.append(now)
+        return False
+
+    def __makeHandler__(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args) -> None:
+                return
+
+            def __send__(self, statusCode:int, body:bytes, headers:dict[str, str]) -> None:
+                self.send_response(statusCode)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+
+            def do_GET(self) -> None:
+                with server._lock:
+                    server.requestCount += 1
+                if (server.latency > 0):
+                    sleep(server.latency)
+                url = urlsplit(self.path)
+                if (url.path == '/api/get-torrents'):
+                    self.__apiPage__(url)
+                elif (url.path.startswith('/torrents/') == True):
+                    self.__file__(url.path, FAKE_TORRENT_SIZE, 'application/x-bittorrent')
+                elif (url.path.startswith('/screenshots/') == True):
+                    self.__file__(url.path, FAKE_SCREENSHOT_SIZE, 'image/jpeg')
+                else:
+                    self.__send__(404, b'', {})
+                return
+
+            def __apiPage__(self, url) -> None:
+                if (server.__isThrottled__() == True):
+                    self.__send__(429, b'', {'Retry-After': '1'})
+                    return
+                if (server.payloads != None):
+                    payload = server.payloads.get(self.path)
+                    if (payload == None):
+                        self.__send__(404, b'', {})
+                        return
+                else:
+                    query = parse_qs(url.query)
+                    limit = int(query.get('limit', ['30'])[0])
+                    page = int(query.get('page', ['1'])[0])
+                    if ('imdb_id' in query.keys()):
+                        payload = makeShowPage(server.newestId, int(query['imdb_id'][0]), limit, page, server.baseUrl, server.showCount)
+                    else:
+                        payload = makePage(server.newestId, limit, page, server.baseUrl, server.showCount)
+                body = json.dumps(payload).encode()
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()
+                if (self.headers.get('If-None-Match') == etag):
+                    self.__send__(304, b'', {'ETag': etag})
+                    return
+                self.__send__(200, body, {'Content-Type': 'application/json', 'ETag': etag})
+                return
+
+            def __file__(self, path:str, size:int, contentType:str) -> None:
+                seed = hashlib.sha1(path.encode()).digest()
+                body = (seed * (size // len(seed) + 1))[:size]
+                rangeHeader = self.headers.get('Range', '')
+                if (rangeHeader.startswith('bytes=') == True and rangeHeader.endswith('-') == True):
+                    start = int(rangeHeader[6:-1])
+                    if (start >= size):
+                        self.__send__(416, b'', {'Content-Range': 'bytes */%i' % size})
+                        return
+                    self.__send__(206, body[start:], {'Content-Type': contentType, 'Content-Range': 'bytes %i-%i/%i' % (start, size - 1, size)})
+                    return
+                self.__send__(200, body, {'Content-Type': contentType})
+                return
+
+        return Handler
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Local fake EZTV api server.")
+    parser.add_argument('--port', help='--port PORT, port to listen on.', type=int, default=8080)
+    parser.add_argument('--torrents', help='--torrents N, catalog size.', type=int, default=100000)
+    parser.add_argument('--latency', help='--latency SECONDS, delay before each response.', type=float, default=0.0)
+    parser.add_argument('--rateLimit', help='--rateLimit N, api requests per second before answering 429.', type=float, default=None)
+    args = parser.parse_args()
+    fakeServer = FakeEZTVServer(newestId=args.torrents, latency=args.latency, port=args.port, rateLimit=args.rateLimit)
+    print("Serving %s" % fakeServer.apiUrl)
+    fakeServer._httpServer.serve_forever()
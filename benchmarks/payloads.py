@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+    Synthetic and recorded get-torrents payloads for the benchmarks.
+
+    Synthetic torrents are deterministic: torrent i is always the same, ids count down from the newest, and
+    every field has the shape the real api returns. Payloads can be recorded to, and loaded from, a JSON file
+    so runs can be compared on exactly the same data.
+"""
+import json
+from typing import Optional
+
+SHOW_NAMES: tuple[str] = ("The Daily Show", "Doctor Who", "Survivor", "Last Week Tonight With John Oliver", "The Office US",
+                            "House of the Dragon", "Taskmaster", "Jeopardy", "The Late Show", "Greys Anatomy",
+                            "Top Gear", "The Simpsons", "Family Guy", "Saturday Night Live", "The Voice", "Big Brother")
+QUALITIES: tuple[str] = ("2160p", "1080p", "720p", "480p", "", "HDTV")
+ENCODINGS: tuple[str] = ("x264", "x265", "XviD", "H264", "HEVC", "")
+BASE_RELEASE_DATE: int = 1600000000
+
+def showName(index:int) -> str:
+    """Show names beyond the built in list are numbered, so match benchmarks can scale the show count."""
+    if (index < len(SHOW_NAMES)):
+        return SHOW_NAMES[index]
+    return "Synthetic Show %i" % index
+
+def makeRawTorrent(torrentId:int, baseUrl:Optional[str]='https://eztv.re', showCount:Optional[int]=len(SHOW_NAMES)) -> dict[str, object]:
+    """Build the raw api dict of torrent torrentId."""
+    name = showName(torrentId % showCount)
+    quality = QUALITIES[(torrentId // 3) % len(QUALITIES)]
+    encoding = ENCODINGS[(torrentId // 7) % len(ENCODINGS)]
+    season = torrentId % 20 + 1
+    episode = torrentId % 24 + 1
+    if (torrentId % 11 == 0):
+        season = 0
+        episode = 0
+        title = "%s %04i %02i %02i %s WEB %s-GRP EZTV" % (name, 2000 + torrentId % 24, torrentId % 12 + 1, torrentId % 28 + 1, quality, encoding)
+    else:
+        title = "%s S%02iE%02i %s WEB %s-GRP EZTV" % (name, season, episode, quality, encoding)
+    fileName = title.replace(' ', '.')
+    return {
+        'id': torrentId,
+        'hash': '%040x' % (torrentId * 2654435761),
+        'filename': fileName + '.mkv',
+        'episode_url': '%s/ep/%i/' % (baseUrl, torrentId),
+        'torrent_url': '%s/torrents/%i.torrent' % (baseUrl, torrentId),
+        'magnet_url': 'magnet:?xt=urn:btih:%040x&dn=%s' % (torrentId * 2654435761, fileName),
+        'title': title,
+        'imdb_id': '%07i' % (torrentId % showCount),
+        'season': str(season),
+        'episode': str(episode),
+        'small_screenshot': '//%s/screenshots/%i_small.jpg' % (baseUrl.split('://')[-1], torrentId),
+        'large_screenshot': '//%s/screenshots/%i_large.jpg' % (baseUrl.split('://')[-1], torrentId),
+        'seeds': torrentId % 97,
+        'peers': torrentId % 31,
+        'date_released_unix': BASE_RELEASE_DATE + torrentId * 60,
+        'size_bytes': str(100000000 + torrentId * 1000),
+    }
+
+def makePage(newestId:int, limit:int, page:int, baseUrl:Optional[str]='https://eztv.re', showCount:Optional[int]=len(SHOW_NAMES)) -> dict[str, object]:
+    """Build a get-torrents response, newest first, for a catalog whose newest torrent is newestId."""
+    firstId = newestId - (page - 1) * limit
+    torrentIds = range(firstId, max(firstId - limit, 0), -1)
+    response: dict[str, object] = {'torrents_count': newestId, 'limit': limit, 'page': page}
+    if (len(torrentIds) > 0):
+        response['torrents'] = [makeRawTorrent(torrentId, baseUrl, showCount) for torrentId in torrentIds]
+    return response
+
+def makeShowPage(newestId:int, showIndex:int, limit:int, page:int, baseUrl:Optional[str]='https://eztv.re', showCount:Optional[int]=len(SHOW_NAMES)) -> dict[str, object]:
+    """Build a get-torrents response filtered by imdb id, the torrents of show showIndex, newest first."""
+    newestShowId = newestId - (newestId - showIndex) % showCount
+    torrentIds = range(newestShowId - (page - 1) * limit * showCount, 0, -showCount)[:limit]
+    response: dict[str, object] = {'imdb_id': '%07i' % showIndex, 'limit': limit, 'page': page}
+    if (len(torrentIds) > 0):
+        response['torrents'] = [makeRawTorrent(torrentId, baseUrl, showCount) for torrentId in torrentIds]
+    return response
+
+def savePayloads(filePath:str, payloads:dict[str, object]) -> None:
+    """Record payloads keyed by request path and query, ie: '/api/get-torrents?limit=100&page=1'."""
+    with open(filePath, 'w') as fileHandle:
+        json.dump(payloads, fileHandle)
+    return
+
+def loadPayloads(filePath:str) -> dict[str, object]:
+    with open(filePath, 'r') as fileHandle:
+        return json.load(fileHandle)
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+    Repeatable benchmark suite.
+
+    Benchmarks:
+        parse       Torrent construction and classification throughput.
+        match       Show matching throughput against N shows.
+        configs     Configs snapshot save / load time, and per download cost, against history size.
+        poll        End to end poll latency against the local fake server.
+        rate        Throughput the adaptive rate controller sustains against a rate limited fake server.
+        sink        Handing selected torrents to the fake Transmission RPC server, batched and legacy.
+
+    Results are written as JSON so runs can be compared by a script.
+
+    Usage: python3 benchmarks/runBenchmarks.py [--only NAME ...] [--output FILE] [--quick]
+"""
+import os
+import sys
+import io
+import json
+import shutil
+import platform
+import argparse
+import tempfile
+from time import perf_counter, time
+from contextlib import redirect_stdout
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from payloads import makeRawTorrent, showName
+from fakeServer import FakeEZTVServer
+from fakeRpcServer import FakeTransmissionServer
+import benchParse
+from torrent import Torrent, classifyTitle
+from show import Show
+from showMatcher import ShowMatcher
+from configs import Configs
+from eztvAPI import EZTVApi
+from rateLimiter import TokenBucket, AdaptiveRateController
+from transport import Transport
+from torrentSink import TransmissionSink
+from downloadPipeline import DownloadPipeline
+
+def best(function, repeat:int) -> float:
+    """Run function repeat times, return the fastest wall time in seconds."""
+    times: list[float] = []
+    for _ in range(repeat):
+        start = perf_counter()
+        function()
+        times.append(perf_counter() - start)
+    return min(times)
+
+#########################
+# Benchmarks:
+#########################
+def benchParseThroughput(quick:bool) -> dict[str, object]:
+    count = 2000 if quick else 20000
+    rawTorrents = [makeRawTorrent(torrentId) for torrentId in range(1, count + 1)]
+    def construct():
+        for rawTorrent in rawTorrents:
+            Torrent(rawTorrent)
+    def constructAndClassify():
+        classifyTitle.cache_clear()
+        for rawTorrent in rawTorrents:
+            Torrent(rawTorrent).quality
+    results: dict[str, object] = {
+        'torrents': count,
+        'constructPerSecond': count / best(construct, 3),
+        'constructAndClassifyPerSecond': count / best(constructAndClassify, 3),
+    }
+    results['titles'] = benchParse.run(count, 3)
+    return results
+
+def benchMatchThroughput(quick:bool) -> dict[str, object]:
+    count = 2000 if quick else 10000
+    names = [Torrent(makeRawTorrent(torrentId, showCount=2000)).name for torrentId in range(1, count + 1)]
+    results: dict[str, object] = {'torrents': count, 'byShowCount': {}}
+    for showCount in ((10, 100) if quick else (10, 100, 1000)):
+        shows = [Show(name=showName(index)) for index in range(showCount)]
+        def naive():
+            for name in names:
+                for show in shows:
+                    name.lower().find(show.name.lower())
+        start = perf_counter()
+        matcher = ShowMatcher(shows, normalize=True)
+        buildSeconds = perf_counter() - start
+        def automaton():
+            for name in names:
+                matcher.match(name)
+        results['byShowCount'][str(showCount)] = {
+            'buildSeconds': buildSeconds,
+            'naivePerSecond': count / best(naive, 3),
+            'matcherPerSecond': count / best(automaton, 3),
+        }
+    return results
+
+def benchConfigs(quick:bool) -> dict[str, object]:
+    results: dict[str, object] = {'byHistorySize': {}}
+    for historySize in ((100, 1000) if quick else (100, 1000, 10000, 50000)):
+        directory = tempfile.mkdtemp()
+        try:
+            filePath = os.path.join(directory, 'configs')
+            configs = Configs(filePath)
+            for torrentId in range(1, historySize + 1):
+                configs.downloadedTorrents.add(Torrent(makeRawTorrent(torrentId)))
+            saveSeconds = best(configs.__save__, 3)
+            loadSeconds = best(lambda: Configs(filePath), 3)
+            newTorrents = [Torrent(makeRawTorrent(torrentId)) for torrentId in range(historySize + 1, historySize + 101)]
+            start = perf_counter()
+            for torrent in newTorrents:
+                configs.torrentDownloaded(torrent)
+            perDownloadSeconds = (perf_counter() - start) / len(newTorrents)
+            results['byHistorySize'][str(historySize)] = {
+                'saveSeconds': saveSeconds,
+                'loadSeconds': loadSeconds,
+                'perDownloadSeconds': perDownloadSeconds,
+            }
+        finally:
+            shutil.rmtree(directory)
+    return results
+
+def benchPoll(quick:bool) -> dict[str, object]:
+    from eztvDownloader import poll
+    results: dict[str, object] = {'byNewTorrents': {}}
+    for newTorrents in ((100, 500) if quick else (100, 500, 2000)):
+        directory = tempfile.mkdtemp()
+        try:
+            with FakeEZTVServer(newestId=100000 + newTorrents, latency=0.005) as fakeServer:
+                configs = Configs(os.path.join(directory, 'configs'))
+                configs.downloadPath = directory
+                configs.downloadPremiere = False
+                configs.downloadFirstSeason = False
+                configs.addShow(showName(1), Torrent.QUALITY_1080P, Torrent.QUALITY_1080P)
+                configs.addShow(showName(2), Torrent.QUALITY_720P, Torrent.QUALITY_1080P)
+                configs.setWatermark(100000, configs.lastSeenDate)
+                transport = Transport()
+                api = EZTVApi(transport=transport, rateLimiter=TokenBucket(1000), apiUrl=fakeServer.apiUrl)
+                start = perf_counter()
+            # Keep the poll's progress output out of the JSON report:
+                with redirect_stdout(io.StringIO()):
+                    poll(configs, api)
+                results['byNewTorrents'][str(newTorrents)] = {
+                    'pollSeconds': perf_counter() - start,
+                    'requests': fakeServer.requestCount,
+                    'downloaded': len(configs.downloadedTorrents),
+                }
+                transport.close()
+        finally:
+            shutil.rmtree(directory)
+    return results
+
+def benchRateControl(quick:bool) -> dict[str, object]:
+    from concurrent.futures import ThreadPoolExecutor
+    serverLimit = 20
+    duration = 5.0 if quick else 20.0
+    with FakeEZTVServer(newestId=1000, rateLimit=serverLimit) as fakeServer:
+        transport = Transport()
+        controller = AdaptiveRateController(4, minRate=1, maxRate=4 * serverLimit, increaseStep=2)
+        api = EZTVApi(transport=transport, rateLimiter=controller, apiUrl=fakeServer.apiUrl, maxRetries=10)
+        pages: list[int] = []
+        deadline = perf_counter() + duration
+        def worker() -> None:
+            while (perf_counter() < deadline):
+                success, _ = api.getTorrents(limit=5, page=1)
+                if (success == True):
+                    pages.append(1)
+            return
+        start = perf_counter()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for _ in range(8):
+                executor.submit(worker)
+        elapsed = perf_counter() - start
+        transport.close()
+        return {
+            'serverLimitPerSecond': serverLimit,
+            'seconds': elapsed,
+            'pagesPerSecond': len(pages) / elapsed,
+            'throttled': fakeServer.throttledCount,
+            'finalRate': controller.currentRate,
+        }
+
+def benchSink(quick:bool) -> dict[str, object]:
+    results: dict[str, object] = {}
+    torrentCount = 40
+    for protocol, jsonRpc in (('jsonRpc', True), ('legacy', False)):
+        directory = tempfile.mkdtemp()
+        try:
+            with FakeTransmissionServer(jsonRpc=jsonRpc, latency=0.002) as fakeRpcServer:
+                configs = Configs(os.path.join(directory, 'configs'))
+                transport = Transport()
+                sink = TransmissionSink(fakeRpcServer.rpcUrl, transport=transport)
+                pipeline = DownloadPipeline(configs, transport, sink=sink)
+                for torrentId in range(1, torrentCount + 1):
+                    pipeline.submit(Torrent(makeRawTorrent(torrentId)))
+                start = perf_counter()
+                downloadResults = pipeline.run()
+                results[protocol] = {
+                    'torrents': torrentCount,
+                    'seconds': perf_counter() - start,
+                    'requests': fakeRpcServer.requestCount,
+                    'handshakes': fakeRpcServer.handshakeCount,
+                    'added': len([result for result in downloadResults if result.error == None]),
+                }
+                transport.close()
+        finally:
+            shutil.rmtree(directory)
+    return results
+
+BENCHMARKS: dict[str, object] = {
+    'parse': benchParseThroughput,
+    'match': benchMatchThroughput,
+    'configs': benchConfigs,
+    'poll': benchPoll,
+    'rate': benchRateControl,
+    'sink': benchSink,
+}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="eztvApi benchmark suite.")
+    parser.add_argument('--only', help='--only NAME, run only these benchmarks.', nargs='+', choices=BENCHMARKS.keys())
+    parser.add_argument('--output', help='--output FILE, write JSON results here.', type=str, default=None)
+    parser.add_argument('--quick', help='--quick, smaller sizes for a fast sanity run.', action='store_true')
+    args = parser.parse_args()
+    report: dict[str, object] = {
+        'meta': {'time': time(), 'python': platform.python_version(), 'platform': platform.platform(), 'quick': args.quick},
+        'results': {},
+    }
+    for name, function in BENCHMARKS.items():
+        if (args.only != None and name not in args.only):
+            continue
+        print("Running %s..." % name, file=sys.stderr)
+        report['results'][name] = function(args.quick)
+    jsonReport = json.dumps(report, indent=4)
+    if (args.output != None):
+        with open(args.output, 'w') as fileHandle:
+            fileHandle.write(jsonReport)
+    else:
+        print(jsonReport)
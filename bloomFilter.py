@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+
+from typing import Optional, Iterator
+import os
+import math
+import struct
+import hashlib
+
+BLOOM_MAGIC: bytes = b'EZTVBLOM'
+BLOOM_VERSION: int = 1
+DEFAULT_FALSE_POSITIVE_RATE: float = 0.001
+__HEADER__ = struct.Struct('<8sHHQQQd')
+__DIGEST__ = struct.Struct('<QQ')
+
+class BloomFilter(object):
+    """
+        Bloom filter of string keys.
+
+        Sized from a capacity and a target false positive rate: a miss is always right, a hit only means
+        the key was probably added and has to be confirmed against the exact store. Each key is hashed once,
+        and its k bit positions are derived from the two halves of that digest.
+
+        Methods:
+            add(key) Add a key.
+            save(filePath) Atomically write the filter.
+            load(filePath) Class method, read a filter written by save().
+        Properties:
+            count: int, keys added.
+            isFull: bool, True once more than capacity keys were added and the false positive rate is above target.
+        Supports: `key in filter`.
+    """
+    def __init__(self,
+                    capacity: int,
+                    falsePositiveRate: Optional[float] = DEFAULT_FALSE_POSITIVE_RATE,
+                ) -> None:
+        """
+            @param: capacity: int, the number of keys the filter is sized for.
+            @param: falsePositiveRate: Optional[float], the target false positive rate at capacity, 0 -> 1 exclusive.
+        """
+        if (capacity < 1):
+            errorMessage = "capacity must be >= 1"
+            raise ValueError(errorMessage)
+        if (falsePositiveRate <= 0 or falsePositiveRate >= 1):
+            errorMessage = "falsePositiveRate must be in range 0 -> 1 exclusive"
+            raise ValueError(errorMessage)
+        self.capacity: int = capacity
+        self.falsePositiveRate: float = falsePositiveRate
+        self.bitCount: int = max(8, math.ceil(-capacity * math.log(falsePositiveRate) / (math.log(2) ** 2)))
+        self.hashCount: int = max(1, round(self.bitCount / capacity * math.log(2)))
+        self.count: int = 0
+        self._bits: bytearray = bytearray((self.bitCount + 7) // 8)
+        return
+
+    @property
+    def isFull(self) -> bool:
+        return (self.count > self.capacity)
+
+    def __positions__(self, key:str) -> Iterator[int]:
+    # Double hashing, position i is first + i * second, modulo the bit count:
+        first, second = __DIGEST__.unpack(hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest())
+        bitCount = self.bitCount
+        first %= bitCount
+        second = (second | 1) % bitCount
+        for _ in range(self.hashCount):
+            yield first
+            first += second
+            if (first >= bitCount):
+                first -= bitCount
+        return
+
+    def add(self, key:str) -> None:
+        bits = self._bits
+        for position in self.__positions__(key):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+        return
+
+    def __contains__(self, key:str) -> bool:
+        bits = self._bits
+        for position in self.__positions__(key):
+            if (bits[position >> 3] >> (position & 7) & 1 == 0):
+                return False
+        return True
+
+#########################
+# Save / Load:
+#########################
+    def save(self, filePath:str) -> None:
+        tempFilePath = filePath + '.tmp'
+        try:
+            with open(tempFilePath, 'wb') as fileHandle:
+                fileHandle.write(__HEADER__.pack(BLOOM_MAGIC, BLOOM_VERSION, self.hashCount, self.bitCount, self.capacity,
+                                                    self.count, self.falsePositiveRate))
+                fileHandle.write(self._bits)
+                fileHandle.flush()
+                os.fsync(fileHandle.fileno())
+            os.replace(tempFilePath, filePath)
+        except OSError as e:
+            errorMessage = "Failed to write bloom filter '%s': %s" % (filePath, str(e.args))
+            raise RuntimeError(errorMessage)
+        return
+
+    @classmethod
+    def load(cls, filePath:str):
+        """
+            @return: BloomFilter, the filter saved to filePath.
+            @raises: RuntimeError if the file can't be read or isn't a version 1 bloom filter.
+        """
+        try:
+            with open(filePath, 'rb') as fileHandle:
+                data = fileHandle.read()
+        except OSError as e:
+            errorMessage = "Failed to open bloom filter '%s': %s" % (filePath, str(e.args))
+            raise RuntimeError(errorMessage)
+        if (len(data) < __HEADER__.size):
+            errorMessage = "'%s' is not a bloom filter." % filePath
+            raise RuntimeError(errorMessage)
+        magic, version, hashCount, bitCount, capacity, count, falsePositiveRate = __HEADER__.unpack_from(data, 0)
+        if (magic != BLOOM_MAGIC or version != BLOOM_VERSION or len(data) != __HEADER__.size + (bitCount + 7) // 8):
+            errorMessage = "'%s' is not a version %i bloom filter." % (filePath, BLOOM_VERSION)
+            raise RuntimeError(errorMessage)
+        bloomFilter = cls(capacity, falsePositiveRate)
+        bloomFilter.hashCount = hashCount
+        bloomFilter.bitCount = bitCount
+        bloomFilter.count = count
+        bloomFilter._bits = bytearray(data[__HEADER__.size:])
+        return bloomFilter
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+
+from typing import Optional, Iterable
+import sqlite3
+import threading
+from datetime import datetime, date
+import pytz
+from common import __typeError__, __normalizeImdbId__
+from torrent import Torrent
+from showMatcher import normalizeShowName
+from eztvAPI import EZTVApi
+
+# Columns in Torrent record order (see Torrent.RECORD_RAW_KEYS), followed by the normalized show name:
+__RECORD_COLUMNS__: tuple[str] = ('id', 'hash', 'filename', 'title', 'episodeUrl', 'torrentUrl', 'magnetUrl', 'imdbId',
+                                    'season', 'episode', 'smallScreenshot', 'largeScreenshot', 'seeds', 'peers',
+                                    'releaseTimestamp', 'size', 'quality', 'encoding', 'airedDate', 'name')
+__SCHEMA__: tuple[str] = (
+    '''CREATE TABLE IF NOT EXISTS torrents (
+        id INTEGER PRIMARY KEY, hash TEXT NOT NULL, filename TEXT, title TEXT, episodeUrl TEXT, torrentUrl TEXT,
+        magnetUrl TEXT, imdbId TEXT, season INTEGER, episode INTEGER, smallScreenshot TEXT, largeScreenshot TEXT,
+        seeds INTEGER, peers INTEGER, releaseTimestamp INTEGER, size INTEGER, quality INTEGER, encoding TEXT,
+        airedDate INTEGER, name TEXT, nameKey TEXT
+    )''',
+    'CREATE INDEX IF NOT EXISTS torrentsByName ON torrents (nameKey, season, episode)',
+    'CREATE INDEX IF NOT EXISTS torrentsByImdbId ON torrents (imdbId, season, episode)',
+    'CREATE INDEX IF NOT EXISTS torrentsByQuality ON torrents (quality, encoding)',
+    'CREATE INDEX IF NOT EXISTS torrentsByRelease ON torrents (releaseTimestamp)',
+    'CREATE INDEX IF NOT EXISTS torrentsByHash ON torrents (hash)',
+)
+__INSERT_SQL__: str = 'INSERT OR REPLACE INTO torrents (%s, nameKey) VALUES (%s)' % (
+    ', '.join(__RECORD_COLUMNS__), ', '.join('?' * (len(__RECORD_COLUMNS__) + 1)))
+__SELECT_SQL__: str = 'SELECT %s FROM torrents' % ', '.join(__RECORD_COLUMNS__)
+
+def __rawTimestamp__(value:datetime) -> float:
+# Torrent.releaseDate is the raw timestamp read as local time and labelled UTC, invert that:
+    if (value.tzinfo == None):
+        value = pytz.utc.localize(value)
+    return value.astimezone(pytz.utc).replace(tzinfo=None).timestamp()
+
+class Catalog(object):
+    """
+        Local SQLite mirror of the EZTV catalog.
+
+        Torrents are stored as the same records the backfill produces (see Torrent.__toRecord__), indexed by
+        show name, imdb id, season / episode, quality / encoding, release date and info hash, so lookups run
+        against local data instead of re-crawling the api. Stored torrents are returned as Torrent objects with
+        their classification restored, not re-parsed.
+
+        Methods:
+            addTorrents(torrents) Insert or update torrents, returns the number written.
+            addRecords(records) Insert or update Torrent records, ie: as a Backfill store.
+            update(api, limit, maxPages) Fetch and store the torrents newer than the newest stored one.
+            query(...) Find torrents, see query().
+            get(torrentId) / getByHash(hash) One torrent, or None.
+            maxId() The newest stored torrent id, 0 if empty.
+            close() Close the database.
+        Supports: len().
+    """
+    def __init__(self, filePath:str) -> None:
+        """
+            @param: filePath: str, the database file, created if it doesn't exist. ':memory:' for a temporary catalog.
+        """
+        self.filePath: str = filePath
+        self._lock: threading.Lock = threading.Lock()
+        try:
+            self._connection: sqlite3.Connection = sqlite3.connect(filePath, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+            for statement in __SCHEMA__:
+                self._connection.execute(statement)
+            self._connection.commit()
+        except sqlite3.Error as e:
+            errorMessage = "Failed to open catalog '%s': %s" % (filePath, str(e.args))
+            raise RuntimeError(errorMessage)
+        return
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM torrents').fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+        return
+
+#########################
+# Write:
+#########################
+    def addRecords(self, records:Iterable[tuple]) -> int:
+        """
+            Insert or update Torrent records, newer seeds / peers replace the stored ones.
+            @param: records: Iterable[tuple], records from Torrent.__toRecord__.
+            @return: int, the number of records written.
+        """
+        rows = [tuple(record) + (normalizeShowName(record[-1]),) for record in records]
+        with self._lock:
+            with self._connection:
+                self._connection.executemany(__INSERT_SQL__, rows)
+        return len(rows)
+
+    def addTorrents(self, torrents:Iterable[Torrent]) -> int:
+        return self.addRecords(torrent.__toRecord__() for torrent in torrents)
+
+    def update(self, api:EZTVApi, limit:Optional[int]=100, maxPages:Optional[int]=None) -> tuple[bool, str | int]:
+        """
+            Fetch the torrents released since the newest stored one and store them.
+            @param: api: EZTVApi, the api to fetch with.
+            @param: limit: Optional[int], torrents per page. Valid values: 1-100
+            @param: maxPages: Optional[int], stop after this many pages. None for no limit.
+            @return: tuple[bool, str | int], the same as EZTVApi.getSince, with the number of torrents stored on success.
+        """
+        if (isinstance(api, EZTVApi) == False):
+            __typeError__("api", "EZTVApi", api)
+        if (self.maxId() == 0 and maxPages == None):
+        # Like getNew, an empty catalog only gets the first page, use a Backfill to fill it:
+            maxPages = 1
+        success, result = api.getSince(lastId=self.maxId(), limit=limit, maxPages=maxPages)
+        if (success == False):
+            return (success, result)
+        return (True, self.addTorrents(result))
+
+#########################
+# Read:
+#########################
+    def maxId(self) -> int:
+        with self._lock:
+            return self._connection.execute('SELECT MAX(id) FROM torrents').fetchone()[0] or 0
+
+    def __select__(self, where:str, parameters:list[object], suffix:Optional[str]='') -> list[Torrent]:
+        sql = __SELECT_SQL__
+        if (where != ''):
+            sql += ' WHERE ' + where
+        with self._lock:
+            rows = self._connection.execute(sql + suffix, parameters).fetchall()
+        return [Torrent(fromRecord=row) for row in rows]
+
+    def get(self, torrentId:int) -> Optional[Torrent]:
+        torrents = self.__select__('id = ?', [torrentId])
+        if (len(torrents) == 0):
+            return None
+        return torrents[0]
+
+    def getByHash(self, torrentHash:str) -> Optional[Torrent]:
+        torrents = self.__select__('hash = ?', [torrentHash], ' LIMIT 1')
+        if (len(torrents) == 0):
+            return None
+        return torrents[0]
+
+    def query(self,
+                name: Optional[str] = None,
+                imdbId: Optional[str] = None,
+                season: Optional[int] = None,
+                episode: Optional[int] = None,
+                minQuality: Optional[int] = None,
+                maxQuality: Optional[int] = None,
+                encodings: Optional[Iterable[str]] = None,
+                since: Optional[datetime] = None,
+                until: Optional[datetime] = None,
+                airedSince: Optional[date] = None,
+                airedUntil: Optional[date] = None,
+                limit: Optional[int] = None,
+                newestFirst: Optional[bool] = True,
+            ) -> list[Torrent]:
+        """
+            Find stored torrents, every given filter must match.
+            @param: name: Optional[str], the show name, compared the same way ShowMatcher(normalize=True) does.
+            @param: imdbId: Optional[str], the show's imdb id, with or without the 'tt' prefix.
+            @param: season: Optional[int], the season number.
+            @param: episode: Optional[int], the episode number.
+            @param: minQuality: Optional[int], the minimum Torrent.QUALITY_*.
+            @param: maxQuality: Optional[int], the maximum Torrent.QUALITY_*.
+            @param: encodings: Optional[Iterable[str]], any of these Torrent.ENCODING_* values.
+            @param: since: Optional[datetime], released at or after, compared with Torrent.releaseDate.
+            @param: until: Optional[datetime], released before, compared with Torrent.releaseDate.
+            @param: airedSince: Optional[date], daily episodes aired on or after.
+            @param: airedUntil: Optional[date], daily episodes aired on or before.
+            @param: limit: Optional[int], the maximum number of torrents to return.
+            @param: newestFirst: Optional[bool], order by release date, newest first, else oldest first.
+            @return: list[Torrent], the matching torrents.
+        """
+        conditions: list[str] = []
+        parameters: list[object] = []
+        for column, operator, value in (('nameKey', '=', None if name == None else normalizeShowName(name)),
+                                        ('imdbId', '=', None if imdbId == None else __normalizeImdbId__(imdbId)),
+                                        ('season', '=', season),
+                                        ('episode', '=', episode),
+                                        ('quality', '>=', minQuality),
+                                        ('quality', '<=', maxQuality),
+                                        ('releaseTimestamp', '>=', None if since == None else __rawTimestamp__(since)),
+                                        ('releaseTimestamp', '<', None if until == None else __rawTimestamp__(until)),
+                                        ('airedDate', '>=', None if airedSince == None else airedSince.toordinal()),
+                                        ('airedDate', '<=', None if airedUntil == None else airedUntil.toordinal()),
+                                    ):
+            if (value != None):
+                conditions.append('%s %s ?' % (column, operator))
+                parameters.append(value)
+        if (encodings != None):
+            encodings = list(encodings)
+            conditions.append('encoding IN (%s)' % ', '.join('?' * len(encodings)))
+            parameters.extend(encodings)
+        suffix = ' ORDER BY releaseTimestamp DESC, id DESC'
+        if (newestFirst == False):
+            suffix = ' ORDER BY releaseTimestamp ASC, id ASC'
+        if (limit != None):
+            suffix += ' LIMIT %i' % limit
+        return self.__select__(' AND '.join(conditions), parameters, suffix)
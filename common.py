@@ -1,6 +1,9 @@
 #!/usr/bin/env python3
-from typing import Any, NoReturn
-import requests
+from typing import Any, NoReturn, Optional
+import os
+import hashlib
+from transport import Transport, getDefaultTransport
+from instrumentation import getInstrumentation
 ################################
 # Type checking helper:
 ################################
@@ -30,20 +33,107 @@ MONTH_NUMBER_BY_SHORT_NAME: dict[str, int] = {
 ###############################
 # Helper funcitons:
 ###############################
-def __downloadFile__(url:str, destFile:str) -> str:
-    # Try to open the torrent url:
+def __normalizeImdbId__(imdbId:str) -> str:
+# The api wants imdb ids without the 'tt' prefix, and reports them the same way:
+    imdbId = imdbId.strip().lower()
+    if (imdbId.startswith('tt') == True):
+        imdbId = imdbId[2:]
+    return imdbId
+
+DOWNLOAD_CHUNK_SIZE: int = 64 * 1024
+
+def __hashFile__(filePath:str, hashName:str) -> Any:
+# Hash an existing partial download in chunks, so resuming can still verify the whole file:
+    hasher = hashlib.new(hashName)
+    with open(filePath, 'rb') as fileHandle:
+        for chunk in iter(lambda: fileHandle.read(DOWNLOAD_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher
+
+def __downloadFile__(url:str,
+                        destFile:str,
+                        transport: Optional[Transport] = None,
+                        expectedSize: Optional[int] = None,
+                        expectedHash: Optional[str] = None,
+                        hashName: Optional[str] = 'sha1',
+                    ) -> str:
+        """
+            Stream url to destFile in fixed size chunks through a '.part' file, then fsync and rename it in to place.
+            An existing '.part' file from an interrupted download is resumed with a Range request.
+            @param: url: str, the url to download.
+            @param: destFile: str, the final file path.
+            @param: transport: Optional[Transport], the transport to download with, defaults to the shared transport.
+            @param: expectedSize: Optional[int], the expected size in bytes, checked if given.
+            @param: expectedHash: Optional[str], the expected hex digest, checked if given.
+            @param: hashName: Optional[str], the hashlib algorithm of expectedHash.
+            @return: str, destFile.
+        """
+        if (transport == None):
+            transport = getDefaultTransport()
+        partFile = destFile + '.part'
+        offset: int = 0
+        if (os.path.exists(partFile) == True):
+            offset = os.path.getsize(partFile)
+    # Try to open the url, resuming from the end of the part file:
+        headers: dict[str, str] = {}
+        if (offset > 0):
+            headers['Range'] = 'bytes=%i-' % offset
         try:
-            response = requests.get(url)
+            response = transport.get(url, stream=True, headers=headers)
         except Exception as e:
             errorMessage = "Failed to open url '%s': %s" % (url, str(e.args))
             raise RuntimeError(errorMessage)
-    # Try to open the destination file:
         try:
-            fileHandle = open(destFile, 'wb')
-        except Exception as e:
-            errorMessage = "Failed to open '%s' for writing: %s" % (destFile, str(e.args))
+        # The part file is already complete, or doesn't match the remote file, start over:
+            if (response.status_code == 416):
+                response.close()
+                os.remove(partFile)
+                return __downloadFile__(url, destFile, transport, expectedSize, expectedHash, hashName)
+            if (response.status_code >= 400):
+                errorMessage = "Failed to download '%s': HTTP status %i" % (url, response.status_code)
+                raise RuntimeError(errorMessage)
+            mode = 'wb'
+            if (response.status_code == 206 and offset > 0 and
+                    response.headers.get('Content-Range', '').startswith('bytes %i-' % offset) == True):
+                mode = 'ab'
+        # Try to open the part file:
+            try:
+                fileHandle = open(partFile, mode)
+            except Exception as e:
+                errorMessage = "Failed to open '%s' for writing: %s" % (partFile, str(e.args))
+                raise RuntimeError(errorMessage)
+            hasher = None
+            if (expectedHash != None):
+                if (mode == 'ab'):
+                    hasher = __hashFile__(partFile, hashName)
+                else:
+                    hasher = hashlib.new(hashName)
+        # Write the data to the part file in chunks:
+            bytesWritten: int = 0
+            try:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    fileHandle.write(chunk)
+                    bytesWritten += len(chunk)
+                    if (hasher != None):
+                        hasher.update(chunk)
+                fileHandle.flush()
+                os.fsync(fileHandle.fileno())
+            except Exception as e:
+                errorMessage = "Failed to download '%s', kept '%s' to resume: %s" % (url, partFile, str(e.args))
+                raise RuntimeError(errorMessage)
+            finally:
+                fileHandle.close()
+                getInstrumentation().increment('eztv_download_bytes_total', bytesWritten)
+        finally:
+            response.close()
+    # Verify, then move in to place:
+        if (expectedSize != None and os.path.getsize(partFile) != expectedSize):
+            errorMessage = "Downloaded '%s' is %i bytes, expected %i." % (url, os.path.getsize(partFile), expectedSize)
+            os.remove(partFile)
+            raise RuntimeError(errorMessage)
+        if (hasher != None and hasher.hexdigest().lower() != expectedHash.lower()):
+            os.remove(partFile)
+            errorMessage = "Downloaded '%s' %s mismatch: got %s, expected %s." % (url, hashName, hasher.hexdigest(), expectedHash)
             raise RuntimeError(errorMessage)
-    # Write the data to the file:
-        fileHandle.write(response.content)
-        fileHandle.close()
+        os.replace(partFile, destFile)
         return destFile
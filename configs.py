@@ -9,10 +9,32 @@ from subprocess import check_output, CalledProcessError
 from common import __typeError__
 from torrent import Torrent
 from show import Show
+from downloadIndex import DownloadIndex, BLOOM_KEYS_PER_TORRENT
+from bloomFilter import BloomFilter
+from torrentSnapshot import TorrentSnapshot, writeSnapshot
+from stateJournal import StateJournal
+from showMatcher import ShowMatcher
+from episodeIndex import EpisodeIndex, EpisodeCandidate, ReleaseRanking, DEFAULT_RANKING_ORDER, DEFAULT_ENCODING_PREFERENCE
+from instrumentation import getInstrumentation
 
 class Configs(object):
+    # Minimum journal records between snapshots, the journal is also allowed to grow to the snapshot's size so
+    # the amortized cost of compacting stays constant per change:
+    COMPACT_EVERY: int = 256
+    __SETTING_KEYS__: tuple[str] = ('downloadPath', 'downloadPremiere', 'premiereMinQuality', 'premiereMaxQuality',
+                                    'downloadFirstSeason', 'firstSeasonMinQuality', 'firstSeasonMaxQuality', 'lastSeenId',
+                                    'resumePage', 'resumeId',
+                                    'bloomFalsePositiveRate')
+
     def __init__(self, filePath:str) -> None:
         self._filePath: str = filePath
+    # Download history, as a binary TorrentSnapshot next to the JSON settings:
+        self._historyPath: str = filePath + '.history'
+    # Optional bloom filter over the history, saved with it:
+        self._bloomPath: str = filePath + '.bloom'
+        self._journal: StateJournal = StateJournal(filePath + '.journal')
+        self._snapshotSize: int = 0
+        self._showMatcher: Optional[ShowMatcher] = None
         self.showList: list[Show] = []
         self.lastUpdate: datetime = pytz.utc.localize(datetime.fromtimestamp(0))
         self.updateInterval: timedelta = timedelta(minutes=15)
@@ -27,20 +49,33 @@ class Configs(object):
         self.downloadFirstSeason: bool = True
         self.firstSeasonMinQuality: int = Torrent.QUALITY_UNKNOWN
         self.firstSeasonMaxQuality: int = Torrent.QUALITY_ANY
-        self.downloadedTorrents: list[Torrent] = []
-        try:
-            self.__load__()
-        except RuntimeError:
+        self.downloadedTorrents: DownloadIndex = DownloadIndex()
+        self.lastSeenId: int = 0
+        self.lastSeenDate: datetime = pytz.utc.localize(datetime.fromtimestamp(0))
+    # Where a poll cut short by its page limit stopped, and the watermark to move to once it catches up:
+        self.resumePage: int = 0
+        self.resumeId: int = 0
+        self.resumeDate: datetime = pytz.utc.localize(datetime.fromtimestamp(0))
+        self.holdWindow: timedelta = timedelta(0)
+        self.rankingOrder: tuple[str] = DEFAULT_RANKING_ORDER
+        self.encodingPreference: tuple[str] = DEFAULT_ENCODING_PREFERENCE
+        self.bloomFalsePositiveRate: float = 0.0
+        self.episodeIndex: EpisodeIndex = EpisodeIndex()
+    # Torrent id of each held episode as last written to disk:
+        self._heldRecorded: dict[tuple, int] = {}
+    # Only start fresh without a config file, an unreadable history must not be replaced with an empty one:
+        if (os.path.exists(self._filePath) == False):
             self.__save__()
+        else:
+            self.__load__()
         return
 
 ########################
 # Load / Save:
 ########################
-    def __save__(self) -> None:
-    # Create config object and json configs string:
-        configDict = {
-            'showList': [],
+    def __settingsDict__(self, keys:Optional[list[str]]=None) -> dict[str, object]:
+    # Scalar settings, as stored in the snapshot and in journal 'set' records:
+        settingsDict = {
             'lastUpdate': self.lastUpdate.timestamp(),
             'updateInterval': self.updateInterval.total_seconds(),
             'downloadPath': self.downloadPath,
@@ -50,24 +85,139 @@ class Configs(object):
             'downloadFirstSeason': self.downloadFirstSeason,
             'firstSeasonMinQuality': self.firstSeasonMinQuality,
             'firstSeasonMaxQuality': self.firstSeasonMaxQuality,
-            'downloadedTorrents': [],
+            'lastSeenId': self.lastSeenId,
+            'lastSeenDate': self.lastSeenDate.timestamp(),
+            'resumePage': self.resumePage,
+            'resumeId': self.resumeId,
+            'resumeDate': self.resumeDate.timestamp(),
+            'holdWindow': self.holdWindow.total_seconds(),
+            'rankingOrder': list(self.rankingOrder),
+            'encodingPreference': list(self.encodingPreference),
+            'bloomFalsePositiveRate': self.bloomFalsePositiveRate,
         }
-        for show in self.showList:
-            configDict['showList'].append(show.__toDict__())
-        for torrent in self.downloadedTorrents:
-            configDict['downloadedTorrents'].append(torrent.__toDict__())
+        if (keys != None):
+            return {key: settingsDict[key] for key in keys}
+        return settingsDict
+
+    def __applySettings__(self, settingsDict:dict[str, object]) -> None:
+        for key, value in settingsDict.items():
+            if (key in ('lastUpdate', 'lastSeenDate', 'resumeDate')):
+                setattr(self, key, pytz.utc.localize(datetime.fromtimestamp(value)))
+            elif (key in ('updateInterval', 'holdWindow')):
+                setattr(self, key, timedelta(seconds=value))
+            elif (key in ('rankingOrder', 'encodingPreference')):
+                setattr(self, key, tuple(value))
+            elif (key in self.__SETTING_KEYS__):
+                setattr(self, key, value)
+        self.episodeIndex.ranking = ReleaseRanking(self.rankingOrder, self.encodingPreference)
+        self.episodeIndex.holdWindow = self.holdWindow
+        return
+
+    def __candidateDict__(self, candidate:EpisodeCandidate) -> dict[str, object]:
+        showIndex: Optional[int] = None
+        if (candidate.show != None):
+            showIndex = self.showList.index(candidate.show)
+        return {'torrent': candidate.torrent.__toDict__(), 'show': showIndex, 'since': candidate.since}
+
+    def __restoreCandidate__(self, candidateDict:dict[str, object]) -> None:
+        torrent = Torrent(fromDict=candidateDict['torrent'])
+        show: Optional[Show] = None
+        if (candidateDict['show'] != None):
+            show = self.showList[candidateDict['show']]
+        key = self.episodeIndex.keyFor(torrent, show)
+        self.episodeIndex.restore(EpisodeCandidate(key, torrent, show, candidateDict['since']))
+        self._heldRecorded[key] = torrent.id
+        return
+
+    def __syncBloomFilter__(self) -> None:
+    # Drop the filter when disabled, and rebuild it when missing, stale, for another rate, or past its capacity:
+        bloomFilter = self.downloadedTorrents.bloomFilter
+        if (self.bloomFalsePositiveRate <= 0):
+            self.downloadedTorrents.bloomFilter = None
+        elif (bloomFilter == None or bloomFilter.falsePositiveRate != self.bloomFalsePositiveRate or
+                bloomFilter.isFull == True or bloomFilter.count < BLOOM_KEYS_PER_TORRENT * len(self.downloadedTorrents)):
+            self.downloadedTorrents.buildBloomFilter(self.bloomFalsePositiveRate)
+        return
+
+    def __writeBloomFilter__(self) -> None:
+    # The filter always covers the history on disk, it holds the snapshot plus torrents added since:
+        self.__syncBloomFilter__()
+        if (self.downloadedTorrents.bloomFilter != None):
+            self.downloadedTorrents.bloomFilter.save(self._bloomPath)
+        elif (os.path.exists(self._bloomPath) == True):
+            os.remove(self._bloomPath)
+        return
+
+    def __save__(self) -> None:
+        """Write a full snapshot atomically, then truncate the journal."""
+        with getInstrumentation().timer('eztv_config_save_seconds'):
+            self.__writeSnapshot__()
+        return
+
+    def __writeSnapshot__(self) -> None:
+    # Create config object and json configs string:
+        configDict = self.__settingsDict__()
+        configDict['showList'] = [show.__toDict__() for show in self.showList]
+        configDict['heldEpisodes'] = [self.__candidateDict__(candidate) for candidate in self.episodeIndex]
         jsonConfigs = json.dumps(configDict, indent=4)
-    # Try to open the file:
+    # Write the bloom filter before the history it covers, so a crash between the two leaves it holding extra
+    # keys rather than missing some:
+        self.__writeBloomFilter__()
+        bloomFilter = self.downloadedTorrents.bloomFilter
+    # Write the history first, a crash before the JSON is replaced only replays journal records it already has:
+        writeSnapshot(self._historyPath, self.downloadedTorrents.iterRecords())
+        oldSnapshot = self.downloadedTorrents.snapshot
+        self.downloadedTorrents = DownloadIndex(snapshot=TorrentSnapshot(self._historyPath), bloomFilter=bloomFilter)
+        if (oldSnapshot != None):
+            oldSnapshot.close()
+    # Try to open the temp file:
+        tempFilePath = self._filePath + '.tmp'
         try:
-            fileHandle = open(self._filePath, 'w')
+            fileHandle = open(tempFilePath, 'w')
         except Exception as e:
-            errorMessage = "FATAL: Failed to open '%s' for writing: %s" % (self._filePath, str(e.args))
+            errorMessage = "FATAL: Failed to open '%s' for writing: %s" % (tempFilePath, str(e.args))
             raise RuntimeError(errorMessage)
-    # Write json to the file and close it:
+    # Write json to the temp file, then replace the config file with it:
         fileHandle.write(jsonConfigs)
+        fileHandle.flush()
+        os.fsync(fileHandle.fileno())
         fileHandle.close()
+        os.replace(tempFilePath, self._filePath)
+        self._journal.truncate()
+        self._heldRecorded = {candidate.key: candidate.torrent.id for candidate in self.episodeIndex}
+        self._snapshotSize = len(self.showList) + len(self.downloadedTorrents)
         return
-    
+
+    def __record__(self, op:str, data:object) -> None:
+        """Append a change to the journal, compacting into a snapshot once the journal is large enough."""
+        getInstrumentation().increment('eztv_config_records_total', labels={'op': op})
+        if (self._journal.append(op, data) >= max(self.COMPACT_EVERY, self._snapshotSize)):
+            self.__save__()
+        return
+
+    def __replay__(self, op:str, data:object) -> None:
+    # Every op is idempotent, a crash between writing a snapshot and truncating the journal replays records
+    # that are already in the snapshot:
+        if (op == 'set'):
+            self.__applySettings__(data)
+        elif (op == 'show'):
+            self._showMatcher = None
+        # Update a listed show in place, held episodes restored before this record refer to it:
+            if (data['index'] < len(self.showList)):
+                self.showList[data['index']].__fromDict__(data['show'])
+            else:
+                self.showList.append(Show(fromDict=data['show']))
+        elif (op == 'torrentDownloaded'):
+            self.downloadedTorrents.add(Torrent(fromDict=data))
+        elif (op == 'hold'):
+            self.__restoreCandidate__(data)
+        elif (op == 'release'):
+            for candidate in self.episodeIndex:
+                if (candidate.torrent.id == data['id']):
+                    self.episodeIndex.discard(candidate.key)
+                    self._heldRecorded.pop(candidate.key, None)
+        return
+
     def __load__(self) -> None:
     # Try to open the file:
         try:
@@ -82,19 +232,49 @@ class Configs(object):
         except json.JSONDecodeError as e:
             errorMessage = "FATAL: Failed to load JSON from '%s': %s" % (self._filePath, e.msg)
             raise RuntimeError(errorMessage)
+    # Only the history is mapped, torrents are built when looked up. Configs saved before the binary history
+    # keep their downloadedTorrents in the JSON until the next save. Open everything that can fail before
+    # replacing anything, so a failed reload leaves the loaded configs as they were:
+        snapshot: Optional[TorrentSnapshot] = None
+        if (os.path.exists(self._historyPath) == True):
+            snapshot = TorrentSnapshot(self._historyPath)
+        bloomFilter: Optional[BloomFilter] = None
+        if (os.path.exists(self._bloomPath) == True):
+            try:
+                bloomFilter = BloomFilter.load(self._bloomPath)
+            except RuntimeError:
+                bloomFilter = None
+        try:
+            showList = [Show(fromDict=showDict) for showDict in configDict['showList']]
+            downloadedTorrents = DownloadIndex(
+                (Torrent(fromDict=torrentDict) for torrentDict in configDict.get('downloadedTorrents', [])),
+                snapshot,
+                bloomFilter
+            )
+        except (KeyError, TypeError, ValueError) as e:
+            if (snapshot != None):
+                snapshot.close()
+            errorMessage = "FATAL: Malformed config '%s': %s" % (self._filePath, str(e))
+            raise RuntimeError(errorMessage)
     # Load values from config dict:
-        self.showList = []
-        for showDict in configDict['showList']:
-            self.showList.append( Show(fromDict=showDict) )
-        self.lastUpdate = pytz.utc.localize(datetime.fromtimestamp(configDict['lastUpdate']))
-        self.updateInterval = timedelta(seconds=configDict['updateInterval'])
-        self.downloadPath = configDict['downloadPath']
-        self.downloadPremiere = configDict['downloadPremiere']
-        self.premiereMinQuality = configDict['premiereMinQuality']
-        self.premiereMaxQuality = configDict['premiereMaxQuality']
-        self.downloadFirstSeason = configDict['downloadFirstSeason']
-        self.firstSeasonMinQuality = configDict['firstSeasonMinQuality']
-        self.firstSeasonMaxQuality = configDict['firstSeasonMaxQuality']
+        oldSnapshot = self.downloadedTorrents.snapshot
+        self._showMatcher = None
+        self.showList = showList
+        self.downloadedTorrents = downloadedTorrents
+        if (oldSnapshot != None):
+            oldSnapshot.close()
+        self.episodeIndex = EpisodeIndex()
+        self._heldRecorded = {}
+        self.__applySettings__(configDict)
+        for candidateDict in configDict.get('heldEpisodes', []):
+            self.__restoreCandidate__(candidateDict)
+        self._snapshotSize = len(self.showList) + len(self.downloadedTorrents)
+    # Replay changes made since the snapshot:
+        for op, data in self._journal.replay():
+            self.__replay__(op, data)
+        self.__syncBloomFilter__()
+        if (self._journal.torn == True):
+            self.__save__()
         return
 ########################
 # Setters:
@@ -106,7 +286,7 @@ class Configs(object):
             errorMessage = "path '%s' doesn't exist." % __value
             raise FileNotFoundError(errorMessage)
         self.downloadPath = __value
-        self.__save__()
+        self.__record__('set', self.__settingsDict__(['downloadPath']))
         return
     
     def setUpdateInterval(self, __value:int) -> None:
@@ -116,14 +296,14 @@ class Configs(object):
             errorMessage = "value must be >= 5"
             raise ValueError(errorMessage)
         self.updateInterval = timedelta(minutes=__value)
-        self.__save__()
+        self.__record__('set', self.__settingsDict__(['updateInterval']))
         return
 
     def setDownloadPremiere(self, __value:bool) -> None:
         if (isinstance(__value, bool) == False):
             __typeError__('value', 'bool', __value)
         self.downloadPremiere = __value
-        self.__save__()
+        self.__record__('set', self.__settingsDict__(['downloadPremiere']))
         return
 
     def setPremiereQuality(self, __minValue:int, __maxValue:int) -> None:
@@ -142,14 +322,14 @@ class Configs(object):
             raise ValueError(errorMessage)
         self.premiereMinQuality = __minValue
         self.premiereMaxQuality = __maxValue
-        self.__save__()
+        self.__record__('set', self.__settingsDict__(['premiereMinQuality', 'premiereMaxQuality']))
         return
     
     def setDownloadFirstSeason(self, __value:bool) -> None:
         if (isinstance(__value, bool) == False):
             __typeError__("value", "bool", __value)
         self.downloadFirstSeason = __value
-        self.__save__()
+        self.__record__('set', self.__settingsDict__(['downloadFirstSeason']))
         return
     
     def setFirstSeasonQuality(self, __minValue:int, __maxValue:int) -> None:
@@ -168,28 +348,155 @@ class Configs(object):
             raise ValueError(errorMessage)
         self.firstSeasonMinQuality = __minValue
         self.firstSeasonMaxQuality = __maxValue
-        self.__save__()
+        self.__record__('set', self.__settingsDict__(['firstSeasonMinQuality', 'firstSeasonMaxQuality']))
         return
     
+    def setHoldWindow(self, __value:int) -> None:
+        """Minutes to wait for a better release of an episode before downloading the best one seen, 0 to not wait."""
+        if (isinstance(__value, int) == False):
+            __typeError__("value", "int", __value)
+        if (__value < 0):
+            errorMessage = "value must be >= 0"
+            raise ValueError(errorMessage)
+        self.holdWindow = timedelta(minutes=__value)
+        self.episodeIndex.holdWindow = self.holdWindow
+        self.__record__('set', self.__settingsDict__(['holdWindow']))
+        return
+
+    def setRanking(self, order:list[str], encodingPreference:Optional[list[str]]=None) -> None:
+        """
+            Set how releases of the same episode are ranked.
+            @param: order: list[str], fields from episodeIndex.RANKING_FIELDS, most significant first.
+            @param: encodingPreference: Optional[list[str]], Torrent.ENCODING_* values, most preferred first. None to keep the current.
+        """
+        if (encodingPreference == None):
+            encodingPreference = self.encodingPreference
+        ranking = ReleaseRanking(order, encodingPreference)
+        self.rankingOrder = ranking.order
+        self.encodingPreference = ranking.encodingPreference
+        self.episodeIndex.ranking = ranking
+        self.__record__('set', self.__settingsDict__(['rankingOrder', 'encodingPreference']))
+        return
+
+    def setBloomFilter(self, falsePositiveRate:float) -> None:
+        """
+            Check a bloom filter of the download history before the history itself, saved next to the config file.
+            @param: falsePositiveRate: float, the target false positive rate, 0 -> 1 exclusive, ie: 0.001. 0 to disable.
+        """
+        if (isinstance(falsePositiveRate, (int, float)) == False):
+            __typeError__("falsePositiveRate", "float", falsePositiveRate)
+        if (falsePositiveRate < 0 or falsePositiveRate >= 1):
+            errorMessage = "falsePositiveRate must be in range 0 -> 1, 0 to disable."
+            raise ValueError(errorMessage)
+        self.bloomFalsePositiveRate = float(falsePositiveRate)
+        self.__writeBloomFilter__()
+        self.__record__('set', self.__settingsDict__(['bloomFalsePositiveRate']))
+        return
+
+    def setLastUpdate(self, __value:datetime) -> None:
+        if (isinstance(__value, datetime) == False):
+            __typeError__("value", "datetime", __value)
+        self.lastUpdate = __value
+        self.__record__('set', self.__settingsDict__(['lastUpdate']))
+        return
+
+    def setWatermark(self,
+                        lastSeenId: int,
+                        lastSeenDate: datetime,
+                        resumePage: Optional[int] = 0,
+                        resumeId: Optional[int] = 0,
+                        resumeDate: Optional[datetime] = None,
+                    ) -> None:
+        """
+            Set the sync watermark, and the resume cursor of a poll that stopped before reaching it.
+            @param: lastSeenId: int, every torrent up to this id was retrieved.
+            @param: lastSeenDate: datetime, every torrent up to this release date was retrieved.
+            @param: resumePage: Optional[int], the page the next poll continues from, 0 if the last poll caught up.
+            @param: resumeId: Optional[int], the newest torrent id of the unfinished walk, the watermark once it catches up.
+            @param: resumeDate: Optional[datetime], the newest release date of the unfinished walk.
+        """
+        if (isinstance(lastSeenId, int) == False):
+            __typeError__("lastSeenId", "int", lastSeenId)
+        if (isinstance(lastSeenDate, datetime) == False):
+            __typeError__("lastSeenDate", "datetime", lastSeenDate)
+        if (resumeDate == None):
+            resumeDate = pytz.utc.localize(datetime.fromtimestamp(0))
+        self.lastSeenId = lastSeenId
+        self.lastSeenDate = lastSeenDate
+        self.resumePage = resumePage
+        self.resumeId = resumeId
+        self.resumeDate = resumeDate
+    # One record, so a crash can't leave the cursor pointing past a watermark it doesn't belong to:
+        self.__record__('set', self.__settingsDict__(['lastSeenId', 'lastSeenDate', 'resumePage', 'resumeId', 'resumeDate']))
+        return
+
     def torrentDownloaded(self, torrent:Torrent) -> None:
-        self.downloadedTorrents.append(torrent)
-        self.__save__()
+        if (self.downloadedTorrents.add(torrent) == True):
+            self.__record__('torrentDownloaded', torrent.__toDict__())
         return
+
+    def isDownloaded(self, torrent:Torrent) -> bool:
+        """True if this torrent, by id or info hash, was already downloaded."""
+        return (torrent in self.downloadedTorrents)
     
+    def holdEpisode(self, torrent:Torrent, show:Optional[Show]=None) -> bool:
+        """
+            Offer a release to the episode index, unless that episode was already downloaded.
+            @return: bool, True if it is now the best release of its episode.
+        """
+        if (self.isDownloaded(torrent) == True or self.downloadedTorrents.findEpisode(torrent) != None):
+            return False
+        return self.episodeIndex.offer(torrent, show)
+
+    def releaseEpisodes(self, now:Optional[float]=None) -> list[EpisodeCandidate]:
+        """
+            Take the episodes whose hold window has passed, and journal the ones still held.
+            @param: now: Optional[float], the current unix time, defaults to now.
+            @return: list[EpisodeCandidate], the best release of each ready episode.
+        """
+        readyList = self.episodeIndex.ready(now)
+        for candidate in readyList:
+            recordedId = self._heldRecorded.pop(candidate.key, None)
+            if (recordedId != None):
+                self.__record__('release', {'id': recordedId})
+        for candidate in self.episodeIndex:
+            if (self._heldRecorded.get(candidate.key) != candidate.torrent.id):
+                self._heldRecorded[candidate.key] = candidate.torrent.id
+                self.__record__('hold', self.__candidateDict__(candidate))
+        return readyList
+
     def showSeen(self, show:Show, torrent:Torrent) -> None:
         show.seen(torrent)
-        self.__save__()
-        pass
+        self.__record__('show', {'index': self.showList.index(show), 'show': show.__toDict__()})
+        return
 ###########################
 # Methods:
 ###########################
+    def getFilePaths(self) -> tuple[str, str, str]:
+        """Returns the snapshot, journal and download history file paths."""
+        return (self._filePath, self._filePath + '.journal', self._historyPath)
+
+    def reload(self) -> None:
+        """Reload from the config files, picking up changes made by other processes."""
+        self.__load__()
+        return
+
+    def getShowMatcher(self) -> ShowMatcher:
+        """Returns the matcher for showList, rebuilt only after shows are added or reloaded."""
+        if (self._showMatcher == None):
+            self._showMatcher = ShowMatcher(self.showList, normalize=True)
+        return self._showMatcher
+
     def addShow(self,
                     name: str,
                     minQuality:Optional[int]=Torrent.QUALITY_UNKNOWN,
-                    maxQuality:Optional[int]=Torrent.QUALITY_ANY
+                    maxQuality:Optional[int]=Torrent.QUALITY_ANY,
+                    imdbId:Optional[str]=None,
                 ) -> Show:
         if (isinstance(name, str) == False):
             __typeError__("name", "str", name)
+        if (imdbId != None and isinstance(imdbId, str) == False):
+            __typeError__("imdbId", "str", imdbId)
         if (isinstance(minQuality, int) == False):
             __typeError__("minQuality", "int", minQuality)
         if (isinstance(maxQuality, int) == False):
@@ -203,5 +510,8 @@ class Configs(object):
         if (minQuality > maxQuality):
             errorMessage = "minQuality must be less than or equal to maxQuality."
             raise ValueError(errorMessage)
-        self.showList.append( Show(name=name, minQuality=minQuality, maxQuality=maxQuality) )
-        self.__save__()
\ No newline at end of file
+        show = Show(name=name, minQuality=minQuality, maxQuality=maxQuality, imdbId=imdbId)
+        self.showList.append(show)
+        self._showMatcher = None
+        self.__record__('show', {'index': len(self.showList) - 1, 'show': show.__toDict__()})
+        return show
\ No newline at end of file
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+from typing import Callable, Optional
+import os
+import signal
+import random
+import threading
+from datetime import datetime, timedelta
+import pytz
+from common import __typeError__
+from configs import Configs
+
+DEFAULT_JITTER: float = 0.1
+
+class Daemon(object):
+    """
+        Long running poll loop driven by Configs.updateInterval.
+
+        Keeps the configs (and whatever the poll function closes over, ie: the api and its pooled
+        connections) in memory between polls. Polls are scheduled updateInterval after Configs.lastUpdate,
+        with random jitter, and the config is reloaded only when its files were changed by someone else.
+        SIGTERM and SIGINT stop the loop after the current poll, SIGHUP forces a reload.
+
+        Methods:
+            run() Poll until stopped.
+            stop() Ask the loop to stop.
+            reload() Ask the loop to reload the config before the next poll.
+    """
+    def __init__(self,
+                    configs: Configs,
+                    pollFunction: Callable[[Configs], None],
+                    jitter: Optional[float] = DEFAULT_JITTER,
+                ) -> None:
+        """
+            @param: configs: Configs, the configs to poll with.
+            @param: pollFunction: Callable[[Configs], None], performs one poll.
+            @param: jitter: Optional[float], the interval is randomly scaled by 1 +/- jitter.
+        """
+        if (isinstance(configs, Configs) == False):
+            __typeError__("configs", "Configs", configs)
+        if (jitter < 0 or jitter >= 1):
+            errorMessage = "jitter must be in range 0 -> 1"
+            raise ValueError(errorMessage)
+        self.configs: Configs = configs
+        self.pollFunction: Callable[[Configs], None] = pollFunction
+        self.jitter: float = jitter
+        self._stopEvent: threading.Event = threading.Event()
+    # Set by both stop() and reload(), so either one wakes the loop without the other being lost:
+        self._wakeEvent: threading.Event = threading.Event()
+        self._reloadRequested: bool = False
+        self._fileSignature: tuple = self.__fileSignature__()
+        return
+
+#####################
+# Helpers:
+#####################
+    def __fileSignature__(self) -> tuple:
+        signature = []
+        for filePath in self.configs.getFilePaths():
+            try:
+                fileStat = os.stat(filePath)
+                signature.append((filePath, fileStat.st_mtime_ns, fileStat.st_size))
+            except FileNotFoundError:
+                signature.append((filePath, None, None))
+        return tuple(signature)
+
+    def __reloadConfigs__(self) -> bool:
+        """
+            Reload the configs, keeping the ones in memory if the files can't be loaded.
+            @return: bool, True if the configs were reloaded.
+        """
+        try:
+            self.configs.reload()
+        except Exception as e:
+            print("ERROR: Reload failed: %s" % str(e))
+            return False
+        self._fileSignature = self.__fileSignature__()
+        return True
+
+    def __nextPoll__(self) -> datetime:
+        interval = self.configs.updateInterval.total_seconds()
+        interval *= 1 + random.uniform(-self.jitter, self.jitter)
+        return self.configs.lastUpdate + timedelta(seconds=interval)
+
+    def __handleSignal__(self, signalNumber:int, frame) -> None:
+        if (signalNumber == signal.SIGHUP):
+            self.reload()
+        else:
+            self.stop()
+        return
+
+#####################
+# Methods:
+#####################
+    def stop(self) -> None:
+        self._stopEvent.set()
+        self._wakeEvent.set()
+        return
+
+    def reload(self) -> None:
+        self._reloadRequested = True
+        self._wakeEvent.set()
+        return
+
+    def run(self) -> None:
+        """Poll until stop() is called or a SIGTERM / SIGINT is received."""
+        if (threading.current_thread() is threading.main_thread()):
+            signal.signal(signal.SIGTERM, self.__handleSignal__)
+            signal.signal(signal.SIGINT, self.__handleSignal__)
+            if (hasattr(signal, 'SIGHUP') == True):
+                signal.signal(signal.SIGHUP, self.__handleSignal__)
+        while (True):
+        # Wait for the next poll, a stop or reload request wakes the loop early:
+            waitSeconds = (self.__nextPoll__() - pytz.utc.localize(datetime.utcnow())).total_seconds()
+            if (waitSeconds > 0):
+                self._wakeEvent.wait(waitSeconds)
+            self._wakeEvent.clear()
+            if (self._stopEvent.is_set() == True):
+                break
+            if (self._reloadRequested == True):
+                self._reloadRequested = False
+                self.__reloadConfigs__()
+                continue
+        # Only reload when the files were changed by something other than this process. A failed reload polls
+        # with the configs in memory and is tried again next time:
+            reloaded: bool = True
+            if (self.__fileSignature__() != self._fileSignature):
+                reloaded = self.__reloadConfigs__()
+            try:
+                self.pollFunction(self.configs)
+            except Exception as e:
+                print("ERROR: Poll failed: %s" % str(e))
+            self.configs.setLastUpdate(pytz.utc.localize(datetime.utcnow()))
+            if (reloaded == True):
+                self._fileSignature = self.__fileSignature__()
+        return
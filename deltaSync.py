@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+from typing import Optional
+from datetime import datetime
+import pytz
+from common import __typeError__
+from configs import Configs
+from eztvAPI import EZTVApi
+from torrent import Torrent
+
+class DeltaSync(object):
+    """
+        Incremental sync of new torrents against a watermark persisted in Configs.
+
+        Each poll walks get-torrents pages, newest first, until it reaches the last seen torrent id
+        (or release date for configs that predate the id watermark), then advances the watermark.
+        The watermark is only advanced when every page was retrieved, so a failed poll is retried in
+        full on the next run instead of leaving a gap. A poll cut short by maxPages doesn't advance it
+        either: it saves a resume cursor, and the next poll continues from that page. Once the walk
+        reaches the watermark it moves to the newest torrent of the whole walk, and polls start from the
+        first page again. Only the first sync (firstSyncPages) skips older torrents, by design.
+
+        Methods:
+            poll() Retrieve everything released since the last successful poll.
+    """
+    def __init__(self,
+                    api: EZTVApi,
+                    configs: Configs,
+                    limit: Optional[int] = 100,
+                    maxPages: Optional[int] = None,
+                    firstSyncPages: Optional[int] = 1,
+                ) -> None:
+        """
+            @param: api: EZTVApi, the api to fetch pages with.
+            @param: configs: Configs, the configs holding the watermark.
+            @param: limit: Optional[int], torrents per page. Valid values: 1-100
+            @param: maxPages: Optional[int], upper bound on pages per poll, None for no limit.
+            @param: firstSyncPages: Optional[int], pages to fetch when there is no watermark yet.
+        """
+        if (isinstance(api, EZTVApi) == False):
+            __typeError__("api", "EZTVApi", api)
+        if (isinstance(configs, Configs) == False):
+            __typeError__("configs", "Configs", configs)
+        self.api: EZTVApi = api
+        self.configs: Configs = configs
+        self.limit: int = limit
+        self.maxPages: Optional[int] = maxPages
+        self.firstSyncPages: int = firstSyncPages
+        return
+
+    def poll(self) -> tuple[bool, str | list[Torrent]]:
+        """
+            Retrieve the torrents released since the watermark and advance it.
+            @return: tuple[bool, str | list[Torrent]]
+                returnValue[0]: bool, success. True if torrents were successfully retrieved, False if an HTTP or JSON error occured.
+                returnValue[1]: str | list[Torrent], results.
+                            if success (returnValue[0]) == False then results is a string containg the error message.
+                            if success (returnValue[0]) == True then results is a list of new Torrent objects, newest first.
+        """
+        configs = self.configs
+        maxPages: Optional[int] = self.maxPages
+        firstSync: bool = (configs.lastSeenId == 0 and configs.lastSeenDate == pytz.utc.localize(datetime.fromtimestamp(0)))
+        if (firstSync == True):
+            maxPages = self.firstSyncPages
+        startPage: int = max(1, configs.resumePage)
+        success, result, resumePage = self.api.__walkSince__(
+            lastId=configs.lastSeenId,
+            lastDate=configs.lastSeenDate,
+            limit=self.limit,
+            maxPages=maxPages,
+            startPage=startPage
+        )
+        if (success == False):
+            return (success, result)
+    # The newest torrent of the walk so far, the resumed part of a walk is older than where it started:
+        newestId: int = max(configs.resumeId, configs.lastSeenId)
+        newestDate: datetime = max(configs.resumeDate, configs.lastSeenDate)
+        if (len(result) > 0):
+            newestId = max(newestId, max(torrent.id for torrent in result))
+            newestDate = max(newestDate, max(result, key=lambda torrent: torrent.releaseTimestamp).releaseDate)
+        if (resumePage == None or firstSync == True):
+            if (newestId != configs.lastSeenId or newestDate != configs.lastSeenDate or configs.resumePage != 0):
+                configs.setWatermark(newestId, newestDate)
+        else:
+            configs.setWatermark(configs.lastSeenId, configs.lastSeenDate, resumePage, newestId, newestDate)
+        return (True, result)
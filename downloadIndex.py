@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+
+from typing import Optional, Iterable, Iterator
+from common import __typeError__
+from torrent import Torrent
+from torrentSnapshot import TorrentSnapshot
+from bloomFilter import BloomFilter
+
+# Keys each torrent adds to the bloom filter: its id, info hash and episode key.
+BLOOM_KEYS_PER_TORRENT: int = 3
+BLOOM_MIN_CAPACITY: int = 100000
+
+def __bloomKey__(kind:str, value:object) -> str:
+    return '%s:%s' % (kind, value)
+
+def __episodeBloomKey__(name:str, season:int, episode:int, airedOrdinal:int) -> str:
+    return 'e:%s\0%i\0%i\0%i' % (name, season, episode, airedOrdinal)
+
+def __torrentEpisodeBloomKey__(torrent:Torrent) -> str:
+    name, season, episode, airedDate = torrent.episodeKey
+    airedOrdinal = 0
+    if (airedDate != None):
+        airedOrdinal = airedDate.toordinal()
+    return __episodeBloomKey__(name, season, episode, airedOrdinal)
+
+class DownloadIndex(object):
+    """
+        Index of downloaded torrents with constant time lookups.
+
+        Torrents are indexed by id and by info hash (when they have one), with a secondary index on the episode
+        (see Torrent.episodeKey) so Torrent.compare style checks don't need to scan the history.
+        An optional TorrentSnapshot holds the history as of the last save; it is searched in place,
+        so only torrents added since then are held as objects. An optional BloomFilter over the ids, info hashes
+        and episode keys answers most lookups of torrents that were never downloaded without touching either.
+
+        Methods:
+            add(torrent) Add a torrent, returns False if it was already indexed.
+            containsId(id) True if a torrent with the id was downloaded.
+            containsHash(hash) True if a torrent with the info hash was downloaded.
+            findEpisode(torrent) The downloaded torrent of the same episode, or None.
+            iterRecords() Iterate over the Torrent records of every downloaded torrent.
+            buildBloomFilter(falsePositiveRate) Build a bloom filter over every downloaded torrent and use it.
+        Supports: len(), iteration in download order, and `torrent in index` (by id or info hash).
+    """
+    def __init__(self,
+                    torrents: Optional[Iterable[Torrent]] = None,
+                    snapshot: Optional[TorrentSnapshot] = None,
+                    bloomFilter: Optional[BloomFilter] = None,
+                ) -> None:
+        """
+            @param: torrents: Optional[Iterable[Torrent]], torrents to add.
+            @param: snapshot: Optional[TorrentSnapshot], previously downloaded torrents, searched without loading them.
+            @param: bloomFilter: Optional[BloomFilter], a filter holding every torrent in snapshot, see buildBloomFilter().
+        """
+        self.snapshot: Optional[TorrentSnapshot] = snapshot
+        self.bloomFilter: Optional[BloomFilter] = bloomFilter
+        self._byId: dict[int, Torrent] = {}
+        self._byHash: dict[str, Torrent] = {}
+        self._byEpisode: dict[tuple, Torrent] = {}
+        if (torrents != None):
+            for torrent in torrents:
+                self.add(torrent)
+        return
+
+###################
+# Overrides:
+###################
+    def __contains__(self, torrent:object) -> bool:
+        if (isinstance(torrent, Torrent) == False):
+            return False
+        return (self.containsId(torrent.id) == True or self.containsHash(torrent.hash) == True)
+
+    def __len__(self) -> int:
+        if (self.snapshot != None):
+            return len(self.snapshot) + len(self._byId)
+        return len(self._byId)
+
+    def __iter__(self) -> Iterator[Torrent]:
+        if (self.snapshot != None):
+            yield from self.snapshot
+        yield from list(self._byId.values())
+        return
+
+###################
+# Helpers:
+###################
+    def __bloomMiss__(self, key:str) -> bool:
+    # True when the bloom filter rules the key out, a hit still has to be checked against the exact index:
+        return (self.bloomFilter != None and (key in self.bloomFilter) == False)
+
+###################
+# Methods:
+###################
+    def add(self, torrent:Torrent) -> bool:
+        """
+            Add a torrent to the index.
+            @param: Torrent, torrent. The downloaded torrent.
+            @return: bool, True if the torrent was added, False if it was already indexed.
+        """
+        if (isinstance(torrent, Torrent) == False):
+            __typeError__("torrent", "Torrent", torrent)
+        if (torrent in self):
+            return False
+        self._byId[torrent.id] = torrent
+        if (torrent.hash != '' and torrent.hash != None):
+            self._byHash[torrent.hash] = torrent
+        self._byEpisode.setdefault(torrent.episodeKey, torrent)
+        if (self.bloomFilter != None):
+            self.bloomFilter.add(__bloomKey__('i', torrent.id))
+            if (torrent.hash != '' and torrent.hash != None):
+                self.bloomFilter.add(__bloomKey__('h', torrent.hash))
+            self.bloomFilter.add(__torrentEpisodeBloomKey__(torrent))
+        return True
+
+    def containsId(self, torrentId:int) -> bool:
+        if (self.__bloomMiss__(__bloomKey__('i', torrentId)) == True):
+            return False
+        if (torrentId in self._byId):
+            return True
+        return (self.snapshot != None and self.snapshot.findId(torrentId) != None)
+
+    def containsHash(self, torrentHash:str) -> bool:
+    # An empty or missing hash isn't a key, every torrent without one would match:
+        if (torrentHash == '' or torrentHash == None):
+            return False
+        if (self.__bloomMiss__(__bloomKey__('h', torrentHash)) == True):
+            return False
+        if (torrentHash in self._byHash):
+            return True
+        return (self.snapshot != None and self.snapshot.findHash(torrentHash) != None)
+
+    def iterRecords(self) -> Iterator[tuple]:
+        """Iterate over the Torrent records of every downloaded torrent, without building the snapshot's Torrents."""
+        if (self.snapshot != None):
+            for row in range(len(self.snapshot)):
+                yield self.snapshot.record(row)
+        for torrent in list(self._byId.values()):
+            yield torrent.__toRecord__()
+        return
+
+    def findEpisode(self, torrent:Torrent) -> Optional[Torrent]:
+        """
+            Find the downloaded torrent of the same episode, any release.
+            @param: Torrent, torrent. The torrent to look up.
+            @return: Optional[Torrent], the first downloaded torrent of the episode, or None.
+        """
+        if (self.__bloomMiss__(__torrentEpisodeBloomKey__(torrent)) == True):
+            return None
+        if (self.snapshot != None):
+            row = self.snapshot.findEpisode(torrent.episodeKey)
+            if (row != None):
+                return self.snapshot[row]
+        return self._byEpisode.get(torrent.episodeKey)
+
+    def buildBloomFilter(self, falsePositiveRate:float) -> BloomFilter:
+        """
+            Build a bloom filter over every downloaded torrent and check it before the exact index from now on.
+            @param: falsePositiveRate: float, the target false positive rate, 0 -> 1 exclusive.
+            @return: BloomFilter, the new filter, sized for twice the current history.
+        """
+        capacity = max(BLOOM_MIN_CAPACITY, 2 * BLOOM_KEYS_PER_TORRENT * len(self))
+        bloomFilter = BloomFilter(capacity, falsePositiveRate)
+        for record in self.iterRecords():
+            bloomFilter.add(__bloomKey__('i', record[0]))
+            if (record[1] != '' and record[1] != None):
+                bloomFilter.add(__bloomKey__('h', record[1]))
+            bloomFilter.add(__episodeBloomKey__(record[19], record[8], record[9], record[18] or 0))
+        self.bloomFilter = bloomFilter
+        return bloomFilter
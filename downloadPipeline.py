@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+
+from typing import Optional, NamedTuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from time import perf_counter
+from common import __typeError__
+from configs import Configs
+from torrent import Torrent
+from transport import Transport, getDefaultTransport
+from torrentSink import TorrentSink
+from instrumentation import getInstrumentation
+
+DEFAULT_MAX_WORKERS: int = 8
+
+class DownloadResult(NamedTuple):
+    """The outcome of downloading one torrent."""
+    torrent: Torrent
+    torrentPath: Optional[str]
+    screenshotPaths: tuple[str, ...]
+    error: Optional[str]
+    screenshotErrors: tuple[str, ...] = ()
+
+class DownloadPipeline(object):
+    """
+        Bounded, concurrent download stage for selected torrents.
+
+        Torrents are queued with submit(), deduplicated by id, and fetched by run() on a bounded worker
+        pool over the pooled transport, so a batch takes about as long as its slowest fetch. Each
+        completion is recorded in Configs as it finishes, on the calling thread. With a TorrentSink the
+        whole batch is handed to the sink in one call instead, ie: to a torrent client's RPC.
+
+        Methods:
+            submit(torrent) Queue a torrent, returns False if it is already queued or downloaded.
+            run() Download everything queued, returns a list of DownloadResult in completion order.
+    """
+    def __init__(self,
+                    configs: Configs,
+                    transport: Optional[Transport] = None,
+                    maxWorkers: Optional[int] = DEFAULT_MAX_WORKERS,
+                    screenshots: Optional[bool] = False,
+                    sink: Optional[TorrentSink] = None,
+                ) -> None:
+        """
+            @param: configs: Configs, completions are recorded here and files saved to its downloadPath.
+            @param: transport: Optional[Transport], the transport to download with, defaults to the shared transport.
+            @param: maxWorkers: Optional[int], the maximum number of concurrent downloads.
+            @param: screenshots: Optional[bool], also download the small and large screenshots. Not used with a sink.
+            @param: sink: Optional[TorrentSink], hand torrents off to this sink rather than downloading their files.
+        """
+        if (isinstance(configs, Configs) == False):
+            __typeError__("configs", "Configs", configs)
+        if (transport == None):
+            transport = getDefaultTransport()
+        if (sink != None and isinstance(sink, TorrentSink) == False):
+            __typeError__("sink", "TorrentSink", sink)
+        if (maxWorkers < 1):
+            errorMessage = "maxWorkers must be >= 1"
+            raise ValueError(errorMessage)
+        self.configs: Configs = configs
+        self.transport: Transport = transport
+        self.maxWorkers: int = maxWorkers
+        self.screenshots: bool = screenshots
+        self.sink: Optional[TorrentSink] = sink
+        self._queue: dict[int, Torrent] = {}
+        return
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def submit(self, torrent:Torrent) -> bool:
+        """
+            Queue a torrent for download.
+            @param: torrent: Torrent, the torrent to download.
+            @return: bool, True if queued, False if it was already queued or downloaded.
+        """
+        if (isinstance(torrent, Torrent) == False):
+            __typeError__("torrent", "Torrent", torrent)
+        if (torrent.id in self._queue or self.configs.isDownloaded(torrent) == True):
+            return False
+        self._queue[torrent.id] = torrent
+        return True
+
+    def __download__(self, torrent:Torrent, destPath:str) -> DownloadResult:
+        start = perf_counter()
+        result = self.__downloadFiles__(torrent, destPath)
+        getInstrumentation().onDownload(torrent, perf_counter() - start, result.error)
+        return result
+
+    def __downloadFiles__(self, torrent:Torrent, destPath:str) -> DownloadResult:
+        try:
+            torrentPath = torrent.downloadTorrent(destPath, self.transport)
+        except RuntimeError as e:
+            return DownloadResult(torrent, None, (), str(e))
+    # Screenshots are optional, failing one doesn't fail the saved .torrent:
+        screenshotPaths: list[str] = []
+        screenshotErrors: list[str] = []
+        if (self.screenshots == True):
+            for download in (torrent.downloadSmallScreenshot, torrent.downloadLargeScreenshot):
+                try:
+                    filePath = download(destPath, self.transport)
+                except RuntimeError as e:
+                    screenshotErrors.append(str(e))
+                    continue
+                if (filePath != None):
+                    screenshotPaths.append(filePath)
+        return DownloadResult(torrent, torrentPath, tuple(screenshotPaths), None, tuple(screenshotErrors))
+
+    def __handOff__(self, torrents:list[Torrent]) -> list[DownloadResult]:
+        start = perf_counter()
+        sinkResults = self.sink.send(torrents)
+    # One call covers the batch, share its time between the torrents:
+        seconds = (perf_counter() - start) / len(torrents)
+        results: list[DownloadResult] = []
+        for sinkResult in sinkResults:
+            getInstrumentation().onDownload(sinkResult.torrent, seconds, sinkResult.error)
+            if (sinkResult.error == None):
+                self.configs.torrentDownloaded(sinkResult.torrent)
+            results.append(DownloadResult(sinkResult.torrent, None, (), sinkResult.error))
+        return results
+
+    def run(self) -> list[DownloadResult]:
+        """
+            Download every queued torrent and record each success in Configs.
+            @return: list[DownloadResult], one per queued torrent, in completion order. torrentPath is None for a sink.
+        """
+        torrents = list(self._queue.values())
+        self._queue = {}
+        results: list[DownloadResult] = []
+        if (len(torrents) == 0):
+            return results
+        if (self.sink != None):
+            return self.__handOff__(torrents)
+        destPath = self.configs.downloadPath
+        with ThreadPoolExecutor(max_workers=min(self.maxWorkers, len(torrents))) as executor:
+            futures = [executor.submit(self.__download__, torrent, destPath) for torrent in torrents]
+            for future in as_completed(futures):
+                result = future.result()
+                if (result.error == None):
+                    self.configs.torrentDownloaded(result.torrent)
+                results.append(result)
+        return results
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+
+from typing import Optional, Iterable, Iterator, NamedTuple
+from datetime import timedelta
+from time import time
+from common import __typeError__
+from torrent import Torrent
+from show import Show
+
+RANKING_FIELDS: tuple[str] = ('quality', 'encoding', 'seeds', 'size')
+DEFAULT_RANKING_ORDER: tuple[str] = RANKING_FIELDS
+# Most preferred first, encodings not listed rank below every listed one:
+DEFAULT_ENCODING_PREFERENCE: tuple[str] = (Torrent.ENCODING_X265, Torrent.ENCODING_H265, Torrent.ENCODING_X264,
+                                            Torrent.ENCODING_H264, Torrent.ENCODING_XVID, Torrent.ENCODING_UNKNOWN)
+
+class ReleaseRanking(object):
+    """
+        Orders releases of the same episode.
+
+        Each release gets a sort key built from the ranking fields in order, so picking the best of n releases
+        is one pass instead of comparing every pair.
+
+        Methods:
+            key(torrent) The sort key of a release, greater is better.
+            best(torrents) The best release, or None.
+    """
+    def __init__(self,
+                    order: Optional[Iterable[str]] = DEFAULT_RANKING_ORDER,
+                    encodingPreference: Optional[Iterable[str]] = DEFAULT_ENCODING_PREFERENCE,
+                    preferSmaller: Optional[bool] = False,
+                ) -> None:
+        """
+            @param: order: Optional[Iterable[str]], the fields to rank by, most significant first, from RANKING_FIELDS.
+            @param: encodingPreference: Optional[Iterable[str]], Torrent.ENCODING_* values, most preferred first.
+            @param: preferSmaller: Optional[bool], rank smaller releases above larger ones rather than below.
+        """
+        order = tuple(order)
+        for field in order:
+            if (field not in RANKING_FIELDS):
+                errorMessage = "Unknown ranking field '%s', must be one of: %s" % (field, ', '.join(RANKING_FIELDS))
+                raise ValueError(errorMessage)
+        self.order: tuple[str] = order
+        self.encodingPreference: tuple[str] = tuple(encodingPreference)
+        self.preferSmaller: bool = preferSmaller
+        self._encodingRank: dict[str, int] = {encoding: -index for index, encoding in enumerate(self.encodingPreference)}
+        return
+
+    def key(self, torrent:Torrent) -> tuple:
+        key: list[int] = []
+        for field in self.order:
+            if (field == 'quality'):
+                key.append(torrent.quality)
+            elif (field == 'encoding'):
+                key.append(self._encodingRank.get(torrent.encoding, -len(self.encodingPreference)))
+            elif (field == 'seeds'):
+                key.append(torrent.seeds)
+            elif (self.preferSmaller == True):
+                key.append(-torrent.size)
+            else:
+                key.append(torrent.size)
+        return tuple(key)
+
+    def best(self, torrents:Iterable[Torrent]) -> Optional[Torrent]:
+        return max(torrents, key=self.key, default=None)
+
+class EpisodeCandidate(NamedTuple):
+    """The best release seen so far of one episode."""
+    key: tuple
+    torrent: Torrent
+    show: Optional[Show]
+    since: float
+
+class EpisodeIndex(object):
+    """
+        Best release per episode, held for a while in case a better release turns up.
+
+        Releases are grouped by show, season and episode, or by aired date for daily shows (see
+        Torrent.episodeKey), and only the best by the ranking is kept. An episode is ready once holdWindow
+        has passed since its first release came out.
+
+        Methods:
+            offer(torrent, show) Consider a release, returns True if it is now the episode's best.
+            ready(now) Remove and return the candidates whose hold window has passed.
+            restore(candidate) Put back a candidate, ie: loaded from disk.
+            keyFor(torrent, show) The episode key a release is grouped under.
+        Supports: len() and iteration over the held candidates.
+    """
+    def __init__(self,
+                    ranking: Optional[ReleaseRanking] = None,
+                    holdWindow: Optional[timedelta] = timedelta(0),
+                ) -> None:
+        """
+            @param: ranking: Optional[ReleaseRanking], how releases are ordered, defaults to ReleaseRanking().
+            @param: holdWindow: Optional[timedelta], how long to wait for better releases, 0 to not wait.
+        """
+        if (ranking == None):
+            ranking = ReleaseRanking()
+        elif (isinstance(ranking, ReleaseRanking) == False):
+            __typeError__("ranking", "ReleaseRanking", ranking)
+        if (isinstance(holdWindow, timedelta) == False):
+            __typeError__("holdWindow", "timedelta", holdWindow)
+        self.ranking: ReleaseRanking = ranking
+        self.holdWindow: timedelta = holdWindow
+        self._candidates: dict[tuple, EpisodeCandidate] = {}
+        return
+
+    def __len__(self) -> int:
+        return len(self._candidates)
+
+    def __iter__(self) -> Iterator[EpisodeCandidate]:
+        return iter(list(self._candidates.values()))
+
+    @staticmethod
+    def keyFor(torrent:Torrent, show:Optional[Show]=None) -> tuple:
+    # Releases name the same show differently, group them under the show they matched when there is one:
+        name, season, episode, airedDate = torrent.episodeKey
+        if (show != None):
+            name = show.name
+        return (name.lower(), season, episode, airedDate)
+
+    def offer(self, torrent:Torrent, show:Optional[Show]=None) -> bool:
+        """
+            Consider a release of an episode.
+            @param: torrent: Torrent, the release.
+            @param: show: Optional[Show], the show it matched, if any.
+            @return: bool, True if it is now the best release of its episode.
+        """
+        if (isinstance(torrent, Torrent) == False):
+            __typeError__("torrent", "Torrent", torrent)
+        key = self.keyFor(torrent, show)
+        candidate = self._candidates.get(key)
+        if (candidate == None):
+            self._candidates[key] = EpisodeCandidate(key, torrent, show, torrent.releaseTimestamp)
+            return True
+        if (candidate.torrent.id == torrent.id or self.ranking.key(torrent) <= self.ranking.key(candidate.torrent)):
+            return False
+        self._candidates[key] = EpisodeCandidate(key, torrent, show or candidate.show,
+                                                    min(candidate.since, torrent.releaseTimestamp))
+        return True
+
+    def ready(self, now:Optional[float]=None) -> list[EpisodeCandidate]:
+        """
+            Remove and return the candidates whose hold window has passed.
+            @param: now: Optional[float], the current unix time, defaults to time().
+            @return: list[EpisodeCandidate], in the order the episodes were first offered.
+        """
+        holdSeconds = self.holdWindow.total_seconds()
+        if (holdSeconds <= 0):
+            readyList = list(self._candidates.values())
+            self._candidates = {}
+            return readyList
+        if (now == None):
+            now = time()
+        readyList = [candidate for candidate in self._candidates.values() if candidate.since + holdSeconds <= now]
+        for candidate in readyList:
+            del self._candidates[candidate.key]
+        return readyList
+
+    def restore(self, candidate:EpisodeCandidate) -> None:
+        self._candidates[candidate.key] = candidate
+        return
+
+    def discard(self, key:tuple) -> Optional[EpisodeCandidate]:
+        return self._candidates.pop(key, None)
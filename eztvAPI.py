@@ -1,34 +1,273 @@
 #!/usr/bin/env python3
 
-from typing import Optional
-import requests
-from requests.exceptions import HTTPError
-from json import JSONDecodeError
+from typing import Optional, Iterator, Iterable
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from requests.exceptions import HTTPError, RequestException
+import json
+from time import perf_counter, sleep, time
 from datetime import datetime
+from email.utils import parsedate_to_datetime
 import pytz
-from time import sleep
-from common import __typeError__
+from common import __typeError__, __normalizeImdbId__
 from torrent import Torrent
+from transport import Transport, getDefaultTransport
+from rateLimiter import TokenBucket, AdaptiveRateController, backoffDelay, THROTTLE_STATUS_CODES, RETRY_STATUS_CODES
+from responseCache import ResponseCache
+from instrumentation import getInstrumentation
 
+# The starting rate, the shared limiter adapts between the min and max as the site answers:
 RATE_LIMIT_PER_SECOND: int = 4
-RATE_LIMIT_SLEEP_VALUE: float = 1 / RATE_LIMIT_PER_SECOND
+RATE_LIMIT_MIN_PER_SECOND: float = 0.25
+RATE_LIMIT_MAX_PER_SECOND: float = 10
+RATE_LIMIT_BURST: int = RATE_LIMIT_PER_SECOND
+# Shared by every EZTVApi instance (and thread) that isn't given its own limiter:
+SHARED_RATE_LIMITER: AdaptiveRateController = AdaptiveRateController(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST,
+                                                                        minRate=RATE_LIMIT_MIN_PER_SECOND,
+                                                                        maxRate=RATE_LIMIT_MAX_PER_SECOND)
+# Retries of a throttled or failed (RETRY_STATUS_CODES) request before giving up:
+DEFAULT_MAX_RETRIES: int = 3
 
 API_URL = 'https://eztv.re/api/get-torrents'
+# Requests in flight for getTorrentsForShows, enough to keep the shared rate limit busy:
+DEFAULT_SHOW_WORKERS: int = RATE_LIMIT_PER_SECOND
+
+##########################
+# Exceptions:
+##########################
+class EZTVApiError(RuntimeError):
+    """Base class for errors raised by EZTVApi."""
+    pass
+
+class EZTVConnectionError(EZTVApiError):
+    """Raised when the api can't be reached."""
+    pass
+
+class EZTVHTTPError(EZTVApiError):
+    """Raised when the api responds with an HTTP error status."""
+    def __init__(self, message:str, statusCode:Optional[int]=None, retryAfter:Optional[float]=None) -> None:
+        """
+            @param: message: str, the error message.
+            @param: statusCode: Optional[int], the response status.
+            @param: retryAfter: Optional[float], seconds the response's Retry-After header asked us to wait, if any.
+        """
+        EZTVApiError.__init__(self, message)
+        self.statusCode: Optional[int] = statusCode
+        self.retryAfter: Optional[float] = retryAfter
+        return
+
+class EZTVJSONError(EZTVApiError):
+    """Raised when the api response isn't valid JSON."""
+    pass
+
+##########################
+# Helpers:
+##########################
+def __retryAfter__(headers:dict[str, str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header, given in seconds or as an HTTP date. None if missing or invalid."""
+    value = headers.get('Retry-After')
+    if (value == None):
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time())
+    except (TypeError, ValueError):
+        return None
+
+def __retryDelay__(rateLimiter:TokenBucket, error:EZTVHTTPError, attempt:int, maxRetries:int) -> Optional[float]:
+    """
+        Report a failed request to the rate limiter and decide whether to retry it.
+        A throttle pauses the limiter, so every caller sharing it backs off, not just this one.
+        @return: Optional[float], seconds the caller should sleep before retrying, None to give up.
+    """
+    if (error.statusCode != None):
+        rateLimiter.onResponse(error.statusCode)
+    if (error.statusCode not in RETRY_STATUS_CODES or attempt >= maxRetries):
+        return None
+    getInstrumentation().increment('eztv_retries_total', labels={'status': str(error.statusCode)})
+    delay = backoffDelay(attempt, error.retryAfter)
+    if (error.statusCode in THROTTLE_STATUS_CODES):
+        rateLimiter.pause(delay)
+        return 0.0
+    return delay
+
+def __requestPage__(transport:Transport, url:str, cache:Optional[ResponseCache]=None) -> Optional[bytes]:
+    """
+        Request one get-torrents page body. Doesn't rate limit.
+        With a cache, a stale entry is revalidated with a conditional request and 200 responses are stored.
+        @return: Optional[bytes], the body, or None if the entry was evicted before its 304 arrived; the entry is gone,
+                    so requesting again is unconditional.
+        @raises: EZTVConnectionError, EZTVHTTPError
+    """
+    instrumentation = getInstrumentation()
+    headers: dict[str, str] = {}
+    if (cache != None):
+        headers = cache.conditionalHeaders(url)
+    try:
+        start = perf_counter()
+        response = transport.get(url, headers=headers)
+        instrumentation.onRequest(url, response.status_code, perf_counter() - start)
+        if (cache != None and response.status_code == 304):
+            body = cache.getBody(url)
+            if (body != None):
+                cache.refresh(url, response.headers)
+                return body
+        # The entry was evicted since the request was made, the caller asks again unconditionally:
+            return None
+        response.raise_for_status()
+    except HTTPError as e:
+        if (e.response == None):
+            raise EZTVHTTPError(str(e))
+        raise EZTVHTTPError(str(e), e.response.status_code, __retryAfter__(e.response.headers))
+    except RequestException as e:
+        instrumentation.onRequest(url, 0, perf_counter() - start)
+        raise EZTVConnectionError(str(e))
+    if (cache != None):
+        cache.store(url, response.headers, response.content)
+    return response.content
+
+def __decodePage__(body:bytes) -> list[dict[str, object]]:
+    """
+        Decode a get-torrents page body in to its raw torrent dicts.
+        @raises: EZTVJSONError
+    """
+    try:
+        with getInstrumentation().timer('eztv_json_decode_seconds'):
+            response = json.loads(body)
+    except ValueError as e:
+        getInstrumentation().increment('eztv_json_errors_total')
+        raise EZTVJSONError(str(e))
+# Pages past the end don't include a torrents key:
+    return response.get('torrents', [])
+
+def __parseTorrents__(rawTorrents:list[dict[str, object]]) -> list[Torrent]:
+    """Build the Torrents of one page."""
+    instrumentation = getInstrumentation()
+    with instrumentation.timer('eztv_torrent_parse_seconds'):
+        torrentList = [Torrent(rawTorrent) for rawTorrent in rawTorrents]
+    instrumentation.increment('eztv_torrents_parsed_total', len(torrentList))
+    return torrentList
+
+def __getPage__(transport:Transport, url:str) -> list[dict[str, object]]:
+    """
+        Request one get-torrents page and return its raw torrent dicts. Doesn't rate limit.
+        @raises: EZTVConnectionError, EZTVHTTPError, EZTVJSONError
+    """
+    return __decodePage__(__requestPage__(transport, url))
 
 class EZTVApi(object):
     """Class to request torrents from the EZTV web api."""
     LAST_CHECK: datetime = pytz.utc.localize(datetime.fromtimestamp(0))
+    def __init__(self,
+                    transport: Optional[Transport] = None,
+                    rateLimiter: Optional[TokenBucket] = None,
+                    cache: Optional[ResponseCache] = None,
+                    apiUrl: Optional[str] = API_URL,
+                    maxRetries: Optional[int] = DEFAULT_MAX_RETRIES,
+                ) -> None:
+        """
+            @param: transport: Optional[Transport], the transport to make requests with.
+                        Defaults to the shared pooled transport, which Torrent.download* also use.
+            @param: rateLimiter: Optional[TokenBucket], the rate limiter to make requests under, ie: an AdaptiveRateController.
+                        Defaults to SHARED_RATE_LIMITER, shared by all instances.
+            @param: cache: Optional[ResponseCache], cache get-torrents responses and the Torrents parsed from them.
+            @param: apiUrl: Optional[str], the get-torrents endpoint, ie: a local stand-in.
+            @param: maxRetries: Optional[int], retries of a throttled or failed request, with jittered backoff. 0 to not retry.
+        """
+        if (transport == None):
+            transport = getDefaultTransport()
+        elif (isinstance(transport, Transport) == False):
+            __typeError__("transport", "Transport", transport)
+        if (rateLimiter == None):
+            rateLimiter = SHARED_RATE_LIMITER
+        elif (isinstance(rateLimiter, TokenBucket) == False):
+            __typeError__("rateLimiter", "TokenBucket", rateLimiter)
+        if (cache != None and isinstance(cache, ResponseCache) == False):
+            __typeError__("cache", "ResponseCache", cache)
+        if (maxRetries < 0):
+            errorMessage = "maxRetries must be >= 0"
+            raise ValueError(errorMessage)
+        self.transport: Transport = transport
+        self.cache: Optional[ResponseCache] = cache
+        self.apiUrl: str = apiUrl
+        self.rateLimiter: TokenBucket = rateLimiter
+        self.maxRetries: int = maxRetries
+        self.lastWait: float = 0.0
+        return
+
     @staticmethod
-    def __buildUrl__(limit:Optional[int]=100, page:Optional[int]=1, imdbId: Optional[str]=None) -> str:
+    def __buildUrl__(limit:Optional[int]=100, page:Optional[int]=1, imdbId: Optional[str]=None, apiUrl:Optional[str]=API_URL) -> str:
         if (limit < 1 or limit > 100):
             errorMessage = "num must be 1-100 inclusive"
             raise ValueError(errorMessage)
         if (imdbId != None):
-            url = API_URL + '?imdb_id=%s&limit=%i&page=%i' % (imdbId, limit, page)
+            url = apiUrl + '?imdb_id=%s&limit=%i&page=%i' % (__normalizeImdbId__(imdbId), limit, page)
         else:
-            url = API_URL + '?limit=%i&page=%i' % (limit, page)
+            url = apiUrl + '?limit=%i&page=%i' % (limit, page)
         return url
 
+    def __fetchPage__(self, limit:Optional[int]=100, page:Optional[int]=1, imdbId:Optional[str]=None) -> list[dict[str, object]]:
+        """
+            Fetch one page of raw torrent dicts under the rate limit.
+            @raises: EZTVConnectionError, EZTVHTTPError, EZTVJSONError
+        """
+        url = self.__buildUrl__(limit=limit, page=page, imdbId=imdbId, apiUrl=self.apiUrl)
+        return __decodePage__(self.__fetchBody__(url))
+
+    def __fetchBody__(self, url:str) -> bytes:
+        """
+            Fetch a page body, from the cache without a request or rate limiting if it is still fresh.
+            Throttled and failed requests are retried up to maxRetries times.
+            @raises: EZTVConnectionError, EZTVHTTPError
+        """
+        if (self.cache != None and self.cache.isFresh(url) == True):
+            body = self.cache.getBody(url)
+            if (body != None):
+                getInstrumentation().increment('eztv_cache_hits_total')
+                self.lastWait = 0.0
+                return body
+        attempt: int = 0
+        while (True):
+            self.lastWait = self.rateLimiter.acquire()
+            getInstrumentation().observe('eztv_rate_limit_wait_seconds', self.lastWait)
+            try:
+                body = __requestPage__(self.transport, url, self.cache)
+            except EZTVHTTPError as e:
+                delay = __retryDelay__(self.rateLimiter, e, attempt, self.maxRetries)
+                if (delay == None):
+                    raise
+            else:
+            # A 304 for an evicted entry isn't a failure, ask again unconditionally under a new token:
+                if (body == None):
+                    self.rateLimiter.onResponse(304)
+                    continue
+                break
+            attempt += 1
+            if (delay > 0):
+                sleep(delay)
+        self.rateLimiter.onResponse(200)
+        self.setLastCheck(datetime.utcnow())
+        return body
+
+    def __fetchTorrents__(self, limit:Optional[int]=100, page:Optional[int]=1, imdbId:Optional[str]=None) -> list[Torrent]:
+        """
+            Fetch one page of Torrents, reusing the Torrents already parsed from an unchanged cached page.
+            @raises: EZTVConnectionError, EZTVHTTPError, EZTVJSONError
+        """
+        url = self.__buildUrl__(limit=limit, page=page, imdbId=imdbId, apiUrl=self.apiUrl)
+        body = self.__fetchBody__(url)
+        if (self.cache != None):
+            torrentList = self.cache.getParsed(url)
+            if (torrentList != None):
+                return list(torrentList)
+        torrentList = __parseTorrents__(__decodePage__(body))
+        if (self.cache != None):
+            self.cache.setParsed(url, tuple(torrentList))
+        return torrentList
+
     @classmethod
     def setLastCheck(cls, __value:datetime) -> datetime:
         """Sets the last checked datetime property.
@@ -60,41 +299,140 @@ class EZTVApi(object):
                     returnValue[1]: str | list[Torrent], results. If success (returnValue[0]) is False, then results is a string with the accoring error message.
                                                                   If success (returnValue[0]) is True, then results is a list of Torrent objects.
         """
-    # Make the reqest:
-        url = self.__buildUrl__(limit=limit, page=page, imdbId=imdbId)
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            response = response.json()
-            self.LAST_CHECK = pytz.utc.localize(datetime.utcnow())
-            sleep(RATE_LIMIT_SLEEP_VALUE)
-        except HTTPError as e:
-            return (False, "HTTPError: %s" % e.strerror)
-        except JSONDecodeError as e:
-            return (False, "JSONDecodeError: %s" % e.msg)
-    # Parse the response:
-        torrentList: list[Torrent] = []
-        for rawTorrent in response['torrents']:
-            torrentList.append( Torrent(rawTorrent) )
+            torrentList = self.__fetchTorrents__(limit=limit, page=page, imdbId=imdbId)
+        except EZTVHTTPError as e:
+            return (False, "HTTPError: %s" % str(e))
+        except EZTVJSONError as e:
+            return (False, "JSONDecodeError: %s" % str(e))
+        except EZTVConnectionError as e:
+            return (False, "ConnectionError: %s" % str(e))
         return (True, torrentList)
 
+    def iterTorrents(self,
+                        imdbId: Optional[str] = None,
+                        startPage: Optional[int] = 1,
+                        maxPages: Optional[int] = None,
+                        limit: Optional[int] = 100,
+                    ) -> Iterator[Torrent]:
+        """
+            Lazily iterate over torrents page by page, newest first.
+            The next page is fetched in the background while the caller handles the current one, and only
+            the current and next page are held in memory.
+            @param: imdbId: Optional[str], the imdb id of a show, retreives only episodes from that show.
+            @param: startPage: Optional[int], the first page to retrieve. Valid values > 0.
+            @param: maxPages: Optional[int], the maximum number of pages to walk, None to walk until the last page.
+            @param: limit: Optional[int], torrents per page. Valid values: 1-100 inclusive.
+            @return: Iterator[Torrent], yields Torrent objects.
+            @raises: EZTVConnectionError, EZTVHTTPError, EZTVJSONError if a page can't be retrieved.
+        """
+        if (startPage < 1):
+            errorMessage = "startPage must be > 0"
+            raise ValueError(errorMessage)
+        if (maxPages != None and maxPages < 1):
+            errorMessage = "maxPages must be > 0"
+            raise ValueError(errorMessage)
+        lastPage: Optional[int] = None
+        if (maxPages != None):
+            lastPage = startPage + maxPages - 1
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            page: int = startPage
+            nextPage: Future = executor.submit(self.__fetchPage__, limit, page, imdbId)
+            while (nextPage != None):
+                rawTorrents: list[dict[str, object]] = nextPage.result()
+                nextPage = None
+                if (len(rawTorrents) == limit and (lastPage == None or page < lastPage)):
+                    page += 1
+                    nextPage = executor.submit(self.__fetchPage__, limit, page, imdbId)
+                for torrent in __parseTorrents__(rawTorrents):
+                    yield torrent
+                del rawTorrents
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+        return
+
+    def getSince(self,
+                    lastId: Optional[int] = 0,
+                    lastDate: Optional[datetime] = None,
+                    limit: Optional[int] = 100,
+                    maxPages: Optional[int] = None,
+                ) -> tuple[bool, str | list[Torrent]]:
+        """
+            Walk pages of torrents, newest first, until the watermark is reached.
+            @param: lastId: Optional[int], the highest torrent id already seen, 0 for none. Takes precedence over lastDate.
+            @param: lastDate: Optional[datetime], the newest release date already seen, used when lastId is 0.
+            @param: limit: Optional[int], torrents per page. Valid values: 1-100
+            @param: maxPages: Optional[int], stop after this many pages even if the watermark wasn't reached. None for no limit.
+            @return: tuple[bool, str | list[Torrent]]
+                returnValue[0]: bool, success. True if every page was retrieved, False if an HTTP or JSON error occured.
+                returnValue[1]: str | list[Torrent], results.
+                            if success (returnValue[0]) == False then results is a string containg the error message.
+                            if success (returnValue[0]) == True then results is a list of new Torrent objects, newest first.
+        """
+        success, result, _ = self.__walkSince__(lastId, lastDate, limit, maxPages)
+        return (success, result)
+
+    def __walkSince__(self,
+                        lastId: Optional[int] = 0,
+                        lastDate: Optional[datetime] = None,
+                        limit: Optional[int] = 100,
+                        maxPages: Optional[int] = None,
+                        startPage: Optional[int] = 1,
+                    ) -> tuple[bool, str | list[Torrent], Optional[int]]:
+        """
+            getSince, starting at startPage and reporting where a walk cut short by maxPages stopped.
+            Releases made between walks only push older torrents on to later pages, so resuming at the
+            returned page can repeat torrents but never skips any.
+            @return: tuple[bool, str | list[Torrent], Optional[int]], the same as getSince, followed by the page to
+                        resume from, or None if the watermark or the last page was reached.
+        """
+        if (lastDate == None):
+            lastDate = pytz.utc.localize(datetime.fromtimestamp(0))
+    # Torrent.releaseDate is the raw timestamp read as local time and labelled UTC, invert that once so
+    # torrents can be compared on their raw timestamp without building releaseDate:
+        lastTimestamp: float = lastDate.astimezone(pytz.utc).replace(tzinfo=None).timestamp()
+        newTorrents: list[Torrent] = []
+        seenIds: set[int] = set()
+        page: int = startPage
+        while (maxPages == None or page < startPage + maxPages):
+            success, result = self.getTorrents(limit=limit, page=page)
+            if (success == False):
+                return (success, result, None)
+            reachedWatermark: bool = False
+            for torrent in result:
+            # Releases made while paging shift older torrents on to the next page, skip the repeats:
+                if (torrent.id in seenIds):
+                    continue
+                if (lastId > 0 and torrent.id <= lastId):
+                    reachedWatermark = True
+                    continue
+                if (lastId == 0 and torrent.releaseTimestamp <= lastTimestamp):
+                    reachedWatermark = True
+                    continue
+                seenIds.add(torrent.id)
+                newTorrents.append(torrent)
+            if (reachedWatermark == True or len(result) < limit):
+                return (True, newTorrents, None)
+            page += 1
+        return (True, newTorrents, page)
+
     def getNew(self, limit:Optional[int]=100) -> tuple[bool, str |list[Torrent]]:
         """
-            Get new torrents since last check time.
-            @param: int, limit. Maximum number of torrents to retrieve. Valid values: 1-100
+            Get new torrents since last check time, paging back until the last check is reached.
+            The first check (last check is the epoch) only retrieves one page.
+            @param: int, limit. Maximum number of torrents per page. Valid values: 1-100
             @return: tuple[bool, str | list[Torrent]]
                 returnValue[0]: bool, success. True if torrents were successfully retrieved, False if an HTTP or JSON error occured.
                 returnValue[1]: str | list[Torrent], results.
                             if success (returnValue[0]) == False then results is a string containg the error message.
                             if success (returnValue[0]) == True then results is a list of Torrent objects.
         """
-        success: bool
-        result: list[Torrent] | str
-        lastCheck: datetime = self.LAST_CHECK
-        success, result = self.getTorrents(limit=limit)
-        if (success == False):
-            return (success, result) # Torrents it actuall a string
-        return(success, [torrent for torrent in result if torrent.releaseDate > lastCheck])
+        lastCheck: datetime = self.getLastCheck()
+        maxPages: Optional[int] = None
+        if (lastCheck == pytz.utc.localize(datetime.fromtimestamp(0))):
+            maxPages = 1
+        return self.getSince(lastDate=lastCheck, limit=limit, maxPages=maxPages)
 
     def getSeasons(self, limit:Optional[int]=100, page:Optional[int]=1, imdbId:Optional[str]=None) -> tuple[bool, str | list[Torrent]]:
         """
@@ -113,4 +451,67 @@ class EZTVApi(object):
         success, result = self.getTorrents(limit=limit, page=page, imdbId=imdbId)
         if (success == False):
             return (success, result)
-        return (success, [torrent for torrent in result if torrent.isSeason == True])
\ No newline at end of file
+        return (success, [torrent for torrent in result if torrent.isSeason == True])
+
+    def getTorrentsForShows(self,
+                                imdbIds: Iterable[str],
+                                limit: Optional[int] = 100,
+                                maxPages: Optional[int] = 1,
+                                maxWorkers: Optional[int] = DEFAULT_SHOW_WORKERS,
+                            ) -> dict[str, tuple[bool, str | list[Torrent]]]:
+        """
+            Get torrents for many shows in one scheduled operation under this api's rate limiter.
+            Shows are served round robin: every show's first page is queued before any show's second page, so
+            one show with a long history can't starve the rest. Pages still fresh in the cache are used without
+            a request and don't spend any of the rate budget.
+            @param: imdbIds: Iterable[str], the imdb ids of the shows, with or without the 'tt' prefix.
+            @param: limit: Optional[int], torrents per page. Valid values: 1-100 inclusive.
+            @param: maxPages: Optional[int], the maximum number of pages per show, None to walk every page.
+            @param: maxWorkers: Optional[int], the maximum number of requests in flight.
+            @return: dict[str, tuple[bool, str | list[Torrent]]], keyed by imdb id as given, in the order given.
+                        Each value is the same as getTorrents returns, with the torrents of every page, newest first.
+                        A show fails if any of its pages fail.
+        """
+        if (maxPages != None and maxPages < 1):
+            errorMessage = "maxPages must be > 0"
+            raise ValueError(errorMessage)
+        if (maxWorkers < 1):
+            errorMessage = "maxWorkers must be >= 1"
+            raise ValueError(errorMessage)
+        imdbIds = list(dict.fromkeys(imdbIds))
+        torrentLists: dict[str, list[Torrent]] = {imdbId: [] for imdbId in imdbIds}
+        errors: dict[str, str] = {}
+        queue: deque[tuple[str, int]] = deque((imdbId, 1) for imdbId in imdbIds)
+        pending: dict[Future, tuple[str, int]] = {}
+
+        def collect(imdbId:str, page:int, success:bool, result:str | list[Torrent]) -> None:
+            if (success == False):
+                errors[imdbId] = result
+                return
+            torrentLists[imdbId].extend(result)
+        # Queue the next page behind every show already waiting:
+            if (len(result) == limit and (maxPages == None or page < maxPages)):
+                queue.append((imdbId, page + 1))
+            return
+
+        with ThreadPoolExecutor(max_workers=maxWorkers) as executor:
+            while (len(queue) > 0 or len(pending) > 0):
+                while (len(queue) > 0):
+                    imdbId, page = queue.popleft()
+                    url = self.__buildUrl__(limit=limit, page=page, imdbId=imdbId, apiUrl=self.apiUrl)
+                    if (self.cache != None and self.cache.isFresh(url) == True):
+                        collect(imdbId, page, *self.getTorrents(limit=limit, page=page, imdbId=imdbId))
+                    else:
+                        pending[executor.submit(self.getTorrents, limit, page, imdbId)] = (imdbId, page)
+                if (len(pending) > 0):
+                    done, _ = wait(pending.keys(), return_when=FIRST_COMPLETED)
+                    for future in done:
+                        imdbId, page = pending.pop(future)
+                        collect(imdbId, page, *future.result())
+        results: dict[str, tuple[bool, str | list[Torrent]]] = {}
+        for imdbId in imdbIds:
+            if (imdbId in errors.keys()):
+                results[imdbId] = (False, errors[imdbId])
+            else:
+                results[imdbId] = (True, torrentLists[imdbId])
+        return results
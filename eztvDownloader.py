@@ -1,13 +1,88 @@
 #!/usr/bin/env python3
 
+from typing import Optional
 import argparse
+from time import time
+from datetime import datetime
+import pytz
 
 from eztvAPI import EZTVApi
+from deltaSync import DeltaSync
 from configs import Configs
-from torrent import Torrent
+from show import Show
+from downloadPipeline import DownloadPipeline
+from daemon import Daemon
+from backfill import Backfill, BackfillStore
+from catalog import Catalog
+from torrentSink import TorrentSink, TransmissionSink, XdgOpenSink
+from instrumentation import Instrumentation, getInstrumentation, setInstrumentation
 
 configFile = '.eztvDownloader'
 
+def poll(configs:Configs, api:EZTVApi, catalog:Optional[Catalog]=None, sink:Optional[TorrentSink]=None) -> bool:
+    """
+        Fetch new torrents and download the ones selected by the configs.
+        @param: catalog: Optional[Catalog], also store every new torrent in this local catalog.
+        @param: sink: Optional[TorrentSink], hand the selected torrents to this sink instead of downloading their files.
+        @return: bool, False if the torrents couldn't be fetched.
+    """
+    instrumentation = getInstrumentation()
+    with instrumentation.timer('eztv_poll_seconds'):
+        success = __poll__(configs, api, catalog, sink)
+    instrumentation.increment('eztv_polls_total', labels={'result': 'ok' if success == True else 'error'})
+    instrumentation.setGauge('eztv_last_poll_timestamp_seconds', time())
+    return success
+
+def __poll__(configs:Configs, api:EZTVApi, catalog:Optional[Catalog], sink:Optional[TorrentSink]) -> bool:
+    instrumentation = getInstrumentation()
+    success, result = DeltaSync(api, configs).poll()
+
+    if (success == False):
+        print("ERROR: Failed to fetch torrents: %s" % result)
+        return False
+    instrumentation.increment('eztv_new_torrents_total', len(result))
+    if (catalog != None):
+        catalog.addTorrents(result)
+    pipeline = DownloadPipeline(configs, api.transport, sink=sink)
+    showMatcher = configs.getShowMatcher()
+# Keep the best release of each episode, downloads wait for the configured hold window:
+    for torrent in result:
+        with instrumentation.timer('eztv_match_seconds'):
+            shows = showMatcher.match(torrent.name)
+        unseenShow: Optional[Show] = None
+        for show in shows:
+        # Old episodes and repeat releases are dropped before any quality or history checks:
+            if (show.hasSeen(torrent) == True):
+                continue
+            if (unseenShow == None):
+                unseenShow = show
+            if (torrent.quality >= show.minQuality and torrent.quality <= show.maxQuality):
+                configs.holdEpisode(torrent, show)
+    # Premieres and first seasons of a listed show are held under that show, so they compete with its other
+    # releases of the episode rather than being downloaded as well. Skip them once every listed show has seen it:
+        if (len(shows) > 0 and unseenShow == None):
+            continue
+        if (configs.downloadPremiere == True and torrent.isPremiere == True):
+            if (torrent.quality >= configs.premiereMinQuality and torrent.quality <= configs.premiereMaxQuality):
+                configs.holdEpisode(torrent, unseenShow)
+        elif (configs.downloadFirstSeason == True and torrent.isFirstSeason == True):
+            if (torrent.quality >= configs.firstSeasonMinQuality and torrent.quality <= configs.firstSeasonMaxQuality):
+                configs.holdEpisode(torrent, unseenShow)
+# An episode is only marked seen once its download succeeded, a failed one can be picked up from a later release:
+    showsById: dict[int, Show] = {}
+    for candidate in configs.releaseEpisodes():
+        if (pipeline.submit(candidate.torrent) == True):
+            print("Downloading '%s'..." % candidate.torrent.title)
+            if (candidate.show != None):
+                showsById[candidate.torrent.id] = candidate.show
+    for downloadResult in pipeline.run():
+        if (downloadResult.error != None):
+            print("ERROR: Failed to download '%s': %s" % (downloadResult.torrent.title, downloadResult.error))
+        elif (downloadResult.torrent.id in showsById):
+            configs.showSeen(showsById[downloadResult.torrent.id], downloadResult.torrent)
+        for screenshotError in downloadResult.screenshotErrors:
+            print("WARNING: Failed to download a screenshot of '%s': %s" % (downloadResult.torrent.title, screenshotError))
+    return True
 
 
 if __name__ == '__main__':
@@ -16,10 +91,23 @@ if __name__ == '__main__':
     parser.add_argument('--name', help='--name NAME, show name.')
     parser.add_argument('--minQuality', help='--minQuality QUALITY (0-8)', type=int)
     parser.add_argument('--maxQuality', help='--maxQuality QUALITY (0-8)', type=int)
-    parser.add_argument('--config', help='--config, Set config option, reqires one of: --firstEpisode, --firstSeason, --downloadPath', action='store_true')
+    parser.add_argument('--imdbId', help='--imdbId ID, Optional imdb id of the show, ie: tt6048596.', type=str)
+    parser.add_argument('--config', help='--config, Set config option, reqires one of: --firstEpisode, --firstSeason, --downloadPath, --holdWindow, --ranking, --bloomFilter', action='store_true')
     parser.add_argument('--firstEpisode', help='--firstEpisode BOOL, Download first episodes.', type=bool)
     parser.add_argument('--firstSeason', help='--firstSeason BOOL, Download first seasons', type=bool)
     parser.add_argument('--downloadPath', help='--downloadPath PATH, Directory to download files to.', type=str)
+    parser.add_argument('--holdWindow', help='--holdWindow MINUTES, Wait for better releases of an episode before downloading.', type=int)
+    parser.add_argument('--ranking', help='--ranking FIELDS, Comma separated release ranking, ie: quality,encoding,seeds,size', type=str)
+    parser.add_argument('--bloomFilter', help='--bloomFilter RATE, Check a bloom filter of the download history first, with this false positive rate, ie: 0.001. 0 to disable.', type=float)
+    parser.add_argument('--daemon', help='--daemon, Keep running and poll every update interval.', action='store_true')
+    parser.add_argument('--backfill', help='--backfill FILE, Ingest the historical catalog in to FILE using every core. Optionally --pages.', type=str)
+    parser.add_argument('--pages', help='--pages N, Maximum number of pages to backfill.', type=int)
+    parser.add_argument('--catalog', help='--catalog FILE, Keep a local SQLite catalog of every torrent seen by polls.', type=str)
+    parser.add_argument('--transmission', help='--transmission URL, Add magnets to a Transmission daemon instead of downloading .torrent files, ie: http://localhost:9091/transmission/rpc', type=str)
+    parser.add_argument('--rpcUser', help='--rpcUser NAME, Transmission RPC username.', type=str)
+    parser.add_argument('--rpcPassword', help='--rpcPassword PASSWORD, Transmission RPC password.', type=str)
+    parser.add_argument('--xdgOpen', help='--xdgOpen, Open magnets in the desktop torrent client instead of downloading .torrent files.', action='store_true')
+    parser.add_argument('--metrics', help='--metrics FILE, Write Prometheus metrics to FILE after every poll.', type=str)
     args = parser.parse_args()
 
 # Load config:
@@ -40,12 +128,13 @@ if __name__ == '__main__':
         if (error == True):
             parser.print_help()
             exit(1)
-        configs.addShow(name=args.name, minQuality=args.minQuality, maxQuality=args.maxQuality)
+        configs.addShow(name=args.name, minQuality=args.minQuality, maxQuality=args.maxQuality, imdbId=args.imdbId)
         exit(0)
 # Configs:
     elif (args.config == True):
-        if (args.firstEpisode == None and args.firstSeason == None and args.downloadPath == None):
-            print ("ERROR: --config requires at least one of --firstEpisode, --firstSeason, --downloadPath to be set.")
+        if (args.firstEpisode == None and args.firstSeason == None and args.downloadPath == None and
+                args.holdWindow == None and args.ranking == None and args.bloomFilter == None):
+            print ("ERROR: --config requires at least one of --firstEpisode, --firstSeason, --downloadPath, --holdWindow, --ranking, --bloomFilter to be set.")
             parser.print_help()
             exit(1)
         if (args.firstEpisode != None):
@@ -54,6 +143,12 @@ if __name__ == '__main__':
             configs.setDownloadFirstSeason(args.firstSeason)
         if (args.downloadPath != None):
             configs.setDownloadPath(args.downloadPath)
+        if (args.holdWindow != None):
+            configs.setHoldWindow(args.holdWindow)
+        if (args.ranking != None):
+            configs.setRanking(args.ranking.split(','))
+        if (args.bloomFilter != None):
+            configs.setBloomFilter(args.bloomFilter)
         exit (0)
 
 
@@ -65,35 +160,39 @@ if __name__ == '__main__':
 
 
     api = EZTVApi()
-    success, result = api.getNew()
-
-    if (success == False):
-        print("ERROR: Failed to fetch torrents: %s" % result)
+    if (args.metrics != None):
+        setInstrumentation(Instrumentation())
+
+    catalog: Optional[Catalog] = None
+    if (args.catalog != None):
+        catalog = Catalog(args.catalog)
+
+    sink: Optional[TorrentSink] = None
+    if (args.transmission != None):
+        sink = TransmissionSink(args.transmission, args.rpcUser, args.rpcPassword, api.transport)
+    elif (args.xdgOpen == True):
+        sink = XdgOpenSink()
+
+    def pollAndExport(configs:Configs) -> bool:
+        success = poll(configs, api, catalog, sink)
+        if (args.metrics != None):
+            try:
+                getInstrumentation().exportPrometheus(args.metrics)
+            except RuntimeError as e:
+                print("ERROR: %s" % str(e))
+        return success
+
+    if (args.backfill != None):
+        success, result = Backfill(api, BackfillStore(args.backfill)).run(maxPages=args.pages)
+        if (success == False):
+            print("ERROR: Backfill stopped: %s" % result)
+            exit(1)
+        print("Backfilled %i torrents." % result)
+        exit(0)
+    if (args.daemon == True):
+        Daemon(configs, pollAndExport).run()
+        exit(0)
+    if (pollAndExport(configs) == False):
         exit(1)
-    torrentsToDownload:list[Torrent] = []
-    for torrent in result:
-        for show in configs.showList:
-            if (torrent.name.lower().find(show.name.lower()) > -1):
-                if (torrent.quality >= show.minQuality and torrent.quality <= show.maxQuality):
-                    if (torrent not in configs.downloadedTorrents):
-                        print("Downloading '%s'..." % torrent.title)
-                        torrent.downloadTorrent(configs.downloadPath)
-                        torrentsToDownload.append(torrent)
-                        show.seen(torrent)
-
-        if (configs.downloadPremiere == True and torrent.isPremiere == True):
-            if (torrent.quality >= configs.premiereMinQuality and torrent.quality <= configs.premiereMaxQuality):
-                if (torrent not in configs.downloadedTorrents):
-                    print("Downloading '%s'..." % torrent.title)
-                    torrentsToDownload.append(torrent)
-        elif (configs.downloadFirstSeason == True and torrent.isFirstSeason == True):
-            if (torrent.quality >= configs.firstSeasonMinQuality and torrent.quality <= configs.firstSeasonMaxQuality):
-                if (torrent not in configs.downloadedTorrents):
-                    print("Downloading '%s'..." % torrent.title)
-                    torrentsToDownload.append(torrent)
-    for torrent in torrentsToDownload:
-        torrent.downloadTorrent(configs.downloadPath)
-        configs.torrentDownloaded(torrent)
-
-
+    configs.setLastUpdate(pytz.utc.localize(datetime.utcnow()))
     exit(0)
\ No newline at end of file
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+
+from typing import Optional, Any, Callable
+import os
+import threading
+from time import perf_counter
+
+class Instrumentation(object):
+    """
+        Timers, counters and gauges for the api, parser, matcher, downloader and configs, plus hooks.
+
+        Every stage reports to the process wide instance returned by getInstrumentation(). The default is a
+        NullInstrumentation, so nothing is measured (and next to nothing is spent) until an Instrumentation
+        is installed with setInstrumentation().
+
+        Methods:
+            timer(name, labels) Context manager, observes the seconds spent in its block.
+            observe(name, seconds, labels) Add one observation to a timer.
+            increment(name, value, labels) Add to a counter.
+            setGauge(name, value, labels) Set a gauge.
+            addRequestHook(callback) Call callback(url, statusCode, seconds) after every api request.
+            addDownloadHook(callback) Call callback(torrent, seconds, error) after every download.
+            onRequest(url, statusCode, seconds) / onDownload(torrent, seconds, error) Report to the hooks.
+            snapshot() All values as a dict.
+            toPrometheus() All values in Prometheus text format.
+            exportPrometheus(filePath) Atomically write toPrometheus() to filePath, ie: for a textfile collector.
+    """
+    enabled: bool = True
+
+    def __init__(self) -> None:
+        self._lock: threading.Lock = threading.Lock()
+        self._counters: dict[tuple[str, tuple], float] = {}
+        self._gauges: dict[tuple[str, tuple], float] = {}
+        self._timers: dict[tuple[str, tuple], list[float]] = {}
+        self._requestHooks: list[Callable[[str, int, float], None]] = []
+        self._downloadHooks: list[Callable[[Any, float, Optional[str]], None]] = []
+        return
+
+#########################
+# Helpers:
+#########################
+    @staticmethod
+    def __key__(name:str, labels:Optional[dict[str, str]]) -> tuple[str, tuple]:
+        if (labels == None):
+            return (name, ())
+        return (name, tuple(sorted(labels.items())))
+
+    @staticmethod
+    def __formatName__(name:str, labels:tuple, suffix:Optional[str]='') -> str:
+        if (len(labels) == 0):
+            return name + suffix
+        labelText = ','.join('%s="%s"' % (key, str(value).replace('\\', '\\\\').replace('"', '\\"')) for key, value in labels)
+        return '%s%s{%s}' % (name, suffix, labelText)
+
+    def __callHooks__(self, hooks:list[Callable], *args) -> None:
+    # A broken hook mustn't break a poll:
+        for hook in hooks:
+            try:
+                hook(*args)
+            except Exception:
+                self.increment('eztv_hook_errors_total')
+        return
+
+#########################
+# Methods:
+#########################
+    def timer(self, name:str, labels:Optional[dict[str, str]]=None) -> Any:
+        return __Timer__(self, name, labels)
+
+    def observe(self, name:str, seconds:float, labels:Optional[dict[str, str]]=None) -> None:
+        key = self.__key__(name, labels)
+        with self._lock:
+            values = self._timers.get(key)
+            if (values == None):
+                self._timers[key] = [1, seconds, seconds]
+            else:
+                values[0] += 1
+                values[1] += seconds
+                if (seconds > values[2]):
+                    values[2] = seconds
+        return
+
+    def increment(self, name:str, value:Optional[float]=1, labels:Optional[dict[str, str]]=None) -> None:
+        key = self.__key__(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        return
+
+    def setGauge(self, name:str, value:float, labels:Optional[dict[str, str]]=None) -> None:
+        key = self.__key__(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+        return
+
+    def addRequestHook(self, callback:Callable[[str, int, float], None]) -> None:
+        """
+            @param: callback: Callable[[str, int, float], None], called with the url, the status code
+                        (0 if no response was received) and the seconds the request took.
+        """
+        self._requestHooks.append(callback)
+        return
+
+    def addDownloadHook(self, callback:Callable[[Any, float, Optional[str]], None]) -> None:
+        """
+            @param: callback: Callable[[Torrent, float, Optional[str]], None], called with the torrent, the seconds
+                        the download took and the error message, None on success.
+        """
+        self._downloadHooks.append(callback)
+        return
+
+    def onRequest(self, url:str, statusCode:int, seconds:float) -> None:
+        self.observe('eztv_http_request_seconds', seconds)
+        self.increment('eztv_http_responses_total', labels={'status': str(statusCode)})
+        self.__callHooks__(self._requestHooks, url, statusCode, seconds)
+        return
+
+    def onDownload(self, torrent:Any, seconds:float, error:Optional[str]) -> None:
+        self.observe('eztv_download_seconds', seconds)
+        if (error == None):
+            self.increment('eztv_downloads_total', labels={'result': 'ok'})
+        else:
+            self.increment('eztv_downloads_total', labels={'result': 'error'})
+        self.__callHooks__(self._downloadHooks, torrent, seconds, error)
+        return
+
+    def snapshot(self) -> dict[str, dict[str, object]]:
+        """
+            @return: dict[str, dict[str, object]], {'counters': ..., 'gauges': ..., 'timers': ...}, keyed by the
+                        Prometheus series name. Timers are {'count': int, 'sum': float, 'max': float}.
+        """
+        with self._lock:
+            return {
+                'counters': {self.__formatName__(name, labels): value for (name, labels), value in self._counters.items()},
+                'gauges': {self.__formatName__(name, labels): value for (name, labels), value in self._gauges.items()},
+                'timers': {self.__formatName__(name, labels): {'count': values[0], 'sum': values[1], 'max': values[2]}
+                                for (name, labels), values in self._timers.items()},
+            }
+
+    def toPrometheus(self) -> str:
+        lines: list[str] = []
+        with self._lock:
+            for metricType, values in (('counter', self._counters), ('gauge', self._gauges)):
+                lastName: Optional[str] = None
+                for (name, labels), value in sorted(values.items()):
+                    if (name != lastName):
+                        lines.append('# TYPE %s %s' % (name, metricType))
+                        lastName = name
+                    lines.append('%s %r' % (self.__formatName__(name, labels), float(value)))
+            lastName = None
+            for (name, labels), values in sorted(self._timers.items()):
+                if (name != lastName):
+                    lines.append('# TYPE %s summary' % name)
+                    lastName = name
+                lines.append('%s %i' % (self.__formatName__(name, labels, '_count'), values[0]))
+                lines.append('%s %r' % (self.__formatName__(name, labels, '_sum'), values[1]))
+        return '\n'.join(lines) + '\n'
+
+    def exportPrometheus(self, filePath:str) -> None:
+        """Write the metrics in Prometheus text format, replacing filePath atomically."""
+        tempFilePath = filePath + '.tmp'
+        try:
+            with open(tempFilePath, 'w') as fileHandle:
+                fileHandle.write(self.toPrometheus())
+            os.replace(tempFilePath, filePath)
+        except Exception as e:
+            errorMessage = "Failed to write metrics to '%s': %s" % (filePath, str(e.args))
+            raise RuntimeError(errorMessage)
+        return
+
+class NullInstrumentation(Instrumentation):
+    """Instrumentation that records nothing, the default."""
+    enabled: bool = False
+
+    def timer(self, name:str, labels:Optional[dict[str, str]]=None) -> Any:
+        return __NULL_TIMER__
+
+    def observe(self, name:str, seconds:float, labels:Optional[dict[str, str]]=None) -> None:
+        return
+
+    def increment(self, name:str, value:Optional[float]=1, labels:Optional[dict[str, str]]=None) -> None:
+        return
+
+    def setGauge(self, name:str, value:float, labels:Optional[dict[str, str]]=None) -> None:
+        return
+
+    def onRequest(self, url:str, statusCode:int, seconds:float) -> None:
+        return
+
+    def onDownload(self, torrent:Any, seconds:float, error:Optional[str]) -> None:
+        return
+
+##########################
+# Timers:
+##########################
+class __Timer__(object):
+    __slots__ = ('instrumentation', 'name', 'labels', 'start')
+
+    def __init__(self, instrumentation:Instrumentation, name:str, labels:Optional[dict[str, str]]) -> None:
+        self.instrumentation: Instrumentation = instrumentation
+        self.name: str = name
+        self.labels: Optional[dict[str, str]] = labels
+        self.start: float = 0.0
+        return
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.instrumentation.observe(self.name, perf_counter() - self.start, self.labels)
+        return
+
+class __NullTimer__(object):
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        return
+
+__NULL_TIMER__: __NullTimer__ = __NullTimer__()
+
+##########################
+# Shared default:
+##########################
+__INSTRUMENTATION__: Instrumentation = NullInstrumentation()
+__INSTRUMENTATION_LOCK__: threading.Lock = threading.Lock()
+
+def getInstrumentation() -> Instrumentation:
+    """Returns the process wide instrumentation, a NullInstrumentation unless one was set."""
+    return __INSTRUMENTATION__
+
+def setInstrumentation(instrumentation:Instrumentation) -> Instrumentation:
+    """
+        Replace the process wide instrumentation.
+        @param: instrumentation: Instrumentation, the new instrumentation, NullInstrumentation() to disable.
+        @return: Instrumentation, the previous instrumentation.
+    """
+    global __INSTRUMENTATION__
+    if (isinstance(instrumentation, Instrumentation) == False):
+        errorMessage = "instrumentation must be of type Instrumentation, not: %s" % str(type(instrumentation))
+        raise TypeError(errorMessage)
+    with __INSTRUMENTATION_LOCK__:
+        returnValue = __INSTRUMENTATION__
+        __INSTRUMENTATION__ = instrumentation
+    return returnValue
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+
+from typing import Optional
+import math
+import random
+import threading
+from time import monotonic, sleep
+from instrumentation import getInstrumentation
+
+# Responses that mean the server wants us to slow down:
+THROTTLE_STATUS_CODES: tuple[int] = (429, 503)
+# Responses worth retrying, the request itself was fine:
+RETRY_STATUS_CODES: tuple[int] = (429, 500, 502, 503, 504)
+DEFAULT_BACKOFF_BASE: float = 0.5
+DEFAULT_BACKOFF_CAP: float = 60.0
+
+def backoffDelay(attempt:int, retryAfter:Optional[float]=None, base:Optional[float]=DEFAULT_BACKOFF_BASE,
+                    cap:Optional[float]=DEFAULT_BACKOFF_CAP) -> float:
+    """
+        Seconds to wait before retry number attempt + 1.
+        A server given Retry-After is honoured, with up to base seconds of jitter added so callers don't all return
+        at once. Otherwise full jitter: a random delay up to base * 2 ** attempt, capped at cap.
+        @param: attempt: int, retries already made, 0 for the first.
+        @param: retryAfter: Optional[float], seconds from the response's Retry-After header, if any.
+        @param: base: Optional[float], seconds, the first retry's maximum delay.
+        @param: cap: Optional[float], seconds, the maximum delay without a Retry-After.
+        @return: float, seconds to wait.
+    """
+    if (retryAfter != None):
+        return max(0.0, retryAfter) + random.uniform(0, base)
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+class TokenBucket(object):
+    """
+        Thread safe token bucket rate limiter.
+
+        Tokens refill continuously at `rate` per second up to `burst`. A caller that finds a token available
+        proceeds immediately; callers only block once the burst budget has been spent. Waiting callers reserve
+        their slot under the lock, so concurrent callers (threads or EZTVApi instances sharing the bucket) are
+        spaced out and never exceed the rate together.
+
+        Methods:
+            reserve() Reserve a token, returns the seconds the caller must wait before using it.
+            acquire() Reserve a token and sleep until it is usable, returns the seconds waited.
+            pause(seconds) Hold back every caller for a while, ie: the server sent Retry-After.
+            onResponse(statusCode) Report a response, a fixed rate ignores it.
+        Properties:
+            currentRate: float, tokens per second.
+            totalWaited: float, total seconds callers were told to wait.
+            waitCount: int, number of acquisitions that had to wait.
+    """
+    def __init__(self, rate:float, burst:Optional[int]=None) -> None:
+        """
+            @param: rate: float, tokens per second.
+            @param: burst: Optional[int], the bucket size. Defaults to rate rounded up.
+        """
+        if (rate <= 0):
+            errorMessage = "rate must be > 0"
+            raise ValueError(errorMessage)
+        if (burst == None):
+            burst = max(1, int(rate + 0.999999))
+        if (burst < 1):
+            errorMessage = "burst must be >= 1"
+            raise ValueError(errorMessage)
+        self.rate: float = float(rate)
+        self.burst: int = burst
+        self._tokens: float = float(burst)
+        self._lastRefill: float = monotonic()
+        self._pausedUntil: float = 0.0
+        self._lock: threading.Lock = threading.Lock()
+        self.totalWaited: float = 0.0
+        self.waitCount: int = 0
+        return
+
+    @property
+    def currentRate(self) -> float:
+        return self.rate
+
+    def __refill__(self, now:float) -> None:
+        elapsed = now - self._lastRefill
+        if (elapsed > 0):
+            self._tokens = min(float(self.burst), self._tokens + elapsed * self.rate)
+            self._lastRefill = now
+        return
+
+    def reserve(self) -> float:
+        """
+            Reserve one token without blocking.
+            @return: float, the number of seconds the caller must wait before making its request, 0.0 if none.
+        """
+        with self._lock:
+            now = monotonic()
+            self.__refill__(now)
+            self._tokens -= 1.0
+        # Tokens don't refill during a pause, _lastRefill is its end:
+            delay = max(0.0, self._lastRefill - now)
+            if (self._tokens < 0):
+                delay += -self._tokens / self.rate
+            if (delay <= 0):
+                return 0.0
+            self.totalWaited += delay
+            self.waitCount += 1
+            return delay
+
+    def acquire(self) -> float:
+        """
+            Take one token, blocking until it is available.
+            @return: float, the number of seconds waited.
+        """
+        delay = self.reserve()
+        if (delay > 0):
+            sleep(delay)
+        return delay
+
+    def pause(self, seconds:float) -> None:
+        """
+            Hold back every caller until seconds from now, then resume at the current rate without a burst.
+            Overlapping pauses are not added together, the later end wins.
+            @param: seconds: float, how long to pause.
+        """
+        with self._lock:
+            now = monotonic()
+            self.__refill__(now)
+            self._pausedUntil = max(self._pausedUntil, now + seconds)
+            self._lastRefill = max(self._lastRefill, self._pausedUntil)
+            self._tokens = min(self._tokens, 1.0)
+        return
+
+    def onResponse(self, statusCode:int) -> None:
+        """Report the status of a request made under this limiter, a fixed rate ignores it."""
+        return
+
+class AdaptiveRateController(TokenBucket):
+    """
+        Token bucket whose rate follows the server's responses, additive increase / multiplicative decrease.
+
+        Every healthy response raises the rate by increaseStep / rate, so it climbs by increaseStep per second of
+        healthy traffic, up to maxRate. A throttling response (THROTTLE_STATUS_CODES) cuts it by decreaseFactor,
+        down to minRate. Throttles that arrive while a pause is running answer requests that were already in
+        flight when the rate was cut, and don't cut it again. The rate settles just under the server's limit,
+        probing it slowly and backing off quickly.
+
+        Methods:
+            onResponse(statusCode) Report a response and adjust the rate.
+        Properties:
+            currentRate: float, the current tokens per second.
+            throttleCount: int, the number of throttling responses that cut the rate.
+    """
+    def __init__(self,
+                    rate: float,
+                    burst: Optional[int] = None,
+                    minRate: Optional[float] = None,
+                    maxRate: Optional[float] = None,
+                    increaseStep: Optional[float] = 0.25,
+                    decreaseFactor: Optional[float] = 0.5,
+                ) -> None:
+        """
+            @param: rate: float, the starting tokens per second.
+            @param: burst: Optional[int], the largest bucket size, shrinks with the rate. Defaults to rate rounded up.
+            @param: minRate: Optional[float], the lowest rate, defaults to a tenth of rate.
+            @param: maxRate: Optional[float], the highest rate, defaults to rate.
+            @param: increaseStep: Optional[float], tokens per second added per second of healthy responses.
+            @param: decreaseFactor: Optional[float], the rate is multiplied by this on a throttle, 0 -> 1 exclusive.
+        """
+        TokenBucket.__init__(self, rate, burst)
+        if (minRate == None):
+            minRate = rate / 10
+        if (maxRate == None):
+            maxRate = rate
+        if (minRate <= 0 or minRate > rate or maxRate < rate):
+            errorMessage = "rates must satisfy 0 < minRate <= rate <= maxRate"
+            raise ValueError(errorMessage)
+        if (increaseStep < 0):
+            errorMessage = "increaseStep must be >= 0"
+            raise ValueError(errorMessage)
+        if (decreaseFactor <= 0 or decreaseFactor >= 1):
+            errorMessage = "decreaseFactor must be in range 0 -> 1 exclusive"
+            raise ValueError(errorMessage)
+        self.minRate: float = float(minRate)
+        self.maxRate: float = float(maxRate)
+        self.maxBurst: int = self.burst
+        self.increaseStep: float = increaseStep
+        self.decreaseFactor: float = decreaseFactor
+        self.throttleCount: int = 0
+        return
+
+    def __setRate__(self, now:float, rate:float) -> None:
+    # Called with the lock held, tokens earned so far are counted at the old rate:
+        self.__refill__(now)
+        self.rate = min(self.maxRate, max(self.minRate, rate))
+        self.burst = max(1, min(self.maxBurst, math.ceil(self.rate)))
+        self._tokens = min(self._tokens, float(self.burst))
+        return
+
+    def onResponse(self, statusCode:int) -> None:
+        """
+            Report the status of a request made under this controller.
+            @param: statusCode: int, the response status, throttles are THROTTLE_STATUS_CODES, server errors are ignored.
+        """
+        with self._lock:
+            now = monotonic()
+            if (statusCode in THROTTLE_STATUS_CODES):
+                if (now < self._pausedUntil):
+                    return
+                self.throttleCount += 1
+                self.__setRate__(now, self.rate * self.decreaseFactor)
+            elif (statusCode < 500):
+                if (self.rate >= self.maxRate):
+                    return
+                self.__setRate__(now, self.rate + self.increaseStep / self.rate)
+            else:
+                return
+            rate = self.rate
+        getInstrumentation().setGauge('eztv_rate_limit_rate', rate)
+        return
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+
+from typing import Optional, Any, Mapping
+import os
+import re
+import json
+import hashlib
+import threading
+from time import time
+
+DEFAULT_TTL: float = 60.0
+DEFAULT_MAX_STALE: float = 24 * 60 * 60.0
+DEFAULT_MAX_BYTES: int = 64 * 1024 * 1024
+
+__MAX_AGE_REGEX__ = re.compile(r'max-age\s*=\s*(\d+)')
+
+class ResponseCache(object):
+    """
+        Persistent HTTP response cache keyed by url.
+
+        Stores each body next to a small JSON metadata file holding its validators (ETag / Last-Modified),
+        freshness lifetime (Cache-Control max-age, or the default ttl) and a digest of the body. Fresh
+        entries are served without a request; stale ones are revalidated with a conditional request.
+        Objects parsed from a body can be kept in memory and are reused for as long as the body is unchanged.
+
+        Methods:
+            isFresh(url) True if the stored response can be used without a request.
+            conditionalHeaders(url) If-None-Match / If-Modified-Since headers for a stale entry.
+            getBody(url) The stored body, or None.
+            store(url, headers, body) Store a 200 response.
+            refresh(url, headers) Mark an entry fresh again after a 304 response.
+            getParsed(url) / setParsed(url, value) Objects parsed from the current body.
+            evict() Drop entries past maxStale, then the least recently used until under maxBytes.
+            clear() Drop every entry.
+    """
+    def __init__(self,
+                    directory: str,
+                    ttl: Optional[float] = DEFAULT_TTL,
+                    maxStale: Optional[float] = DEFAULT_MAX_STALE,
+                    maxBytes: Optional[int] = DEFAULT_MAX_BYTES,
+                ) -> None:
+        """
+            @param: directory: str, the cache directory, created if it doesn't exist.
+            @param: ttl: Optional[float], seconds a response is fresh when the server doesn't say.
+            @param: maxStale: Optional[float], seconds after which an entry is evicted, even if it could be revalidated.
+            @param: maxBytes: Optional[int], the maximum total size of stored bodies.
+        """
+        if (ttl < 0):
+            errorMessage = "ttl must be >= 0"
+            raise ValueError(errorMessage)
+        if (maxBytes < 1):
+            errorMessage = "maxBytes must be >= 1"
+            raise ValueError(errorMessage)
+        try:
+            os.makedirs(directory, exist_ok=True)
+        except Exception as e:
+            errorMessage = "Failed to create cache directory '%s': %s" % (directory, str(e.args))
+            raise RuntimeError(errorMessage)
+        self.directory: str = directory
+        self.ttl: float = ttl
+        self.maxStale: float = maxStale
+        self.maxBytes: int = maxBytes
+        self._lock: threading.RLock = threading.RLock()
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._parsed: dict[str, tuple[str, Any]] = {}
+        self.__loadEntries__()
+        return
+
+#########################
+# Helpers:
+#########################
+    @staticmethod
+    def __keyFor__(url:str) -> str:
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def __path__(self, key:str, extension:str) -> str:
+        return os.path.join(self.directory, key + extension)
+
+    def __loadEntries__(self) -> None:
+        for fileName in os.listdir(self.directory):
+            if (fileName.endswith('.json') == False):
+                continue
+            try:
+                with open(os.path.join(self.directory, fileName), 'r') as fileHandle:
+                    entry = json.load(fileHandle)
+            except (OSError, ValueError):
+                continue
+            self._entries[entry['url']] = entry
+        return
+
+    def __writeEntry__(self, entry:dict[str, Any]) -> None:
+        metaPath = self.__path__(entry['key'], '.json')
+        with open(metaPath + '.tmp', 'w') as fileHandle:
+            json.dump(entry, fileHandle)
+        os.replace(metaPath + '.tmp', metaPath)
+        return
+
+    def __freshFor__(self, headers:Mapping[str, str]) -> Optional[float]:
+    # None means don't store at all:
+        cacheControl = headers.get('Cache-Control', '').lower()
+        if (cacheControl.find('no-store') > -1):
+            return None
+        if (cacheControl.find('no-cache') > -1):
+            return 0.0
+        maxAgeMatch = __MAX_AGE_REGEX__.search(cacheControl)
+        if (maxAgeMatch != None):
+            return float(maxAgeMatch.group(1))
+        return self.ttl
+
+    def __remove__(self, url:str) -> None:
+        entry = self._entries.pop(url, None)
+        self._parsed.pop(url, None)
+        if (entry == None):
+            return
+        for extension in ('.json', '.body'):
+            try:
+                os.remove(self.__path__(entry['key'], extension))
+            except FileNotFoundError:
+                pass
+        return
+
+#########################
+# Methods:
+#########################
+    def isFresh(self, url:str) -> bool:
+        with self._lock:
+            entry = self._entries.get(url)
+            if (entry == None):
+                return False
+            return (time() - entry['storedAt'] < entry['freshFor'])
+
+    def conditionalHeaders(self, url:str) -> dict[str, str]:
+        with self._lock:
+            entry = self._entries.get(url)
+            headers: dict[str, str] = {}
+            if (entry == None):
+                return headers
+            if (entry['etag'] != None):
+                headers['If-None-Match'] = entry['etag']
+            if (entry['lastModified'] != None):
+                headers['If-Modified-Since'] = entry['lastModified']
+            return headers
+
+    def getBody(self, url:str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(url)
+            if (entry == None):
+                return None
+            try:
+                with open(self.__path__(entry['key'], '.body'), 'rb') as fileHandle:
+                    body = fileHandle.read()
+            except OSError:
+                self.__remove__(url)
+                return None
+            entry['lastAccess'] = time()
+            return body
+
+    def store(self, url:str, headers:Mapping[str, str], body:bytes) -> None:
+        """
+            Store a 200 response.
+            @param: url: str, the request url.
+            @param: headers: Mapping[str, str], the response headers.
+            @param: body: bytes, the response body.
+        """
+        freshFor = self.__freshFor__(headers)
+        with self._lock:
+            if (freshFor == None):
+                self.__remove__(url)
+                return
+            key = self.__keyFor__(url)
+            bodyPath = self.__path__(key, '.body')
+            with open(bodyPath + '.tmp', 'wb') as fileHandle:
+                fileHandle.write(body)
+            os.replace(bodyPath + '.tmp', bodyPath)
+            now = time()
+            entry = {
+                'url': url,
+                'key': key,
+                'etag': headers.get('ETag'),
+                'lastModified': headers.get('Last-Modified'),
+                'storedAt': now,
+                'lastAccess': now,
+                'freshFor': freshFor,
+                'size': len(body),
+                'digest': hashlib.sha1(body).hexdigest(),
+            }
+            self.__writeEntry__(entry)
+            self._entries[url] = entry
+            self.evict()
+        return
+
+    def refresh(self, url:str, headers:Mapping[str, str]) -> None:
+        """Mark an entry fresh again after a 304 Not Modified response."""
+        freshFor = self.__freshFor__(headers)
+        with self._lock:
+            entry = self._entries.get(url)
+            if (entry == None):
+                return
+            if (freshFor == None):
+                self.__remove__(url)
+                return
+            entry['storedAt'] = time()
+            entry['freshFor'] = freshFor
+            if (headers.get('ETag') != None):
+                entry['etag'] = headers.get('ETag')
+            if (headers.get('Last-Modified') != None):
+                entry['lastModified'] = headers.get('Last-Modified')
+            self.__writeEntry__(entry)
+        return
+
+    def getParsed(self, url:str) -> Optional[Any]:
+        """Returns the value set with setParsed if the stored body hasn't changed since, otherwise None."""
+        with self._lock:
+            entry = self._entries.get(url)
+            parsed = self._parsed.get(url)
+            if (entry == None or parsed == None or parsed[0] != entry['digest']):
+                return None
+            entry['lastAccess'] = time()
+            return parsed[1]
+
+    def setParsed(self, url:str, value:Any) -> None:
+        """Keep objects parsed from the current body of url in memory."""
+        with self._lock:
+            entry = self._entries.get(url)
+            if (entry != None):
+                self._parsed[url] = (entry['digest'], value)
+        return
+
+    def evict(self) -> None:
+        with self._lock:
+            now = time()
+            for url in [url for url, entry in self._entries.items() if now - entry['storedAt'] > self.maxStale]:
+                self.__remove__(url)
+            totalBytes = sum(entry['size'] for entry in self._entries.values())
+            if (totalBytes <= self.maxBytes):
+                return
+            for entry in sorted(self._entries.values(), key=lambda entry: entry['lastAccess']):
+                totalBytes -= entry['size']
+                self.__remove__(entry['url'])
+                if (totalBytes <= self.maxBytes):
+                    break
+        return
+
+    def clear(self) -> None:
+        with self._lock:
+            for url in list(self._entries.keys()):
+                self.__remove__(url)
+        return
@@ -2,6 +2,7 @@
 
 from typing import Optional
 
+from common import __normalizeImdbId__
 from torrent import Torrent
 
 class Show(object):
@@ -10,13 +11,20 @@ class Show(object):
                     name: Optional[str] = '',
                     minQuality: Optional[int] = Torrent.QUALITY_UNKNOWN,
                     maxQuality: Optional[int] = Torrent.QUALITY_ANY,
+                    imdbId: Optional[str] = None,
                 ) -> None:
     # Set properties:
         self.name: str = name
         self.minQuality: int = minQuality
         self.maxQuality: int = maxQuality
+        self.imdbId: Optional[str] = None
+        if (imdbId != None):
+            self.imdbId = __normalizeImdbId__(imdbId)
+    # Watermark, the latest (season, episode) seen:
         self.lastSeason: int = 0
         self.lastEpisode: int = 0
+    # Bit n of seenEpisodes[season] is set once episode n of that season was seen, bit 0 is the season pack:
+        self.seenEpisodes: dict[int, int] = {}
     # Parse from Dict:
         if (fromDict != None):
             self.__fromDict__(fromDict)
@@ -32,6 +40,8 @@ class Show(object):
             'maxQuality': self.maxQuality,
             'lastSeason': self.lastSeason,
             'lastEpisode': self.lastEpisode,
+            'imdbId': self.imdbId,
+            'seenEpisodes': {str(season): bitmap for season, bitmap in self.seenEpisodes.items()},
         }
         return showDict
     
@@ -41,14 +51,27 @@ class Show(object):
         self.maxQuality = fromDict['maxQuality']
         self.lastSeason = fromDict['lastSeason']
         self.lastEpisode = fromDict['lastEpisode']
+        self.imdbId = fromDict.get('imdbId')
+        self.seenEpisodes = {int(season): bitmap for season, bitmap in fromDict.get('seenEpisodes', {}).items()}
         return
 
 #####################
 # Helpers:
 #####################
-    def seen(self, torrent:Torrent):
-        if (self.lastSeason < torrent.season):
+    def seen(self, torrent:Torrent) -> None:
+        """Record an episode of this show as seen. Daily episodes (no season) aren't tracked."""
+        if (torrent.season == 0):
+            return
+        self.seenEpisodes[torrent.season] = self.seenEpisodes.get(torrent.season, 0) | (1 << torrent.episode)
+        if ((torrent.season, torrent.episode) > (self.lastSeason, self.lastEpisode)):
             self.lastSeason = torrent.season
-        if (self.lastEpisode < torrent.episode):
             self.lastEpisode = torrent.episode
-        return
\ No newline at end of file
+        return
+
+    def hasSeen(self, torrent:Torrent) -> bool:
+        """True if the episode was already seen, or belongs to a season older than the watermark's."""
+        if (torrent.season == 0):
+            return False
+        if (torrent.season < self.lastSeason):
+            return True
+        return ((self.seenEpisodes.get(torrent.season, 0) >> torrent.episode) & 1 == 1)
\ No newline at end of file
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+from typing import Iterable
+import re
+from common import __typeError__
+from show import Show
+
+# Trailing "(2005)" / "2005" and country suffixes, ie: "Doctor Who (2005)", "The Office (US)":
+__SHOW_SUFFIX_REGEX__ = re.compile(r'(?:\s+\(?(?:19|20)\d{2}\)?|\s+\(?(?:us|uk|au|ca|nz)\)?)+$')
+__APOSTROPHE_REGEX__ = re.compile(r"['`’]")
+__PUNCTUATION_REGEX__ = re.compile(r'[^a-z0-9]+')
+
+def normalizeText(text:str) -> str:
+    """Lower case, drop apostrophes and turn every other run of punctuation and whitespace in to one space."""
+    text = __APOSTROPHE_REGEX__.sub('', text.lower())
+    return __PUNCTUATION_REGEX__.sub(' ', text).strip()
+
+def normalizeShowName(name:str) -> str:
+    """normalizeText, then strip trailing year and country suffixes."""
+    name = __APOSTROPHE_REGEX__.sub('', name.lower()).strip()
+    name = __SHOW_SUFFIX_REGEX__.sub('', name)
+    return __PUNCTUATION_REGEX__.sub(' ', name).strip()
+
+class ShowMatcher(object):
+    """
+        Aho-Corasick matcher of show names.
+
+        Compiles every show name in to one automaton, so a torrent is matched against all shows in a
+        single pass over its name instead of one substring search per show.
+
+        Methods:
+            match(text) Returns every Show whose name appears in text, in show list order.
+    """
+    def __init__(self, shows:Iterable[Show], normalize:bool=False) -> None:
+        """
+            @param: shows: Iterable[Show], the shows to match.
+            @param: normalize: bool, ignore punctuation, and trailing year and country suffixes of show names.
+                        When False, a show matches if its lower cased name is a substring of the lower cased text.
+        """
+        self.normalize: bool = normalize
+        self._shows: list[Show] = list(shows)
+    # Automaton state, index 0 is the root:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._output: list[tuple[int, ...]] = [()]
+        for showIndex, show in enumerate(self._shows):
+            if (isinstance(show, Show) == False):
+                __typeError__("show", "Show", show)
+            pattern = self.__normalizeName__(show.name)
+            if (pattern == ''):
+                continue
+            self.__addPattern__(pattern, showIndex)
+        self.__buildFailLinks__()
+        return
+
+#####################
+# Helpers:
+#####################
+    def __normalizeName__(self, name:str) -> str:
+        if (self.normalize == True):
+            return normalizeShowName(name)
+        return name.lower()
+
+    def __normalizeText__(self, text:str) -> str:
+        if (self.normalize == True):
+            return normalizeText(text)
+        return text.lower()
+
+    def __addPattern__(self, pattern:str, showIndex:int) -> None:
+        state = 0
+        for char in pattern:
+            nextState = self._goto[state].get(char)
+            if (nextState == None):
+                nextState = len(self._goto)
+                self._goto[state][char] = nextState
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = nextState
+        self._output[state] = self._output[state] + (showIndex,)
+        return
+
+    def __buildFailLinks__(self) -> None:
+    # Breadth first, so a state's fail link is resolved before its children's:
+        queue: list[int] = list(self._goto[0].values())
+        position = 0
+        while (position < len(queue)):
+            state = queue[position]
+            position += 1
+            for char, nextState in self._goto[state].items():
+                queue.append(nextState)
+                failState = self._fail[state]
+                while (failState != 0 and char not in self._goto[failState]):
+                    failState = self._fail[failState]
+                failTarget = self._goto[failState].get(char, 0)
+                if (failTarget == nextState):
+                    failTarget = 0
+                self._fail[nextState] = failTarget
+            # Patterns ending at the fail target also end here:
+                self._output[nextState] = self._output[nextState] + self._output[failTarget]
+        return
+
+#####################
+# Methods:
+#####################
+    def match(self, text:str) -> list[Show]:
+        """
+            Find every show whose name appears in text.
+            @param: text: str, the text to search, ie: Torrent.name.
+            @return: list[Show], the matching shows in show list order.
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        found: set[int] = set()
+        state = 0
+        for char in self.__normalizeText__(text):
+            while (state != 0 and char not in goto[state]):
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if (len(output[state]) > 0):
+                found.update(output[state])
+        return [self._shows[showIndex] for showIndex in sorted(found)]
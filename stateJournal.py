@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+from typing import Optional, Iterator, Any
+import os
+import json
+
+class StateJournal(object):
+    """
+        Append-only journal of state changes.
+
+        Each change is written as one JSON line, so the cost of recording a change doesn't depend on how
+        much state there is. The owner periodically writes a compacted snapshot and truncates the journal,
+        and replays the journal on top of the snapshot when loading. A torn last line left by a crash
+        mid-append is ignored on replay. Appends follow the journal file if another process removes or
+        replaces it.
+
+        Methods:
+            append(op, data) Append a record, returns the number of records since the last truncate.
+            replay() Iterate over the (op, data) records in order, sets torn if a torn record was found.
+            truncate() Drop all records, call after writing a snapshot.
+            close() Close the journal file.
+    """
+    def __init__(self, filePath:str, fsync:Optional[bool]=True) -> None:
+        """
+            @param: filePath: str, the journal file.
+            @param: fsync: Optional[bool], fsync after every record so it survives a crash.
+        """
+        self._filePath: str = filePath
+        self._fsync: bool = fsync
+        self._fileHandle = None
+        self.recordCount: int = 0
+        self.torn: bool = False
+        return
+
+    def __open__(self) -> None:
+    # Another process may have compacted and removed the journal, don't keep appending to the unlinked file:
+        if (self._fileHandle != None):
+            try:
+                stale = (os.stat(self._filePath).st_ino != os.fstat(self._fileHandle.fileno()).st_ino)
+            except FileNotFoundError:
+                stale = True
+            if (stale == True):
+                self.close()
+        if (self._fileHandle == None):
+            try:
+                self._fileHandle = open(self._filePath, 'a', encoding='utf-8')
+            except Exception as e:
+                errorMessage = "FATAL: Failed to open '%s' for appending: %s" % (self._filePath, str(e.args))
+                raise RuntimeError(errorMessage)
+        return
+
+    def append(self, op:str, data:Any) -> int:
+        """
+            Append a record.
+            @param: op: str, the operation name.
+            @param: data: Any, JSON serializable operation data.
+            @return: int, the number of records since the last truncate.
+        """
+        self.__open__()
+        self._fileHandle.write(json.dumps([op, data], separators=(',', ':')) + '\n')
+        self._fileHandle.flush()
+        if (self._fsync == True):
+            os.fsync(self._fileHandle.fileno())
+        self.recordCount += 1
+        return self.recordCount
+
+    def replay(self) -> Iterator[tuple[str, Any]]:
+        """Iterate over the records in the journal, in the order they were appended."""
+        self.close()
+        self.recordCount = 0
+        self.torn = False
+        if (os.path.exists(self._filePath) == False):
+            return
+        with open(self._filePath, 'r', encoding='utf-8') as fileHandle:
+            for line in fileHandle:
+                try:
+                    if (line.endswith('\n') == False):
+                        raise ValueError("unterminated record")
+                    op, data = json.loads(line)
+                except ValueError:
+                # Torn write from a crash, nothing after it was committed. Records appended after it would
+                # be lost too, so the owner should snapshot and truncate:
+                    self.torn = True
+                    break
+                self.recordCount += 1
+                yield (op, data)
+        return
+
+    def truncate(self) -> None:
+        """Drop all records."""
+        self.close()
+        try:
+            os.remove(self._filePath)
+        except FileNotFoundError:
+            pass
+        self.recordCount = 0
+        return
+
+    def close(self) -> None:
+        if (self._fileHandle != None):
+            self._fileHandle.close()
+            self._fileHandle = None
+        return
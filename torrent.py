@@ -1,15 +1,24 @@
 #!/usr/bin/env python3
 
-from typing import TypeVar, Optional, Any
+from typing import TypeVar, Optional, Any, NamedTuple
+from functools import lru_cache
 from datetime import datetime, date
 import pytz
 import re
 import os
 from subprocess import check_call, CalledProcessError
 from common import MONTH_NUMBER_BY_LONG_NAME, MONTH_NUMBER_BY_SHORT_NAME, __downloadFile__, __typeError__
+from transport import Transport
 
 Self = TypeVar("Self", bound="Torrent")
 
+class TitleInfo(NamedTuple):
+    """Details parsed from a torrent title by classifyTitle."""
+    quality: int
+    encoding: str
+    airedDate: Optional[date]
+    name: str
+
 class Torrent(object):
     """
         Class to store a single torrent from EZTV.
@@ -58,18 +67,31 @@ class Torrent(object):
     ENCODING_X264: str = 'x264'
     ENCODING_X265: str = 'x265'
 
-    SHOW_NAME_REGEX = re.compile(r'^(?P<name>.+) ([Ss]\d+[Ee]\d+|\d{4} \d{2} \d{2}|\d+(th|st)? \w+ \d{4}|[Ss]\d+) .+$')
+    SHOW_NAME_REGEX = re.compile(
+        r'^(?P<name>.+) ([Ss]\d+[Ee]\d+|(?P<ymdYear>\d{4}) (?P<ymdMonth>\d{2}) (?P<ymdDay>\d{2})|'
+        r'(?P<dmyDay>\d+)(?:th|st|nd|rd)? (?P<dmyMonth>\w+) (?P<dmyYear>\d{4})|[Ss]\d+) .+$'
+    )
+
+    __slots__ = ('_raw', 'id', 'season', 'episode', '_releaseDate', '_titleInfo')
+
+# Raw api keys stored in a record, in order, followed by quality, encoding, aired date ordinal and name:
+    RECORD_RAW_KEYS: tuple[str] = ('id', 'hash', 'filename', 'title', 'episode_url', 'torrent_url', 'magnet_url', 'imdb_id',
+                                    'season', 'episode', 'small_screenshot', 'large_screenshot', 'seeds', 'peers',
+                                    'date_released_unix', 'size_bytes')
 
     def __init__(self,
                     rawData: Optional[dict[str,object]] = None,
                     fromDict: Optional[dict[str, object]] = None,
+                    fromRecord: Optional[tuple] = None,
                 ) -> None:
         if (rawData != None):
             self.__fromRawData__(rawData)
         elif (fromDict != None):
             self.__fromDict__(fromDict)
+        elif (fromRecord != None):
+            self.__fromRecord__(fromRecord)
         else:
-            errorMessage = "Either rawData or fromDict must be defined."
+            errorMessage = "Either rawData, fromDict or fromRecord must be defined."
             raise RuntimeError(errorMessage)
         return
 
@@ -77,101 +99,127 @@ class Torrent(object):
 # Init:
 ##################
     def __fromRawData__(self, rawData: dict[str, object]) -> None:
-# Parse and store raw data:
+# Keep the raw api dict, everything else is derived from it on first access:
+        self._raw: dict[str, object] = rawData
         self.id: int = rawData['id']
-        self.hash: str = rawData['hash']
-        self.filename: str = rawData['filename']
-        self.title: str = rawData['title']
-        self.episodeLink: str = rawData['episode_url']
-        self.torrent: str = rawData['torrent_url']
-        self.magnet: str = rawData['magnet_url']
-        self.imdbId: str = rawData['imdb_id']
         self.season: int = int(rawData['season'])
         self.episode: int = int(rawData['episode'])
-        self.smallScreenshot: Optional[str]
-        if (rawData['small_screenshot'] == ''):
-            self.smallScreenshot = None
-        elif (rawData['small_screenshot'][:6] == 'https:'):
-            self.smallScreenshot = rawData['small_screenshot']
-        else:
-            self.smallScreenshot: str = "https:" + rawData['small_screenshot']
-        self.largeScreenshot: Optional[str]
-        if (rawData['large_screenshot'] == ''):
-            self.largeScreenshot = None
-        if (rawData['large_screenshot'][:6] == 'https:'):
-            self.largeScreenshot = rawData['large_screenshot']
-        else:
-            self.largeScreenshot: str = "https:" + rawData['large_screenshot']
-        self.seeds: int = rawData['seeds']
-        self.peers: int = rawData['peers']
-        self.releaseDate = pytz.utc.localize(datetime.fromtimestamp(rawData['date_released_unix']))
-        self.size: int = rawData['size_bytes']
-# Check if this is a whole season download:
-        self.isSeason: bool = False
-        if (self.season != 0 and self.episode == 0):
-            self.isSeason = True
-# Check if this is a first season:
-        self.isFirstSeason: bool = False
-        if (self.isSeason == True and self.season == 1):
-            self.isFirstSeason == True
-# Parse title for quality:
-        self.quality: str
-        if (self.title.lower().find('2160p') > -1):
-            self.quality = self.QUALITY_2160P
-        elif (self.title.lower().find('1080p') > -1):
-            self.quality = self.QUALITY_1080P
-        elif (self.title.lower().find('720p') > -1):
-            self.quality = self.QUALITY_720P
-        elif (self.title.lower().find('540p') > -1):
-            self.quality = self.QUALITY_540P
-        elif (self.title.lower().find('360p') > -1):
-            self.quality = self.QUALITY_360P
-        elif (self.title.lower().find('240p') > -1):
-            self.quality = self.QUALITY_240P
-        else:
-            self.quality = self.QUALITY_UNKNOWN
-# Parse title for encoding:
-        self.encoding: str
-        if (self.title.lower().find('x264') > -1):
-            self.encoding = self.ENCODING_X264
-        elif (self.title.lower().find('x265') > -1):
-            self.encoding = self.ENCODING_X265
-        elif (self.title.lower().find('xvid') > -1):
-            self.encoding = self.ENCODING_XVID
-        elif (self.title.lower().find('h264') > -1):
-            self.encoding = self.ENCODING_H264
-        elif (self.title.lower().find('h265') > -1):
-            self.encoding = self.ENCODING_H265
-        else:
-            self.encoding = self.ENCODING_UNKNOWN
-# Parse title for aired date
-        self.airedDate: Optional[date] = None
-        if (self.episode == 0 and self.season == 0):
-            print(self.title)
-            airedDateYMDMatch = re.match(r'^.*(?P<year>\d{4}) (?P<month>\d+) (?P<day>\d+).*$', self.title )
-            airedDateDMYMatch = re.match(r'^.* (?P<day>\d+)(th|st)? (?P<month>\w+) (?P<year>\d{4})', self.title)
-            if (airedDateYMDMatch != None):
-                self.airedDate = date(int(airedDateYMDMatch['year']), int(airedDateYMDMatch['month']), int(airedDateYMDMatch['day']))
-            elif (airedDateDMYMatch != None):
-                if (airedDateDMYMatch['month'].lower() in MONTH_NUMBER_BY_SHORT_NAME.keys()):
-                    month = MONTH_NUMBER_BY_SHORT_NAME[airedDateDMYMatch['month'].lower()]
-                elif (airedDateDMYMatch['month'].lower() in MONTH_NUMBER_BY_LONG_NAME.keys()):
-                    month = MONTH_NUMBER_BY_LONG_NAME[airedDateDMYMatch['month'].lower()]
-                else:
-                    month = None
-                if (month == None):
-                    self.airedDate = None
-                else:
-                    self.airedDate = date(int(airedDateDMYMatch['year']), month, int(airedDateDMYMatch['day']))
-# Parse season and episode for premiere:
-        self.isPremiere: bool = False
-        if (self.season == 1 and self.episode == 1):
-            self.isPremiere = True
-# Parse title for show name:
-        showNameMatch = self.SHOW_NAME_REGEX.match(self.title)
-        self.name = showNameMatch['name']
+        self._releaseDate: Optional[datetime] = None
+        self._titleInfo: Optional[TitleInfo] = None
         return
 
+###################
+# Raw properties:
+###################
+    @property
+    def hash(self) -> str:
+        return self._raw['hash']
+
+    @property
+    def filename(self) -> str:
+        return self._raw['filename']
+
+    @property
+    def title(self) -> str:
+        return self._raw['title']
+
+    @property
+    def episodeLink(self) -> str:
+        return self._raw['episode_url']
+
+    @property
+    def torrent(self) -> str:
+        return self._raw['torrent_url']
+
+    @property
+    def magnet(self) -> str:
+        return self._raw['magnet_url']
+
+    @property
+    def imdbId(self) -> str:
+        return self._raw['imdb_id']
+
+    @property
+    def seeds(self) -> int:
+        return int(self._raw['seeds'] or 0)
+
+    @property
+    def peers(self) -> int:
+        return int(self._raw['peers'] or 0)
+
+    @property
+    def size(self) -> int:
+        return int(self._raw['size_bytes'] or 0)
+
+    @property
+    def releaseTimestamp(self) -> int:
+        """The release date as a unix timestamp, cheaper to compare than releaseDate."""
+        return int(self._raw['date_released_unix'] or 0)
+
+###################
+# Derived properties:
+###################
+    @staticmethod
+    def __fixScreenshotUrl__(url:str) -> Optional[str]:
+        if (url == '' or url == None):
+            return None
+        elif (url[:6] == 'https:'):
+            return url
+        return "https:" + url
+
+    @property
+    def smallScreenshot(self) -> Optional[str]:
+        return self.__fixScreenshotUrl__(self._raw['small_screenshot'])
+
+    @property
+    def largeScreenshot(self) -> Optional[str]:
+        return self.__fixScreenshotUrl__(self._raw['large_screenshot'])
+
+    @property
+    def releaseDate(self) -> datetime:
+        if (self._releaseDate == None):
+            self._releaseDate = pytz.utc.localize(datetime.fromtimestamp(self.releaseTimestamp))
+        return self._releaseDate
+
+    @property
+    def isSeason(self) -> bool:
+        """True if this is a whole season download."""
+        return (self.season != 0 and self.episode == 0)
+
+    @property
+    def isFirstSeason(self) -> bool:
+        return (self.season == 1 and self.episode == 0)
+
+    @property
+    def isPremiere(self) -> bool:
+        return (self.season == 1 and self.episode == 1)
+
+    def __getTitleInfo__(self) -> TitleInfo:
+        if (self._titleInfo == None):
+            self._titleInfo = classifyTitle(self._raw['title'], (self.episode == 0 and self.season == 0))
+        return self._titleInfo
+
+    @property
+    def quality(self) -> int:
+        return self.__getTitleInfo__().quality
+
+    @property
+    def encoding(self) -> str:
+        return self.__getTitleInfo__().encoding
+
+    @property
+    def airedDate(self) -> Optional[date]:
+        return self.__getTitleInfo__().airedDate
+
+    @property
+    def name(self) -> str:
+        return self.__getTitleInfo__().name
+
+    @property
+    def episodeKey(self) -> tuple[str, int, int, Optional[date]]:
+        """Identifies the episode regardless of release: (name, season, episode, airedDate), airedDate is only set for daily shows."""
+        return (self.name, self.season, self.episode, self.airedDate)
+
 ###################
 # Overrides:
 ###################
@@ -180,6 +228,9 @@ class Torrent(object):
             return True
         return False
 
+    def __hash__(self) -> int:
+        return hash(self.id)
+
     def __lt__(self, __o:Self) -> bool:
         if (isinstance(__o, Torrent) == False):
             errorMessage = "Can only compare Torrent not %s" % str(type(__o))
@@ -211,7 +262,7 @@ class Torrent(object):
             'largeScreenshot': self.largeScreenshot,
             'seeds': self.seeds,
             'peers': self.peers,
-            'releaseDate': self.releaseDate.timestamp(),
+            'releaseDate': self.releaseTimestamp,
             'size': self.size,
             'isSeason': self.isSeason,
             'quality': self.quality,
@@ -222,49 +273,77 @@ class Torrent(object):
             'name': self.name,
         }
         if (self.airedDate != None):
-            torrentDict['airedDate'] = self.airedDate.__toDict__()
+            torrentDict['airedDate'] = self.airedDate.isoformat()
         return torrentDict
 
     def __fromDict__(self, fromDict:dict[str, object]) -> None:
-        self.id = fromDict['id']
-        self.hash = fromDict['hash']
-        self.filename = fromDict['filename']
-        self.title = fromDict['title']
-        self.episodeLink = fromDict['episodeLink']
-        self.torrent = fromDict['torrent']
-        self.magnet = fromDict['magnet']
-        self.imdbId = fromDict['imdbId']
-        self.season = fromDict['season']
-        self.episode = fromDict['episode']
-        self.smallScreenshot = fromDict['smallScreenshot']
-        self.largeScreenshot = fromDict['largeScreenshot']
-        self.seeds = fromDict['seeds']
-        self.peers = fromDict['peers']
-        self.releaseDate = pytz.utc.localize(datetime.fromtimestamp(fromDict['releaseDate']))
-        self.size = fromDict['size']
-        self.isSeason = fromDict['isSeason']
-        self.quality = fromDict['quality']
-        self.encoding = fromDict['encoding']
-        self.airedDate = None
+    # Rebuild the raw api dict, isSeason, isPremiere and isFirstSeason are derived from season and episode:
+        self.__fromRawData__({
+            'id': fromDict['id'],
+            'hash': fromDict['hash'],
+            'filename': fromDict['filename'],
+            'title': fromDict['title'],
+            'episode_url': fromDict['episodeLink'],
+            'torrent_url': fromDict['torrent'],
+            'magnet_url': fromDict['magnet'],
+            'imdb_id': fromDict['imdbId'],
+            'season': fromDict['season'],
+            'episode': fromDict['episode'],
+            'small_screenshot': fromDict['smallScreenshot'] or '',
+            'large_screenshot': fromDict['largeScreenshot'] or '',
+            'seeds': fromDict['seeds'],
+            'peers': fromDict['peers'],
+            'date_released_unix': fromDict['releaseDate'],
+            'size_bytes': fromDict['size'],
+        })
+    # Restore the stored classification rather than re-parsing the title:
+        airedDate: Optional[date] = None
         if (fromDict['airedDate'] != None):
-            self.airedDate = date.fromisoformat(fromDict['airedDate'])
-        self.isPremiere = fromDict['isPremiere']
-        self.isFirstSeason = fromDict['isFirstSeason']
-        self.name = fromDict['name']
+            airedDate = date.fromisoformat(fromDict['airedDate'])
+        self._titleInfo = TitleInfo(fromDict['quality'], fromDict['encoding'], airedDate, fromDict['name'])
         return
-        
+
+##################
+# To / From Record:
+##################
+    def __toRecord__(self) -> tuple:
+        """A flat tuple of plain values, cheaper than __toDict__ to pickle, store and rebuild. See RECORD_RAW_KEYS."""
+        titleInfo = self.__getTitleInfo__()
+        airedDate: Optional[int] = None
+        if (titleInfo.airedDate != None):
+            airedDate = titleInfo.airedDate.toordinal()
+        record = [self._raw[key] for key in self.RECORD_RAW_KEYS]
+    # The api sends season and episode as strings, and may send the counts, date and size as strings or null:
+        record[8] = self.season
+        record[9] = self.episode
+        record[12] = self.seeds
+        record[13] = self.peers
+        record[14] = self.releaseTimestamp
+        record[15] = self.size
+        record.extend((titleInfo.quality, titleInfo.encoding, airedDate, titleInfo.name))
+        return tuple(record)
+
+    def __fromRecord__(self, record:tuple) -> None:
+        self.__fromRawData__(dict(zip(self.RECORD_RAW_KEYS, record)))
+        airedDate: Optional[date] = None
+        if (record[-2] != None):
+            airedDate = date.fromordinal(record[-2])
+        self._titleInfo = TitleInfo(record[-4], record[-3], airedDate, record[-1])
+        return
+
 ##################
 # Methods:
 ##################
-    def downloadTorrent(self, destPath:str) -> str:
+    def downloadTorrent(self, destPath:str, transport:Optional[Transport]=None) -> str:
         """
             Download the torrent file to the directory specified by destPath.
             @param: str, destPath, the directory to download the torrent to.
+            @param: Optional[Transport], transport. The transport to download with, defaults to the shared transport.
             @return: str, response. Path to the downloaded file
         """
         fileName = self.torrent.split('/')[-1]
         filePath = os.path.join(destPath, fileName)
-        __downloadFile__(self.torrent, filePath)
+        __downloadFile__(self.torrent, filePath, transport)
         return filePath
     
     def openMagnet(self) -> bool:
@@ -278,37 +357,110 @@ class Torrent(object):
             return False
         return True
     
-    def downloadSmallScreenshot(self, destPath) -> Optional[str]:
+    def downloadSmallScreenshot(self, destPath, transport:Optional[Transport]=None) -> Optional[str]:
         """
             Downloads a small screenshot of the torrent.
             @param: str, destPath. Directory to save the screenshot in to.
+            @param: Optional[Transport], transport. The transport to download with, defaults to the shared transport.
             @return: str, filePath. Complete path to the downloaded file, or None if unavailable.
         """
         if (self.smallScreenshot == None):
             return None
         fileName = self.smallScreenshot.split('/')[-1]
         filePath = os.path.join(destPath, fileName)
-        __downloadFile__(self.smallScreenshot, filePath)
+        __downloadFile__(self.smallScreenshot, filePath, transport)
         return filePath
     
-    def downloadLargeScreenshot(self, destPath) -> Optional[str]:
+    def downloadLargeScreenshot(self, destPath, transport:Optional[Transport]=None) -> Optional[str]:
         """
             Downloads a large screenshot of the torrent.
             @param: str, destPath. Directory to save the screenshot in to.
+            @param: Optional[Transport], transport. The transport to download with, defaults to the shared transport.
             @return: str, filePath. Complete path to the downloaded file, or None if unavailable.
         """
         if (self.largeScreenshot == None):
             return None
         fileName = self.largeScreenshot.split('/')[-1]
         filePath = os.path.join(destPath, fileName)
-        __downloadFile__(self.largeScreenshot, filePath)
+        __downloadFile__(self.largeScreenshot, filePath, transport)
         return filePath
 
     def compare(self, __o:Self) -> bool:
+        """True if both torrents are releases of the same episode."""
         if (isinstance(__o, Torrent) == False):
             return False
-        if (self.name == __o.name):
-            if (self.season == __o.season):
-                if (self.episode == __o.episode):
-                    return True
-        return False
\ No newline at end of file
+        return (self.episodeKey == __o.episodeKey)
+
+#########################
+# Title classification:
+#########################
+TITLE_CACHE_SIZE: int = 8192
+# Quality and encoding tokens in precedence order, the first found wins, like the original if/elif chain.
+# Substring tests on one lower cased copy are cheaper than a regex scan for the handful of tokens:
+__QUALITY_TOKENS__: tuple[tuple[str, int]] = (
+    ('2160p', Torrent.QUALITY_2160P), ('1080p', Torrent.QUALITY_1080P), ('720p', Torrent.QUALITY_720P),
+    ('540p', Torrent.QUALITY_540P), ('480p', Torrent.QUALITY_480P), ('360p', Torrent.QUALITY_360P),
+    ('240p', Torrent.QUALITY_240P),
+)
+__ENCODING_TOKENS__: tuple[str] = (Torrent.ENCODING_X264, Torrent.ENCODING_X265, Torrent.ENCODING_XVID,
+                                    Torrent.ENCODING_H264, Torrent.ENCODING_H265)
+__AIRED_DATE_YMD_REGEX__ = re.compile(r'^.*(?P<year>\d{4}) (?P<month>\d+) (?P<day>\d+).*$')
+__AIRED_DATE_DMY_REGEX__ = re.compile(r'^.* (?P<day>\d+)(?:th|st|nd|rd)? (?P<month>\w+) (?P<year>\d{4})')
+
+def __makeDate__(year:str, month:str | int, day:str) -> Optional[date]:
+    if (isinstance(month, str) == True):
+        monthName = month.lower()
+        if (month.isdigit() == True):
+            month = int(month)
+        elif (monthName in MONTH_NUMBER_BY_SHORT_NAME.keys()):
+            month = MONTH_NUMBER_BY_SHORT_NAME[monthName]
+        elif (monthName in MONTH_NUMBER_BY_LONG_NAME.keys()):
+            month = MONTH_NUMBER_BY_LONG_NAME[monthName]
+        else:
+            return None
+    try:
+        return date(int(year), month, int(day))
+    except ValueError:
+        return None
+
+@lru_cache(maxsize=TITLE_CACHE_SIZE)
+def classifyTitle(title:str, isDaily:Optional[bool]=False) -> TitleInfo:
+    """
+        Classify a torrent title, results are cached by title.
+        Parsing a new title is only modestly cheaper than the original chain of checks, the show name match
+        dominates either way. The main saving is that a title already classified, ie: seen on an earlier poll
+        of the same page, isn't parsed again.
+        @param: title: str, the torrent title.
+        @param: isDaily: Optional[bool], True if the torrent has no season and episode, so the aired date is parsed.
+        @return: TitleInfo, the quality, encoding, aired date and show name.
+    """
+# Quality and encoding:
+    lowerTitle = title.lower()
+    quality: int = Torrent.QUALITY_UNKNOWN
+    for token, tokenQuality in __QUALITY_TOKENS__:
+        if (token in lowerTitle):
+            quality = tokenQuality
+            break
+    encoding: str = Torrent.ENCODING_UNKNOWN
+    for token in __ENCODING_TOKENS__:
+        if (token in lowerTitle):
+            encoding = token
+            break
+# Show name, and aired date when the name is followed by one:
+    airedDate: Optional[date] = None
+    name: str = title
+    showNameMatch = Torrent.SHOW_NAME_REGEX.match(title)
+    if (showNameMatch != None):
+        name = showNameMatch['name']
+        if (isDaily == True and showNameMatch['ymdYear'] != None):
+            airedDate = __makeDate__(showNameMatch['ymdYear'], showNameMatch['ymdMonth'], showNameMatch['ymdDay'])
+        elif (isDaily == True and showNameMatch['dmyYear'] != None):
+            airedDate = __makeDate__(showNameMatch['dmyYear'], showNameMatch['dmyMonth'], showNameMatch['dmyDay'])
+# Fall back to scanning the whole title for a date:
+    if (isDaily == True and airedDate == None):
+        airedDateMatch = __AIRED_DATE_YMD_REGEX__.match(title)
+        if (airedDateMatch == None):
+            airedDateMatch = __AIRED_DATE_DMY_REGEX__.match(title)
+        if (airedDateMatch != None):
+            airedDate = __makeDate__(airedDateMatch['year'], airedDateMatch['month'], airedDateMatch['day'])
+    return TitleInfo(quality, encoding, airedDate, name)
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+
+from typing import Optional, Iterable, NamedTuple
+from abc import ABC, abstractmethod
+import json
+from requests.exceptions import RequestException
+from common import __typeError__
+from torrent import Torrent
+from transport import Transport, getDefaultTransport
+from instrumentation import getInstrumentation
+
+DEFAULT_RPC_URL: str = 'http://localhost:9091/transmission/rpc'
+DEFAULT_BATCH_SIZE: int = 50
+SESSION_ID_HEADER: str = 'X-Transmission-Session-Id'
+
+class SinkResult(NamedTuple):
+    """The outcome of handing off one torrent."""
+    torrent: Torrent
+    error: Optional[str]
+
+class TorrentSink(ABC):
+    """
+        Where selected torrents are handed off, instead of downloading their .torrent files.
+
+        Methods:
+            send(torrents) Hand off torrents, returns a SinkResult per torrent, in order.
+            close() Release anything the sink holds open.
+    """
+    @abstractmethod
+    def send(self, torrents:Iterable[Torrent]) -> list[SinkResult]:
+        """
+            Hand off torrents.
+            @param: torrents: Iterable[Torrent], the torrents to hand off.
+            @return: list[SinkResult], one per torrent, in order.
+        """
+
+    def close(self) -> None:
+        return
+
+class XdgOpenSink(TorrentSink):
+    """Opens each magnet in the desktop's preferred torrent client, see Torrent.openMagnet. One process per torrent."""
+    def send(self, torrents:Iterable[Torrent]) -> list[SinkResult]:
+        results: list[SinkResult] = []
+        for torrent in torrents:
+            if (torrent.openMagnet() == True):
+                results.append(SinkResult(torrent, None))
+            else:
+                results.append(SinkResult(torrent, "xdg-open failed for '%s'" % torrent.title))
+        return results
+
+class TransmissionSink(TorrentSink):
+    """
+        Adds magnets to a Transmission daemon over its RPC interface.
+
+        Every request goes over the pooled, keep-alive transport. The session id handshake (a 409 answer carrying
+        X-Transmission-Session-Id) is done on the first request and again only when the daemon expires the id.
+        Magnets are sent batchSize at a time as one JSON-RPC 2.0 batch request. Daemons older than JSON-RPC 2.0
+        answer a batch with a legacy error; from then on the sink sends one legacy torrent-add per magnet, still
+        over the same connection.
+
+        Methods:
+            send(torrents) Add the torrents' magnets, duplicates of torrents the daemon already has count as added.
+        Properties:
+            requestCount: int, RPC requests made, handshakes included.
+    """
+    def __init__(self,
+                    rpcUrl: Optional[str] = DEFAULT_RPC_URL,
+                    username: Optional[str] = None,
+                    password: Optional[str] = None,
+                    transport: Optional[Transport] = None,
+                    batchSize: Optional[int] = DEFAULT_BATCH_SIZE,
+                    downloadDir: Optional[str] = None,
+                    paused: Optional[bool] = False,
+                ) -> None:
+        """
+            @param: rpcUrl: Optional[str], the daemon's RPC url.
+            @param: username: Optional[str], the RPC username, if authentication is enabled.
+            @param: password: Optional[str], the RPC password.
+            @param: transport: Optional[Transport], the transport to make requests with, defaults to the shared transport.
+            @param: batchSize: Optional[int], the maximum number of magnets per request.
+            @param: downloadDir: Optional[str], the directory the daemon downloads to, None for its default.
+            @param: paused: Optional[bool], add the torrents paused.
+        """
+        if (transport == None):
+            transport = getDefaultTransport()
+        elif (isinstance(transport, Transport) == False):
+            __typeError__("transport", "Transport", transport)
+        if (batchSize < 1):
+            errorMessage = "batchSize must be >= 1"
+            raise ValueError(errorMessage)
+        self.rpcUrl: str = rpcUrl
+        self.transport: Transport = transport
+        self.batchSize: int = batchSize
+        self.downloadDir: Optional[str] = downloadDir
+        self.paused: bool = paused
+        self.requestCount: int = 0
+        self._auth: Optional[tuple[str, str]] = None
+        if (username != None):
+            self._auth = (username, password or '')
+        self._sessionId: Optional[str] = None
+    # None until the daemon's protocol is known:
+        self._jsonRpc: Optional[bool] = None
+        return
+
+#########################
+# Helpers:
+#########################
+    def __post__(self, payload:object) -> object:
+        """
+            Post a request, doing the session id handshake if the daemon asks for it.
+            @return: object, the decoded response.
+            @raises: RuntimeError if the daemon can't be reached or doesn't answer with JSON.
+        """
+        body = json.dumps(payload).encode('utf-8')
+        for _ in range(2):
+            headers = {'Content-Type': 'application/json'}
+            if (self._sessionId != None):
+                headers[SESSION_ID_HEADER] = self._sessionId
+            try:
+                response = self.transport.post(self.rpcUrl, data=body, headers=headers, auth=self._auth)
+            except RequestException as e:
+                errorMessage = "ConnectionError: %s" % str(e)
+                raise RuntimeError(errorMessage)
+            self.requestCount += 1
+            getInstrumentation().increment('eztv_sink_requests_total')
+        # The first request, or the id expired, send again with the new one:
+            if (response.status_code != 409 or response.headers.get(SESSION_ID_HEADER) == None):
+                break
+            self._sessionId = response.headers[SESSION_ID_HEADER]
+        if (response.status_code >= 400):
+            errorMessage = "HTTPError: %i Error for url: %s" % (response.status_code, self.rpcUrl)
+            raise RuntimeError(errorMessage)
+        try:
+            return json.loads(response.content)
+        except ValueError as e:
+            errorMessage = "JSONDecodeError: %s" % str(e)
+            raise RuntimeError(errorMessage)
+
+    def __addArguments__(self, torrent:Torrent, separator:str) -> dict[str, object]:
+    # JSON-RPC 2.0 keys are snake_case, legacy keys are kebab-case:
+        arguments: dict[str, object] = {'filename': torrent.magnet, 'paused': self.paused}
+        if (self.downloadDir != None):
+            arguments['download%sdir' % separator] = self.downloadDir
+        return arguments
+
+    def __sendBatch__(self, torrents:list[Torrent]) -> list[SinkResult]:
+        if (self._jsonRpc != False):
+            batch = [{'jsonrpc': '2.0', 'method': 'torrent_add', 'params': self.__addArguments__(torrent, '_'), 'id': index}
+                            for index, torrent in enumerate(torrents)]
+            try:
+                response = self.__post__(batch)
+            except RuntimeError as e:
+                return [SinkResult(torrent, str(e)) for torrent in torrents]
+            if (isinstance(response, list) == True):
+                self._jsonRpc = True
+                replies = {reply.get('id'): reply for reply in response if isinstance(reply, dict) == True}
+                results: list[SinkResult] = []
+                for index, torrent in enumerate(torrents):
+                    reply = replies.get(index)
+                    if (reply == None):
+                        results.append(SinkResult(torrent, "No reply from '%s'" % self.rpcUrl))
+                    elif (reply.get('error') != None):
+                        results.append(SinkResult(torrent, "RPCError: %s" % reply['error'].get('message')))
+                    else:
+                        results.append(SinkResult(torrent, None))
+                return results
+            if (isinstance(response, dict) == True and response.get('jsonrpc') != None):
+                errorMessage = "RPCError: %s" % (response.get('error') or {}).get('message')
+                return [SinkResult(torrent, errorMessage) for torrent in torrents]
+            self._jsonRpc = False
+    # Legacy daemons take one torrent per request:
+        results = []
+        for torrent in torrents:
+            try:
+                response = self.__post__({'method': 'torrent-add', 'arguments': self.__addArguments__(torrent, '-')})
+            except RuntimeError as e:
+                results.append(SinkResult(torrent, str(e)))
+                continue
+            result: Optional[str] = None
+            if (isinstance(response, dict) == True):
+                result = response.get('result')
+            if (result == 'success'):
+                results.append(SinkResult(torrent, None))
+            else:
+                results.append(SinkResult(torrent, "RPCError: %s" % result))
+        return results
+
+#########################
+# Methods:
+#########################
+    def send(self, torrents:Iterable[Torrent]) -> list[SinkResult]:
+        """
+            Add the torrents' magnets to the daemon, batchSize per request.
+            @param: torrents: Iterable[Torrent], the torrents to add.
+            @return: list[SinkResult], one per torrent, in order.
+        """
+        torrents = list(torrents)
+        results: list[SinkResult] = []
+        for start in range(0, len(torrents), self.batchSize):
+            results.extend(self.__sendBatch__(torrents[start:start + self.batchSize]))
+        return results
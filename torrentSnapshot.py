@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+
+from typing import Optional, Iterable, Iterator
+import os
+import sys
+import mmap
+import array
+import struct
+import hashlib
+from bisect import bisect_left
+from datetime import date
+from torrent import Torrent
+
+SNAPSHOT_MAGIC: bytes = b'EZTVSNAP'
+SNAPSHOT_VERSION: int = 1
+__HEADER__ = struct.Struct('<8sHHII')
+# Fixed width columns, in file order: (name, array typecode). Each column is rowCount values, padded to 8 bytes.
+# Numeric record fields:
+__NUMERIC_COLUMNS__: tuple[tuple[str, str]] = (('id', 'q'), ('season', 'i'), ('episode', 'i'), ('seeds', 'i'), ('peers', 'i'),
+                                                ('releaseTimestamp', 'q'), ('size', 'q'), ('quality', 'i'), ('airedDate', 'i'))
+# String record fields, as indexes in to the string table:
+__STRING_COLUMNS__: tuple[str] = ('hash', 'filename', 'title', 'episodeUrl', 'torrentUrl', 'magnetUrl', 'imdbId',
+                                    'smallScreenshot', 'largeScreenshot', 'encoding', 'name')
+# Lookup indexes, row numbers sorted by id, by hash, and by episode key digest:
+__INDEX_COLUMNS__: tuple[tuple[str, str]] = (('idOrder', 'I'), ('hashOrder', 'I'), ('episodeDigest', 'Q'), ('episodeOrder', 'I'))
+__COLUMNS__: tuple[tuple[str, str]] = __NUMERIC_COLUMNS__ + tuple((name, 'I') for name in __STRING_COLUMNS__) + __INDEX_COLUMNS__
+# Where each column's value sits in a Torrent record (see Torrent.RECORD_RAW_KEYS):
+__RECORD_INDEX__: dict[str, int] = {
+    'id': 0, 'hash': 1, 'filename': 2, 'title': 3, 'episodeUrl': 4, 'torrentUrl': 5, 'magnetUrl': 6, 'imdbId': 7,
+    'season': 8, 'episode': 9, 'smallScreenshot': 10, 'largeScreenshot': 11, 'seeds': 12, 'peers': 13,
+    'releaseTimestamp': 14, 'size': 15, 'quality': 16, 'encoding': 17, 'airedDate': 18, 'name': 19,
+}
+
+def __padded__(size:int) -> int:
+    return (size + 7) & ~7
+
+def __episodeDigest__(name:str, season:int, episode:int, airedOrdinal:int) -> int:
+# A stable 64 bit digest of Torrent.episodeKey, hash() is salted per process:
+    keyBytes = ('%s\0%i\0%i\0%i' % (name, season, episode, airedOrdinal)).encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(keyBytes, digest_size=8).digest(), 'little')
+
+def writeSnapshot(filePath:str, records:Iterable[tuple]) -> int:
+    """
+        Write Torrent records to a binary snapshot, atomically replacing filePath.
+        @param: filePath: str, the snapshot file.
+        @param: records: Iterable[tuple], records from Torrent.__toRecord__.
+        @return: int, the number of rows written.
+    """
+    columns: dict[str, array.array] = {name: array.array(typecode) for name, typecode in __COLUMNS__}
+    stringIndexes: dict[str, int] = {}
+    strings: list[bytes] = []
+    hashes: list[str] = []
+    for record in records:
+        for name, _ in __NUMERIC_COLUMNS__:
+            value = record[__RECORD_INDEX__[name]]
+            if (name == 'airedDate' and value == None):
+                value = 0
+            columns[name].append(value)
+        for name in __STRING_COLUMNS__:
+            value = record[__RECORD_INDEX__[name]]
+            if (value == None):
+                value = ''
+            stringIndex = stringIndexes.get(value)
+            if (stringIndex == None):
+                stringIndex = len(strings)
+                stringIndexes[value] = stringIndex
+                strings.append(value.encode('utf-8'))
+            columns[name].append(stringIndex)
+        hashes.append(record[1] or '')
+        columns['episodeDigest'].append(__episodeDigest__(record[19], record[8], record[9], columns['airedDate'][-1]))
+    rowCount = len(hashes)
+    columns['idOrder'].extend(sorted(range(rowCount), key=columns['id'].__getitem__))
+    columns['hashOrder'].extend(sorted(range(rowCount), key=hashes.__getitem__))
+    columns['episodeOrder'].extend(sorted(range(rowCount), key=columns['episodeDigest'].__getitem__))
+    stringOffsets = array.array('Q', [0])
+    for stringBytes in strings:
+        stringOffsets.append(stringOffsets[-1] + len(stringBytes))
+    tempFilePath = filePath + '.tmp'
+    try:
+        with open(tempFilePath, 'wb') as fileHandle:
+            fileHandle.write(__HEADER__.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, 0, rowCount, len(strings)))
+            fileHandle.write(b'\0' * (__padded__(__HEADER__.size) - __HEADER__.size))
+            for column in list(columns.values()) + [stringOffsets]:
+                if (sys.byteorder != 'little'):
+                    column.byteswap()
+                columnBytes = column.tobytes()
+                fileHandle.write(columnBytes)
+                fileHandle.write(b'\0' * (__padded__(len(columnBytes)) - len(columnBytes)))
+            fileHandle.write(b''.join(strings))
+            fileHandle.flush()
+            os.fsync(fileHandle.fileno())
+        os.replace(tempFilePath, filePath)
+    except OSError as e:
+        errorMessage = "Failed to write snapshot '%s': %s" % (filePath, str(e.args))
+        raise RuntimeError(errorMessage)
+    return rowCount
+
+class TorrentSnapshot(object):
+    """
+        Read only, memory mapped view of a binary torrent snapshot.
+
+        Version 1 layout, little endian: a header (magic, version, flags, row count, string count), one fixed
+        width column per numeric field, one column of string table indexes per string field, row orders by
+        id, info hash and episode key digest for lookups, then the string table (offsets and utf-8 data).
+        Strings are interned, so repeated show names, encodings and imdb ids are stored once.
+
+        Opening only maps the file and checks the header; rows are decoded, and Torrents built, when accessed.
+
+        Methods:
+            record(row) The Torrent record of a row.
+            findId(torrentId) / findHash(hash) / findEpisode(episodeKey) The row number, or None.
+            close() Unmap the file.
+        Supports: len(), snapshot[row] -> Torrent, and iteration over Torrents in row order.
+    """
+    def __init__(self, filePath:str) -> None:
+        """
+            @param: filePath: str, a file written by writeSnapshot.
+            @raises: RuntimeError if the file can't be read or isn't a version 1 snapshot.
+        """
+        self.filePath: str = filePath
+        try:
+            with open(filePath, 'rb') as fileHandle:
+                self._mmap: mmap.mmap = mmap.mmap(fileHandle.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            errorMessage = "Failed to open snapshot '%s': %s" % (filePath, str(e.args))
+            raise RuntimeError(errorMessage)
+        if (len(self._mmap) < __HEADER__.size):
+            self._mmap.close()
+            errorMessage = "'%s' is not a torrent snapshot." % filePath
+            raise RuntimeError(errorMessage)
+        magic, version, flags, rowCount, stringCount = __HEADER__.unpack_from(self._mmap, 0)
+        if (magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION):
+            self._mmap.close()
+            errorMessage = "'%s' is not a version %i torrent snapshot." % (filePath, SNAPSHOT_VERSION)
+            raise RuntimeError(errorMessage)
+        self.rowCount: int = rowCount
+        self.stringCount: int = stringCount
+        view = memoryview(self._mmap)
+        offset = __padded__(__HEADER__.size)
+        self._columns: dict[str, memoryview | array.array] = {}
+        for name, typecode in __COLUMNS__ + (('stringOffsets', 'Q'),):
+            count = rowCount
+            if (name == 'stringOffsets'):
+                count = stringCount + 1
+            size = count * array.array(typecode).itemsize
+            if (offset + size > len(self._mmap)):
+                view.release()
+                self._mmap.close()
+                errorMessage = "Snapshot '%s' is truncated." % filePath
+                raise RuntimeError(errorMessage)
+            self._columns[name] = self.__column__(view[offset:offset + size], typecode)
+            offset += __padded__(size)
+        self._stringsOffset: int = offset
+        self._strings: dict[int, str] = {}
+        view.release()
+        if (offset + self._columns['stringOffsets'][stringCount] > len(self._mmap)):
+            self._columns = {}
+            self._mmap.close()
+            errorMessage = "Snapshot '%s' is truncated." % filePath
+            raise RuntimeError(errorMessage)
+        return
+
+    @staticmethod
+    def __column__(view:memoryview, typecode:str) -> memoryview | array.array:
+    # Zero copy on little endian machines, the column is copied and swapped once elsewhere:
+        if (sys.byteorder == 'little'):
+            return view.cast(typecode)
+        column = array.array(typecode, view.tobytes())
+        column.byteswap()
+        return column
+
+    def close(self) -> None:
+        for column in self._columns.values():
+            if (isinstance(column, memoryview) == True):
+                column.release()
+        self._columns = {}
+        self._mmap.close()
+        return
+
+    def __len__(self) -> int:
+        return self.rowCount
+
+    def __getitem__(self, row:int) -> Torrent:
+        return Torrent(fromRecord=self.record(row))
+
+    def __iter__(self) -> Iterator[Torrent]:
+        for row in range(self.rowCount):
+            yield self[row]
+        return
+
+#########################
+# Helpers:
+#########################
+    def __string__(self, stringIndex:int) -> str:
+        value = self._strings.get(stringIndex)
+        if (value == None):
+            offsets = self._columns['stringOffsets']
+            start = self._stringsOffset + offsets[stringIndex]
+            value = self._mmap[start:start + offsets[stringIndex + 1] - offsets[stringIndex]].decode('utf-8')
+            self._strings[stringIndex] = value
+        return value
+
+    def __find__(self, orderName:str, target:object, valueOf) -> Optional[int]:
+        order = self._columns[orderName]
+        position = bisect_left(range(self.rowCount), target, key=lambda position: valueOf(order[position]))
+        if (position < self.rowCount and valueOf(order[position]) == target):
+            return order[position]
+        return None
+
+#########################
+# Methods:
+#########################
+    def record(self, row:int) -> tuple:
+        if (row < 0):
+            row += self.rowCount
+        if (row < 0 or row >= self.rowCount):
+            raise IndexError("snapshot row out of range")
+        record: list[object] = [None] * len(__RECORD_INDEX__)
+        for name, _ in __NUMERIC_COLUMNS__:
+            record[__RECORD_INDEX__[name]] = self._columns[name][row]
+        for name in __STRING_COLUMNS__:
+            record[__RECORD_INDEX__[name]] = self.__string__(self._columns[name][row])
+        if (record[18] == 0):
+            record[18] = None
+        return tuple(record)
+
+    def findId(self, torrentId:int) -> Optional[int]:
+        return self.__find__('idOrder', torrentId, self._columns['id'].__getitem__)
+
+    def findHash(self, torrentHash:str) -> Optional[int]:
+    # Rows without a hash are still in hashOrder, sorted first, but an empty hash never matches:
+        if (torrentHash == '' or torrentHash == None):
+            return None
+        hashColumn = self._columns['hash']
+        return self.__find__('hashOrder', torrentHash, lambda row: self.__string__(hashColumn[row]))
+
+    def findEpisode(self, episodeKey:tuple[str, int, int, Optional[date]]) -> Optional[int]:
+        """
+            @param: episodeKey: tuple[str, int, int, Optional[date]], a Torrent.episodeKey.
+            @return: Optional[int], the first row of that episode, or None.
+        """
+        name, season, episode, airedDate = episodeKey
+        airedOrdinal = 0
+        if (airedDate != None):
+            airedOrdinal = airedDate.toordinal()
+        digest = __episodeDigest__(name, season, episode, airedOrdinal)
+        order = self._columns['episodeOrder']
+        digestColumn = self._columns['episodeDigest']
+        position = bisect_left(range(self.rowCount), digest, key=lambda position: digestColumn[order[position]])
+    # Digests can collide, check the key of every row with this digest:
+        while (position < self.rowCount and digestColumn[order[position]] == digest):
+            row = order[position]
+            record = self.record(row)
+            if ((record[19], record[8], record[9], record[18] or 0) == (name, season, episode, airedOrdinal)):
+                return row
+            position += 1
+        return None
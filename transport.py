@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+
+from typing import Optional, Any, Iterator
+import json
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import HTTPError
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_POOL_CONNECTIONS: int = 4
+DEFAULT_POOL_MAXSIZE: int = 8
+DEFAULT_CONNECT_TIMEOUT: float = 5.0
+DEFAULT_READ_TIMEOUT: float = 30.0
+
+class Transport(object):
+    """
+        Pooled, keep-alive HTTP transport shared by the api and all file downloads.
+
+        Wraps a single requests.Session so every page request and every .torrent / screenshot download
+        reuses the same connection pool instead of paying a new TCP+TLS handshake per request.
+
+        Methods:
+            get(url, **kwargs) Perform a GET request through the pool, returns a requests.Response.
+            post(url, **kwargs) Perform a POST request through the pool, ie: to a torrent client's RPC.
+            close() Close all pooled connections.
+    """
+    def __init__(self,
+                    poolConnections: Optional[int] = DEFAULT_POOL_CONNECTIONS,
+                    poolMaxSize: Optional[int] = DEFAULT_POOL_MAXSIZE,
+                    connectTimeout: Optional[float] = DEFAULT_CONNECT_TIMEOUT,
+                    readTimeout: Optional[float] = DEFAULT_READ_TIMEOUT,
+                    session: Optional[requests.Session] = None,
+                ) -> None:
+        """
+            @param: poolConnections: Optional[int], the number of distinct hosts to keep pools for.
+            @param: poolMaxSize: Optional[int], the maximum number of kept-alive connections per host.
+            @param: connectTimeout: Optional[float], seconds to wait for a connection.
+            @param: readTimeout: Optional[float], seconds to wait between bytes of a response.
+            @param: session: Optional[requests.Session], an existing session to use instead of creating one.
+        """
+        if (poolConnections < 1):
+            errorMessage = "poolConnections must be >= 1"
+            raise ValueError(errorMessage)
+        if (poolMaxSize < 1):
+            errorMessage = "poolMaxSize must be >= 1"
+            raise ValueError(errorMessage)
+        self.timeout: tuple[float, float] = (connectTimeout, readTimeout)
+        if (session == None):
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=poolConnections, pool_maxsize=poolMaxSize)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        self._session: requests.Session = session
+        return
+
+    def get(self, url:str, **kwargs) -> requests.Response:
+        """
+            Perform a GET request through the connection pool.
+            @param: url: str, the url to get.
+            @param: kwargs, passed through to requests.Session.get; timeout defaults to the transport timeout.
+            @return: requests.Response, the response.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        return self._session.get(url, **kwargs)
+
+    def post(self, url:str, **kwargs) -> requests.Response:
+        """
+            Perform a POST request through the connection pool.
+            @param: url: str, the url to post to.
+            @param: kwargs, passed through to requests.Session.post; timeout defaults to the transport timeout.
+            @return: requests.Response, the response.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        return self._session.post(url, **kwargs)
+
+    def close(self) -> None:
+        """Close all pooled connections."""
+        self._session.close()
+        return
+
+#########################
+# Local stand-in:
+#########################
+class LocalResponse(object):
+    """Minimal stand-in for requests.Response returned by LocalTransport."""
+    def __init__(self, url:str, statusCode:int, content:bytes, headers:Optional[dict[str, str]]=None) -> None:
+        self.url: str = url
+        self.status_code: int = statusCode
+        self.content: bytes = content
+        self.headers: dict[str, str] = CaseInsensitiveDict(headers or {})
+        self.ok: bool = (statusCode < 400)
+        return
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        if (self.ok == False):
+            errorMessage = "%i Error for url: %s" % (self.status_code, self.url)
+            raise HTTPError(errorMessage, response=self)
+        return
+
+    def iter_content(self, chunk_size:int=1) -> Iterator[bytes]:
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i:i + chunk_size]
+
+    def close(self) -> None:
+        return
+
+class LocalTransport(Transport):
+    """
+        Transport stand-in that serves canned responses without touching the network.
+
+        Methods:
+            addResponse(url, content, statusCode, headers) Register a response for a url.
+            addJson(url, obj, statusCode) Register a JSON response for a url.
+            get(url, **kwargs) Return the registered response, or a 404 response.
+            post(url, **kwargs) The same as get, the body is ignored.
+        Properties:
+            requests: list[str], every url requested, in order.
+    """
+    def __init__(self) -> None:
+        self.timeout: tuple[float, float] = (DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
+        self._responses: dict[str, tuple[int, bytes, dict[str, str]]] = {}
+        self._lock: threading.Lock = threading.Lock()
+        self.requests: list[str] = []
+        return
+
+    def addResponse(self, url:str, content:bytes, statusCode:Optional[int]=200, headers:Optional[dict[str, str]]=None) -> None:
+        self._responses[url] = (statusCode, content, headers or {})
+        return
+
+    def addJson(self, url:str, obj:Any, statusCode:Optional[int]=200) -> None:
+        self.addResponse(url, json.dumps(obj).encode(), statusCode, {'Content-Type': 'application/json'})
+        return
+
+    def get(self, url:str, **kwargs) -> LocalResponse:
+        with self._lock:
+            self.requests.append(url)
+        if (url not in self._responses.keys()):
+            return LocalResponse(url, 404, b'')
+        statusCode, content, headers = self._responses[url]
+        requestHeaders: dict[str, str] = kwargs.get('headers') or {}
+    # Honour conditional requests on the ETag like a real server:
+        if (statusCode == 200 and 'ETag' in headers and requestHeaders.get('If-None-Match') == headers['ETag']):
+            return LocalResponse(url, 304, b'', headers)
+    # Honour 'Range: bytes=N-' like a real server:
+        rangeHeader: str = requestHeaders.get('Range', '')
+        if (statusCode == 200 and rangeHeader.startswith('bytes=') == True and rangeHeader.endswith('-') == True):
+            start = int(rangeHeader[6:-1])
+            if (start >= len(content)):
+                return LocalResponse(url, 416, b'', {'Content-Range': 'bytes */%i' % len(content)})
+            headers = dict(headers)
+            headers['Content-Range'] = 'bytes %i-%i/%i' % (start, len(content) - 1, len(content))
+            return LocalResponse(url, 206, content[start:], headers)
+        return LocalResponse(url, statusCode, content, headers)
+
+    def post(self, url:str, **kwargs) -> LocalResponse:
+        return self.get(url, headers=kwargs.get('headers'))
+
+    def close(self) -> None:
+        return
+
+##########################
+# Shared default:
+##########################
+__DEFAULT_TRANSPORT__: Optional[Transport] = None
+__DEFAULT_TRANSPORT_LOCK__: threading.Lock = threading.Lock()
+
+def getDefaultTransport() -> Transport:
+    """Returns the process wide shared transport, creating it on first use."""
+    global __DEFAULT_TRANSPORT__
+    with __DEFAULT_TRANSPORT_LOCK__:
+        if (__DEFAULT_TRANSPORT__ == None):
+            __DEFAULT_TRANSPORT__ = Transport()
+        return __DEFAULT_TRANSPORT__
+
+def setDefaultTransport(transport:Transport) -> Optional[Transport]:
+    """
+        Replace the process wide shared transport.
+        @param: transport: Transport, the new default transport.
+        @return: Optional[Transport], the previous default transport.
+    """
+    global __DEFAULT_TRANSPORT__
+    if (isinstance(transport, Transport) == False):
+        errorMessage = "transport must be of type Transport, not: %s" % str(type(transport))
+        raise TypeError(errorMessage)
+    with __DEFAULT_TRANSPORT_LOCK__:
+        returnValue = __DEFAULT_TRANSPORT__
+        __DEFAULT_TRANSPORT__ = transport
+    return returnValue